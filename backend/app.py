@@ -1,6 +1,6 @@
 import os
 import sys
-from datetime import date, timedelta
+from datetime import date
 
 from flask import Flask
 from flask_migrate import Migrate
@@ -13,16 +13,20 @@ from models.models import (
     DoctorProfile,
     PatientProfile,
     Specialization,
-    DoctorAvailability,
 )
 
 # Import central blueprint (routes are defined in controllers/urls.py)
 from controllers.urls import main_routes
+from services import (
+    bulk, dashboard_stats, database, http_cache, jobs, metrics, notifications, passwords, profiler, replicas,
+    reports, retention, revocation, schedules, search, serializers, slots, synthetic,
+)
 
 
 def create_app():
     """Application factory."""
     app = Flask(__name__)
+    app.json = serializers.JSONProvider(app)  # orjson when installed, ISO dates
 
     # --- Config ---
     app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv(
@@ -31,11 +35,74 @@ def create_app():
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY", "super-secret-key")
     app.secret_key = os.getenv("FLASK_SECRET_KEY", "secret_key_dev")
+    # Background jobs: "database" (run `python app.py worker`), "inline" or "celery"
+    app.config["JOB_BACKEND"] = os.getenv("JOB_BACKEND", "database")
+    app.config["JOB_BROKER_URL"] = os.getenv("JOB_BROKER_URL", "redis://localhost:6379/0")
+    app.config["JOB_CONCURRENCY"] = int(os.getenv("JOB_CONCURRENCY", os.cpu_count() or 1))
+    app.config["JOB_LEASE_SECONDS"] = int(os.getenv("JOB_LEASE_SECONDS", jobs.LEASE_SECONDS))
+    app.config["EXPORT_DIR"] = os.getenv("EXPORT_DIR", os.path.join(app.instance_path, "exports"))
+    app.config["REPORT_DIR"] = os.getenv("REPORT_DIR", os.path.join(app.instance_path, "reports"))
+    app.config["REPORT_WORKERS"] = int(os.getenv("REPORT_WORKERS", 4))
+    # Notification delivery: "webhook" (NOTIFY_WEBHOOK_URL) or "smtp" (SMTP_*); "stub" sends nothing
+    # (development, tests). Unset, delivery fails instead of marking notifications delivered.
+    app.config["NOTIFY_TRANSPORT"] = os.getenv("NOTIFY_TRANSPORT")
+    app.config["NOTIFY_WEBHOOK_URL"] = os.getenv("NOTIFY_WEBHOOK_URL")
+    app.config["NOTIFY_CONCURRENCY"] = int(os.getenv("NOTIFY_CONCURRENCY", notifications.CONCURRENCY))
+    app.config["NOTIFY_MAX_ATTEMPTS"] = int(os.getenv("NOTIFY_MAX_ATTEMPTS", notifications.MAX_ATTEMPTS))
+    for key in ("SMTP_HOST", "SMTP_PORT", "SMTP_SENDER", "SMTP_USERNAME", "SMTP_PASSWORD"):
+        app.config[key] = os.getenv(key)
+    # e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"; older hashes are upgraded on login
+    app.config["PASSWORD_HASH_METHOD"] = os.getenv("PASSWORD_HASH_METHOD", passwords.DEFAULT_METHOD)
+    app.config["PASSWORD_HASH_WORKERS"] = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+    # seconds a login waits for a place in a full hashing queue before answering 503
+    app.config["PASSWORD_HASH_WAIT"] = float(os.getenv("PASSWORD_HASH_WAIT", passwords.WAIT_SECONDS))
+    # Admin bulk endpoints (services/bulk.py): items per transaction and per request
+    app.config["BULK_CHUNK_SIZE"] = int(os.getenv("BULK_CHUNK_SIZE", bulk.CHUNK_SIZE))
+    app.config["BULK_MAX_ITEMS"] = int(os.getenv("BULK_MAX_ITEMS", bulk.MAX_ITEMS))
+
+    # Read replicas for read_only() queries (services/replicas.py), comma separated URLs
+    app.config["DB_REPLICA_URLS"] = os.getenv("DB_REPLICA_URLS", "")
+    app.config["DB_REPLICA_STRATEGY"] = os.getenv("DB_REPLICA_STRATEGY", "round_robin")
+    app.config["DB_REPLICA_STICKY_SECONDS"] = float(os.getenv("DB_REPLICA_STICKY_SECONDS", replicas.STICKY_SECONDS))
+
+    # Response cache with ETag/Last-Modified for read endpoints: "memory", "redis" (HTTP_CACHE_URL) or "off"
+    app.config["HTTP_CACHE_BACKEND"] = os.getenv("HTTP_CACHE_BACKEND", "memory")
+    app.config["HTTP_CACHE_URL"] = os.getenv("HTTP_CACHE_URL", "redis://localhost:6379/1")
+    # seconds; unset: http_cache.MEMORY_TTL for "memory" (per worker, so short), http_cache.TTL for "redis"
+    app.config["HTTP_CACHE_TTL"] = float(os.getenv("HTTP_CACHE_TTL")) if os.getenv("HTTP_CACHE_TTL") else None
+    app.config["HTTP_CACHE_SIZE"] = int(os.getenv("HTTP_CACHE_SIZE", http_cache.SIZE))
+
+    # Request metrics at /metrics and the slow-request profiler (services/metrics.py, services/profiler.py)
+    app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN")  # required: /metrics is refused without one
+    app.config["METRICS_DIR"] = os.getenv("METRICS_DIR")  # shared by gunicorn workers
+    app.config["METRICS_FLUSH_SECONDS"] = float(os.getenv("METRICS_FLUSH_SECONDS", metrics.FLUSH_SECONDS))
+    app.config["METRICS_N_PLUS_ONE"] = int(os.getenv("METRICS_N_PLUS_ONE", metrics.N_PLUS_ONE))
+    app.config["PROFILE_SLOW_MS"] = float(os.getenv("PROFILE_SLOW_MS", 0))  # 0 disables
+    app.config["PROFILE_INTERVAL_MS"] = float(os.getenv("PROFILE_INTERVAL_MS", profiler.INTERVAL_MS))
+    app.config["PROFILE_SAMPLE_RATE"] = float(os.getenv("PROFILE_SAMPLE_RATE", 1.0))
+    app.config["PROFILE_DIR"] = os.getenv("PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+
+    # Retention (services/retention.py, `python app.py retention`); 0 disables a policy
+    app.config["RETENTION_APPOINTMENT_MONTHS"] = int(
+        os.getenv("RETENTION_APPOINTMENT_MONTHS", retention.APPOINTMENT_MONTHS)
+    )
+    app.config["RETENTION_READ_NOTIFICATION_DAYS"] = int(
+        os.getenv("RETENTION_READ_NOTIFICATION_DAYS", retention.READ_NOTIFICATION_DAYS)
+    )
+    app.config["RETENTION_UNREAD_NOTIFICATION_DAYS"] = int(
+        os.getenv("RETENTION_UNREAD_NOTIFICATION_DAYS", retention.UNREAD_NOTIFICATION_DAYS)
+    )
+    app.config["RETENTION_EXPORT_DAYS"] = int(os.getenv("RETENTION_EXPORT_DAYS", retention.EXPORT_DAYS))
+    app.config["RETENTION_CHUNK_SIZE"] = int(os.getenv("RETENTION_CHUNK_SIZE", retention.CHUNK_SIZE))
+    app.config["ARCHIVE_DIR"] = os.getenv("ARCHIVE_DIR", os.path.join(app.instance_path, "archive"))
 
     # --- Init extensions ---
+    database.configure(app)  # pool sizing and SQLite pragmas; see services/database.py
     db.init_app(app)
+    database.init_app(app)
     Migrate(app, db)
-    JWTManager(app)
+    jwt = JWTManager(app)
+    revocation.init_app(app, jwt)
 
     # --- Register blueprints ---
     app.register_blueprint(main_routes)
@@ -50,10 +117,10 @@ def seed_database(app, force_recreate: bool = False):
     with app.app_context():
         if force_recreate:
             print("⚠️  Dropping all tables...")
-            db.drop_all()
+            db.drop_all(bind_key=None)
 
         print("Creating database tables (if missing)...")
-        db.create_all()
+        db.create_all(bind_key=None)  # primary only; replicas get the schema by replication
 
         # --- Seed admin ---
         admin_username = os.getenv("HMS_ADMIN_USERNAME", "admin")
@@ -85,8 +152,9 @@ def seed_database(app, force_recreate: bool = False):
             ("Dermatology", "Skin specialist"),
         ]
         created = 0
+        existing = {name for (name,) in db.session.query(Specialization.name)}
         for name, desc in specs:
-            if not Specialization.query.filter_by(name=name).first():
+            if name not in existing:
                 db.session.add(Specialization(name=name, description=desc))
                 created += 1
         if created:
@@ -116,16 +184,13 @@ def seed_database(app, force_recreate: bool = False):
             db.session.commit()
             print("✅ Created sample doctor: drsmith")
 
-            today = date.today()
-            for i in range(3):
-                slot = DoctorAvailability(
-                    doctor=doc_profile,
-                    date=today + timedelta(days=i),
-                    time_slot="09:00-10:00",
-                )
-                db.session.add(slot)
-            db.session.commit()
-            print("✅ Added 3 availability slots for drsmith")
+            # Mon-Sat mornings in 30 minute slots, published for the next 7 days
+            schedules.set_weekly_template(
+                doc_profile.id,
+                [{"weekday": d, "time_range": "09:00-12:00", "slot_minutes": 30} for d in range(6)],
+            )
+            result = schedules.generate_availability(doctor_ids=[doc_profile.id])
+            print(f"✅ Added {result['inserted']} availability slots for drsmith")
         else:
             print("Doctor drsmith already exists")
 
@@ -154,31 +219,165 @@ def seed_database(app, force_recreate: bool = False):
         else:
             print("Patient johndoe already exists")
 
+        # --- Slot bitmaps ---
+        slots.rebuild_all()
+
+        # --- Dashboard counters ---
+        dashboard_stats.rebuild_counters()
+        print("✅ Rebuilt dashboard counters")
+
+        # --- Daily rollups ---
+        print(f"✅ Rebuilt {reports.rebuild_rollups()} daily rollup rows")
+
+        # --- Search index ---
+        print(f"✅ Indexed {search.rebuild_index()} users for search")
+
         print("🎉 Database seeding complete.")
 
 
+def _cli_option(args, name, default=None):
+    """Value following `name` in args (e.g. --days 7), or default."""
+    if name in args:
+        idx = args.index(name)
+        if idx + 1 < len(args):
+            return args[idx + 1]
+    return default
+
+
+USAGE = (
+    "Usage: python app.py [init-db [--force] [--synthetic N [--seed S] [--appointments M]]|"
+    "generate-availability [--days N] [--start YYYY-MM-DD]|rebuild-search-index|worker [--concurrency N]|"
+    "monthly-reports [--month YYYY-MM] [--workers N]|send-reminders [--date YYYY-MM-DD]|"
+    "retention [--dry-run] [--policy NAME]|"
+    "serve [--profile gthread|gevent] [--workers N] [--threads N] [--bind HOST:PORT]]"
+)
+
+
 if __name__ == "__main__":
-    # CLI interface: init-db, init-db --force
+    # CLI interface: init-db, init-db --force, init-db --synthetic N, generate-availability, rebuild-search-index, worker,
+    # monthly-reports, send-reminders, retention, serve (gunicorn; no arguments runs the debug server)
     force = False
     do_init = False
+    do_generate = False
+    do_reindex = False
+    do_worker = False
+    do_reports = False
+    do_reminders = False
+    do_retention = False
+    do_serve = False
 
     if len(sys.argv) > 1:
         if sys.argv[1] in ("init-db", "init_db", "init"):
             do_init = True
-            if len(sys.argv) > 2 and sys.argv[2] in ("--force", "-f"):
+            if "--force" in sys.argv[2:] or "-f" in sys.argv[2:]:
                 force = True
+        elif sys.argv[1] in ("generate-availability", "generate_availability"):
+            do_generate = True
+        elif sys.argv[1] in ("rebuild-search-index", "rebuild_search_index"):
+            do_reindex = True
+        elif sys.argv[1] == "worker":
+            do_worker = True
+        elif sys.argv[1] in ("monthly-reports", "monthly_reports"):
+            do_reports = True
+        elif sys.argv[1] in ("send-reminders", "send_reminders"):
+            do_reminders = True
+        elif sys.argv[1] == "retention":
+            do_retention = True
+        elif sys.argv[1] == "serve":
+            do_serve = True
         else:
             print("Unknown command:", sys.argv[1])
-            print("Usage: python app.py [init-db|init-db --force]")
+            print(USAGE)
             sys.exit(1)
 
     app = create_app()
 
     if do_init:
         seed_database(app, force_recreate=force)
+        synthetic_n = _cli_option(sys.argv, "--synthetic")
+        if synthetic_n:
+            appointments = _cli_option(sys.argv, "--appointments")
+            print(f"Generating synthetic data for {synthetic_n} patients...")
+            with app.app_context():
+                counts = synthetic.generate_synthetic(
+                    int(synthetic_n),
+                    seed=int(_cli_option(sys.argv, "--seed", 42)),
+                    appointments=int(appointments) if appointments else None,
+                )
+            print("✅ Synthetic rows:", ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+        sys.exit(0)
+
+    if do_generate:
+        days = int(_cli_option(sys.argv, "--days", schedules.DEFAULT_DAYS))
+        start = _cli_option(sys.argv, "--start")
+        with app.app_context():
+            result = schedules.generate_availability(
+                start=date.fromisoformat(start) if start else None, days=days
+            )
+        print(f"✅ Generated {result['generated']} slots, {result['inserted']} new")
         sys.exit(0)
 
-    # Run server
+    if do_reindex:
+        with app.app_context():
+            db.create_all(bind_key=None)  # creates the index table if it is missing
+            count = search.rebuild_index()
+        print(f"✅ Indexed {count} users for search")
+        sys.exit(0)
+
+    if do_worker:
+        concurrency = _cli_option(sys.argv, "--concurrency")
+        worker = jobs.Worker(app, concurrency=int(concurrency) if concurrency else None)
+        print(f"Worker started with {worker.concurrency} threads (Ctrl+C to stop)")
+        worker.run_forever()
+        print(f"Worker stopped after {worker.processed} jobs")
+        sys.exit(0)
+
+    if do_reports:
+        month = _cli_option(sys.argv, "--month")
+        year, month = (int(p) for p in month.split("-")) if month else reports.previous_month()
+        workers = _cli_option(sys.argv, "--workers")
+        with app.app_context():
+            summary = reports.build_month(year, month, workers=int(workers) if workers else None)
+        print(f"✅ Built {summary['doctors']} reports for {year:04d}-{month:02d}: "
+              f"{summary['bookings']} bookings, {summary['completions']} completed, revenue {summary['revenue']}")
+        sys.exit(0)
+
+    if do_reminders:
+        day = _cli_option(sys.argv, "--date")
+        with app.app_context():
+            scheduled = notifications.schedule_reminders(date.fromisoformat(day) if day else None)
+            delivered = notifications.deliver_pending()
+        print(f"✅ {scheduled['created']} new reminders for {scheduled['appointments']} appointments; "
+              f"sent {delivered['sent']}, failed {delivered['failed']}")
+        sys.exit(0)
+
+    if do_retention:
+        policy = _cli_option(sys.argv, "--policy")
+        with app.app_context():
+            if "--dry-run" in sys.argv[2:]:
+                result = retention.report([policy] if policy else None)
+            else:
+                result = retention.run([policy] if policy else None)
+        for name, outcome in result.items():
+            print(f"{name}: " + ", ".join(f"{k}={v}" for k, v in outcome.items()))
+        sys.exit(0)
+
+    if do_serve:
+        import server
+
+        workers, threads = _cli_option(sys.argv, "--workers"), _cli_option(sys.argv, "--threads")
+        server.serve(
+            app,
+            profile=_cli_option(sys.argv, "--profile"),
+            bind=_cli_option(sys.argv, "--bind"),
+            workers=int(workers) if workers else None,
+            threads=int(threads) if threads else None,
+        )
+        sys.exit(0)
+
+    # Run the development server
+    with app.app_context():
+        dashboard_stats.ensure_counters()  # what server.py's when_ready does under gunicorn
     port = int(os.environ.get("PORT", 5000))
     debug = True
     app.run(host="0.0.0.0", port=port, debug=debug)
@@ -0,0 +1,61 @@
+# backend/benchmarks/_common.py
+"""Shared helpers for the benchmark scripts (run them from backend/: python -m benchmarks.<name>)."""
+import os
+import statistics
+import tempfile
+import time
+
+
+# files the app writes under instance/ by default
+OUTPUT_DIRS = ("EXPORT_DIR", "REPORT_DIR", "PROFILE_DIR", "ARCHIVE_DIR")
+
+
+def make_app(db_path=None):
+    """
+    Create the Flask app against a throwaway SQLite file (or DATABASE_URL if
+    set), writing exports, reports, profiles and archives to a temporary
+    directory too (unless set), so runs leave nothing in the source tree.
+    """
+    scratch = tempfile.mkdtemp(prefix="hms-bench-")
+    if "DATABASE_URL" not in os.environ:
+        if db_path is None:
+            db_path = os.path.join(scratch, "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    for name in OUTPUT_DIRS:
+        os.environ.setdefault(name, os.path.join(scratch, name.lower()[:-len("_dir")]))
+    from app import create_app
+
+    return create_app()
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+def timeit(fn, repeat=50, warmup=3):
+    """Run `fn` repeatedly and return latency stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+    }
+
+
+def report(title, rows):
+    """Print `rows` ({label: stats-dict}) as a fixed-width table."""
+    print(f"\n== {title} ==")
+    for label, stats in rows.items():
+        parts = "  ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in stats.items())
+        print(f"{label:<32} {parts}")
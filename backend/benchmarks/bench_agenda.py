@@ -0,0 +1,153 @@
+# backend/benchmarks/bench_agenda.py
+"""
+Morning thundering herd on doctor agendas.
+
+    python -m benchmarks.bench_agenda --patients 20000 --threads 16 --requests 3
+
+Generates a synthetic hospital (one doctor per 100 patients) and then has
+every doctor ask for today's agenda --requests times at once, from
+--threads threads released together. Compares building each agenda from
+the base tables on every request, `agenda.get_days()` with an empty memory
+(served from `doctor_agendas`), the same with warm memory, and the HTTP
+endpoint with an empty memory. Reports wall time, per-request latency and
+SQL statements, and checks that a booking shows up in the next read.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, select
+
+from benchmarks._common import make_app, percentile, report
+from models.models import db, DoctorAvailability, DoctorProfile, PatientProfile, User
+from services import agenda, booking, synthetic
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine, self.count = engine, 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        with self._lock:
+            self.count += 1
+
+
+def herd(app, calls, threads):
+    """Run every call of `calls` at once from `threads` threads; returns (wall ms, per-call ms)."""
+    barrier = threading.Barrier(threads)
+    chunks = [calls[i::threads] for i in range(threads)]
+
+    def worker(chunk):
+        samples = []
+        with app.app_context():
+            barrier.wait()
+            for call in chunk:
+                start = time.perf_counter()
+                call()
+                samples.append((time.perf_counter() - start) * 1000.0)
+            db.session.remove()
+        return samples
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        samples = [s for chunk in pool.map(worker, chunks) for s in chunk]
+    return (time.perf_counter() - start) * 1000.0, samples
+
+
+def stats(wall, samples, queries):
+    return {
+        "wall_ms": wall,
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+        "queries": queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=20000)
+    parser.add_argument("--appointments", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=3, help="agenda requests per doctor")
+    args = parser.parse_args()
+
+    from app import seed_database
+
+    app = make_app()
+    seed_database(app)
+    today = date.today()
+    with app.app_context():
+        synthetic.generate_synthetic(args.patients, appointments=args.appointments, log=lambda *a: None)
+        doctors = db.session.execute(
+            select(DoctorProfile.id, User.id, User.username, User.full_name).join(User, User.id == DoctorProfile.user_id)
+        ).all()
+        tokens = {
+            doctor_id: create_access_token(identity=str(user_id), additional_claims={
+                "username": username, "role": "doctor", "full_name": full_name, "is_active": True,
+            })
+            for doctor_id, user_id, username, full_name in doctors
+        }
+        engine = db.engine
+        db.session.remove()
+    doctor_ids = [d[0] for d in doctors] * args.requests
+
+    rows = {}
+    phases = (
+        ("base tables every request", lambda d: agenda.load_day(d, today), True),
+        ("get_days: cold memory", lambda d: agenda.get_days(d, today), True),
+        ("get_days: warm memory", lambda d: agenda.get_days(d, today), False),
+    )
+    for label, fn, clear in phases:
+        if clear:
+            agenda.invalidate()
+        with QueryCounter(engine) as counter:
+            wall, samples = herd(app, [lambda d=d: fn(d) for d in doctor_ids], args.threads)
+        rows[label] = stats(wall, samples, counter.count)
+
+    client = app.test_client()
+
+    def get(doctor_id):
+        response = client.get("/api/doctor/agenda", headers={"Authorization": f"Bearer {tokens[doctor_id]}"})
+        assert response.status_code == 200, response.status_code
+
+    agenda.invalidate()
+    with QueryCounter(engine) as counter:
+        wall, samples = herd(app, [lambda d=d: get(d) for d in doctor_ids], args.threads)
+    rows["http: cold memory"] = stats(wall, samples, counter.count)
+    with QueryCounter(engine) as counter:
+        wall, samples = herd(app, [lambda d=d: get(d) for d in doctor_ids], args.threads)
+    rows["http: warm memory"] = stats(wall, samples, counter.count)
+
+    with app.app_context():
+        slot = db.session.execute(
+            select(DoctorAvailability.id, DoctorAvailability.doctor_id).where(
+                DoctorAvailability.date == today, DoctorAvailability.is_booked.is_(False)
+            ).limit(1)
+        ).first()
+        if slot is not None:
+            patient_id = db.session.scalar(select(PatientProfile.id).limit(1))
+            appointment = booking.book_slot(patient_id, slot.id, reason="bench")
+            day = agenda.serializers.loads(agenda.get_days(slot.doctor_id, today)[0])
+            rows["after a booking"] = {
+                "visible": any(s["appointment"] and s["appointment"]["id"] == appointment.id for s in day["slots"]),
+                "matches_base_tables": day == agenda.load_day(slot.doctor_id, today),
+            }
+
+    report(f"agenda herd: {len(doctors)} doctors x {args.requests} requests, {args.threads} threads", rows)
+    print(f"memory: {agenda.cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
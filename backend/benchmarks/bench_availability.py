@@ -0,0 +1,77 @@
+# backend/benchmarks/bench_availability.py
+"""
+"Next 7 days" availability: per-object session adds vs. the template generator.
+
+    python -m benchmarks.bench_availability --doctors 300 --days 7
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import delete, insert
+
+from benchmarks._common import make_app, report
+from models.models import db, User, DoctorProfile, DoctorAvailability, DoctorScheduleTemplate
+from services import schedules
+
+
+def populate(doctors):
+    db.session.execute(insert(User), [
+        {"id": i + 1, "username": f"d{i}", "email": f"d{i}@x", "password_hash": "x",
+         "role": "doctor", "is_active": True, "blacklisted": False}
+        for i in range(doctors)
+    ])
+    db.session.execute(insert(DoctorProfile), [{"id": i + 1, "user_id": i + 1} for i in range(doctors)])
+    db.session.commit()
+    for d in range(1, doctors + 1):
+        db.session.add_all(
+            DoctorScheduleTemplate(doctor_id=d, weekday=w, time_range="08:00-20:00", slot_minutes=30)
+            for w in range(7)
+        )
+    db.session.commit()
+
+
+def per_object(templates, start, days):
+    """The seed_database approach: one ORM object per slot, one flush for all."""
+    for row in schedules.expand(templates, start, days):
+        db.session.add(DoctorAvailability(doctor_id=row["doctor_id"], date=row["date"], time_slot=row["time_slot"]))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--doctors", type=int, default=300)
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        populate(args.doctors)
+        templates = DoctorScheduleTemplate.query.all()
+        start = date.today() + timedelta(days=1)
+
+        t0 = time.perf_counter()
+        per_object(templates, start, args.days)
+        orm_s = time.perf_counter() - t0
+        rows = DoctorAvailability.query.count()
+        db.session.execute(delete(DoctorAvailability))
+        db.session.commit()
+
+        t0 = time.perf_counter()
+        result = schedules.generate_availability(start=start, days=args.days)
+        bulk_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        rerun = schedules.generate_availability(start=start, days=args.days)
+        rerun_s = time.perf_counter() - t0
+
+        report(f"{rows:,} slots for {args.doctors} doctors x {args.days} days", {
+            "per-object session.add": {"seconds": orm_s, "rows_per_s": rows / orm_s},
+            "bulk ON CONFLICT DO NOTHING": {"seconds": bulk_s, "rows_per_s": result["inserted"] / bulk_s},
+            "re-run (all conflicts)": {"seconds": rerun_s, "inserted": rerun["inserted"]},
+        })
+
+
+if __name__ == "__main__":
+    main()
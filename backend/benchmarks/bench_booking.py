@@ -0,0 +1,104 @@
+# backend/benchmarks/bench_booking.py
+"""
+Booking rush: many threads racing for a small pool of slots.
+
+    python -m benchmarks.bench_booking --threads 16 --slots 200 --attempts 2000
+
+Reports bookings/second and the conflict rate (requests answered with
+"slot no longer available"). Every slot must end up booked exactly once.
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import func, insert, select
+
+from benchmarks._common import make_app, report
+from models.models import db, User, DoctorProfile, PatientProfile, DoctorAvailability, Appointment
+from services import booking
+
+
+def populate(slots, patients):
+    db.session.execute(insert(User), [
+        {"id": i + 1, "username": f"u{i}", "email": f"u{i}@x", "password_hash": "x",
+         "role": "doctor" if i == 0 else "patient", "is_active": True, "blacklisted": False}
+        for i in range(patients + 1)
+    ])
+    db.session.execute(insert(DoctorProfile), [{"id": 1, "user_id": 1}])
+    db.session.execute(insert(PatientProfile), [{"id": i + 1, "user_id": i + 2} for i in range(patients)])
+    day = date.today() + timedelta(days=1)
+    rows = []
+    for i in range(slots):
+        start = (i % 48) * 30
+        rows.append({
+            "id": i + 1, "doctor_id": 1, "date": day + timedelta(days=i // 48),
+            "time_slot": f"{start // 60:02d}:{start % 60:02d}-{(start + 30) // 60:02d}:{(start + 30) % 60:02d}",
+            "start_minute": start, "end_minute": start + 30, "is_active": True,
+        })
+    db.session.execute(insert(DoctorAvailability), rows)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--slots", type=int, default=200)
+    parser.add_argument("--attempts", type=int, default=2000, help="total booking requests")
+    parser.add_argument("--patients", type=int, default=500)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        populate(args.slots, args.patients)
+
+    outcomes = {"booked": 0, "conflict": 0, "contention": 0}
+    lock = threading.Lock()
+    per_thread = args.attempts // args.threads
+
+    def worker(seed):
+        rng = random.Random(seed)
+        with app.app_context():
+            for _ in range(per_thread):
+                try:
+                    booking.book_slot(rng.randint(1, args.patients), rng.randint(1, args.slots))
+                    key = "booked"
+                except booking.BookingContention:
+                    key = "contention"
+                except booking.SlotUnavailable:
+                    key = "conflict"
+                finally:
+                    db.session.remove()
+                with lock:
+                    outcomes[key] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        live = db.session.execute(select(func.count()).select_from(Appointment)).scalar()
+        dupes = db.session.execute(
+            select(func.count()).select_from(
+                select(Appointment.availability_id).group_by(Appointment.availability_id)
+                .having(func.count() > 1).subquery()
+            )
+        ).scalar()
+
+    total = sum(outcomes.values())
+    report(f"booking rush: {args.threads} threads, {args.slots} slots, {total} requests", {
+        "throughput": {"requests_per_s": total / elapsed, "bookings_per_s": outcomes["booked"] / elapsed},
+        "outcomes": {**outcomes, "conflict_rate": outcomes["conflict"] / total},
+        "service counters": booking.stats(),
+        "integrity": {"appointments": live, "double_booked_slots": dupes},
+    })
+
+
+if __name__ == "__main__":
+    main()
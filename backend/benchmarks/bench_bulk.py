@@ -0,0 +1,106 @@
+# backend/benchmarks/bench_bulk.py
+"""
+Admin bulk endpoints vs one request per entity.
+
+    python -m benchmarks.bench_bulk --items 2000 --doctors 200
+
+Generates a synthetic hospital, then cancels --items booked appointments
+one POST /api/appointments/<id>/cancel at a time and another --items with
+a single POST /api/admin/appointments/status, blacklists --items patients
+in one call, and onboards --doctors doctors in one call (mostly password
+hashing). Reports wall time, SQL statements and items per second, and
+checks that the slot bitmaps and dashboard counters (maintained by flush
+hooks) still match a rebuild.
+"""
+import argparse
+import time
+
+from sqlalchemy import func, select
+
+from benchmarks._common import make_app, report
+from models.models import db, Appointment, DoctorDaySlots, PatientProfile
+from services import dashboard_stats, slots, synthetic
+
+
+def queries(response):
+    return int(response.headers["Server-Timing"].split('"')[1].split()[0])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--doctors", type=int, default=200)
+    args = parser.parse_args()
+
+    from app import seed_database
+
+    app = make_app()
+    seed_database(app)
+    with app.app_context():
+        synthetic.generate_synthetic(args.patients, log=lambda *a: None)
+        booked = list(db.session.scalars(
+            select(Appointment.id).where(Appointment.status == "booked").order_by(Appointment.id).limit(args.items * 2)
+        ))
+        patients = list(db.session.scalars(select(PatientProfile.user_id).limit(args.items)))
+        db.session.remove()
+    one_by_one, batch = booked[:len(booked) // 2], booked[len(booked) // 2:]
+
+    client = app.test_client()
+    token = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"}).json["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    rows = {}
+
+    start, count = time.perf_counter(), 0
+    for appointment_id in one_by_one:
+        response = client.post(f"/api/appointments/{appointment_id}/cancel", json={"note": "bench"}, headers=headers)
+        assert response.status_code == 200, response.json
+        count += queries(response)
+    wall = time.perf_counter() - start
+    rows[f"cancel x{len(one_by_one)}: per request"] = {
+        "wall_ms": wall * 1000.0, "queries": count, "items_per_s": len(one_by_one) / wall,
+    }
+
+    def bulk(label, path, body, n):
+        start = time.perf_counter()
+        response = client.post(path, json=body, headers=headers)
+        wall = time.perf_counter() - start
+        assert response.status_code == 200 and response.json["succeeded"] == n, response.json
+        rows[label] = {"wall_ms": wall * 1000.0, "queries": queries(response), "items_per_s": n / wall}
+
+    bulk(f"cancel x{len(batch)}: bulk", "/api/admin/appointments/status",
+         {"status": "cancelled", "note": "bench", "appointment_ids": batch}, len(batch))
+    bulk(f"blacklist x{len(patients)}: bulk", "/api/admin/users/blacklist", {"user_ids": patients}, len(patients))
+    doctors = [
+        {"username": f"bulkdoc{i}", "email": f"bulkdoc{i}@bench.example", "password": "doctor123",
+         "full_name": f"Bulk Doctor {i}", "specializations": ["Cardiology"]}
+        for i in range(args.doctors)
+    ]
+    bulk(f"onboard x{args.doctors}: bulk", "/api/admin/doctors/bulk", {"doctors": doctors}, args.doctors)
+
+    with app.app_context():
+        masks = dict(((d, day), (a, b)) for d, day, a, b in db.session.execute(select(
+            DoctorDaySlots.doctor_id, DoctorDaySlots.date, DoctorDaySlots.available_mask, DoctorDaySlots.booked_mask
+        )))
+        dashboard_stats.invalidate()
+        counters = dashboard_stats.get_stats()
+        slots.rebuild_all()
+        dashboard_stats.rebuild_counters()
+        dashboard_stats.invalidate()
+        rebuilt = dict(((d, day), (a, b)) for d, day, a, b in db.session.execute(select(
+            DoctorDaySlots.doctor_id, DoctorDaySlots.date, DoctorDaySlots.available_mask, DoctorDaySlots.booked_mask
+        )))
+        cancelled = db.session.scalar(
+            select(func.count()).select_from(Appointment).where(Appointment.id.in_(booked), Appointment.status == "cancelled")
+        )
+        rows["consistency"] = {
+            "cancelled": cancelled,
+            "bitmaps_match_rebuild": masks == rebuilt,
+            "counters_match_rebuild": counters == dashboard_stats.get_stats(),
+        }
+
+    report("admin bulk operations", rows)
+
+
+if __name__ == "__main__":
+    main()
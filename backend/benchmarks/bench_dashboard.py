@@ -0,0 +1,102 @@
+# backend/benchmarks/bench_dashboard.py
+"""
+Admin dashboard: per-request COUNT(*) scans vs. the counters table.
+
+    python -m benchmarks.bench_dashboard --rows 1000000
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from benchmarks._common import make_app, report, timeit
+from models.models import db, User, Appointment, DoctorProfile, PatientProfile
+from services import dashboard_stats
+
+
+def populate(rows, seed=7):
+    rng = random.Random(seed)
+    roles = ["patient"] * 18 + ["doctor"] + ["admin"]
+    batch = []
+    for i in range(rows):
+        batch.append({
+            "username": f"bench{i}",
+            "email": f"bench{i}@example.com",
+            "password_hash": "x",
+            "role": rng.choice(roles),
+            "is_active": rng.random() > 0.1,
+            "blacklisted": False,
+        })
+        if len(batch) == 50_000:
+            db.session.execute(insert(User), batch)
+            batch.clear()
+    if batch:
+        db.session.execute(insert(User), batch)
+    db.session.execute(insert(DoctorProfile), [{"user_id": 1}])
+    db.session.execute(insert(PatientProfile), [{"user_id": 2}])
+
+    statuses = ["booked"] * 6 + ["completed"] * 3 + ["cancelled"]
+    start = date.today() - timedelta(days=365)
+    batch = []
+    for i in range(rows):
+        batch.append({
+            "patient_id": 1,
+            "doctor_id": 1,
+            "date": start + timedelta(days=i % 730),
+            "time_slot": f"slot-{i}",
+            "status": rng.choice(statuses),
+        })
+        if len(batch) == 50_000:
+            db.session.execute(insert(Appointment), batch)
+            batch.clear()
+    if batch:
+        db.session.execute(insert(Appointment), batch)
+    db.session.commit()
+
+
+def naive_counts():
+    today = date.today()
+    return {
+        "total_users": User.query.count(),
+        "active_users": User.query.filter_by(is_active=True).count(),
+        "inactive_users": User.query.filter_by(is_active=False).count(),
+        "total_doctors": User.query.filter_by(role="doctor").count(),
+        "total_patients": User.query.filter_by(role="patient").count(),
+        "total_appointments": Appointment.query.count(),
+        "todays_appointments": Appointment.query.filter_by(date=today).count(),
+    }
+
+
+def grouped_query():
+    return db.session.execute(dashboard_stats._grouped_counts_query()).all()
+
+
+def counters_uncached():
+    dashboard_stats.invalidate()
+    return dashboard_stats.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000, help="users and appointments to generate")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        populate(args.rows)
+        dashboard_stats.rebuild_counters()
+        assert naive_counts()["total_users"] == dashboard_stats.get_stats()["total_users"]
+
+        report(f"dashboard reads @ {args.rows:,} users / appointments", {
+            "7x COUNT(*) per request": timeit(naive_counts, repeat=args.repeat),
+            "single grouped query": timeit(grouped_query, repeat=args.repeat),
+            "counters table (uncached)": timeit(counters_uncached, repeat=args.repeat * 10),
+            "counters table (TTL cache)": timeit(dashboard_stats.get_stats, repeat=args.repeat * 100),
+        })
+
+
+if __name__ == "__main__":
+    main()
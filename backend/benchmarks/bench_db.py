@@ -0,0 +1,133 @@
+# backend/benchmarks/bench_db.py
+"""
+Concurrent database access: default engine vs services/database.py tuning.
+
+    python -m benchmarks.bench_db --writers 8 --readers 16 --duration 10
+
+Runs the same mixed workload twice against a fresh SQLite file (or
+DATABASE_URL): --writers threads each committing small transactions (an
+appointment-sized insert plus a counter upsert) while --readers threads
+run dashboard-style aggregate reads. "default" is a plain create_engine()
+(rollback journal, full fsync, pool of 5 + 10); "tuned" uses
+`database.engine_options()` plus the SQLite pragmas. Reports commits and
+reads per second, "database is locked" / pool timeout errors, write
+latency percentiles and the pool's checkout wait metrics.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from benchmarks._common import percentile, report
+from models.models import db, DashboardCounter, Notification
+from services import database
+from services.db_utils import apply_increments
+
+
+def make_engine(url, tuned, config):
+    if not tuned:
+        return create_engine(url)
+    engine = create_engine(url, **database.engine_options(url, config))
+    if url.startswith("sqlite"):
+        database.install_pragmas(engine, config)
+    return engine
+
+
+def run(engine, writers, readers, duration):
+    db.metadata.create_all(engine, tables=[Notification.__table__, DashboardCounter.__table__])
+    counters = DashboardCounter.__table__
+    notifications = Notification.__table__
+    stop_at = time.perf_counter() + duration
+    lock = threading.Lock()
+    totals = {"commits": 0, "reads": 0, "locked": 0, "pool_timeouts": 0}
+    write_ms = []
+
+    def count(key, n=1):
+        with lock:
+            totals[key] += n
+
+    def writer(n):
+        mine = []
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    conn.execute(notifications.insert(), {
+                        "user_id": None, "type": "reminder", "payload": f'{{"writer": {n}}}', "is_read": False,
+                        "delivery_attempts": 0, "created_at": datetime.utcnow(),
+                    })
+                    apply_increments(conn, counters, ["scope", "key"],
+                                     [{"scope": "bench", "key": f"w{n % 4}", "value": 1}])
+            except OperationalError as e:
+                count("locked" if "locked" in str(e) else "errors_other")
+                continue
+            except PoolTimeout:
+                count("pool_timeouts")
+                continue
+            mine.append((time.perf_counter() - start) * 1000.0)
+        count("commits", len(mine))
+        with lock:
+            write_ms.extend(mine)
+
+    def reader():
+        done = 0
+        while time.perf_counter() < stop_at:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(select(notifications.c.type, func.count()).group_by(notifications.c.type)).all()
+                    conn.execute(select(counters)).all()
+                done += 1
+            except OperationalError as e:
+                count("locked" if "locked" in str(e) else "errors_other")
+            except PoolTimeout:
+                count("pool_timeouts")
+        count("reads", done)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    result = {
+        "commits_per_s": totals["commits"] / elapsed,
+        "reads_per_s": totals["reads"] / elapsed,
+        "locked": totals["locked"],
+        "pool_timeouts": totals["pool_timeouts"],
+        "write_p50_ms": percentile(write_ms, 50),
+        "write_p99_ms": percentile(write_ms, 99),
+    }
+    if isinstance(engine.pool, database.MeteredQueuePool):
+        metrics = engine.pool.metrics.snapshot()
+        result.update(pool_waits=metrics["waits"], pool_wait_ms_max=metrics["wait_ms_max"])
+    engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--pool-size", type=int, default=database.DEFAULTS["DB_POOL_SIZE"])
+    args = parser.parse_args()
+
+    config = {"DB_POOL_SIZE": args.pool_size}
+    rows = {}
+    for label, tuned in (("default", False), ("tuned", True)):
+        url = os.getenv("DATABASE_URL") or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='hms-bench-'), 'db.db')}"
+        rows[label] = run(make_engine(url, tuned, config), args.writers, args.readers, args.duration)
+
+    report(f"db: {args.writers} writers + {args.readers} readers x {args.duration:.0f}s", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# backend/benchmarks/bench_export.py
+"""
+Export throughput and memory.
+
+    python -m benchmarks.bench_export --patients 25000
+
+Loads a synthetic hospital, then runs each export type in both formats and
+reports rows/s and the process RSS growth while exporting (sampled every
+10 ms). A "load everything" baseline (`.all()` then write) shows what the
+streaming path avoids.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks._common import make_app, report
+from models.models import db
+from services import exports, synthetic
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class PeakRSS:
+    def __enter__(self):
+        self.base = self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, rss_mb())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=25_000)
+    args = parser.parse_args()
+
+    app = make_app()
+    app.config["EXPORT_DIR"] = tempfile.mkdtemp(prefix="hms-exports-")
+    rows = {}
+    with app.app_context():
+        db.create_all()
+        synthetic.generate_synthetic(args.patients, log=lambda *a: None)
+
+        for job_type in exports.EXPORTS:
+            for fmt in exports.FORMATS:
+                job = exports.create_export(1, job_type, fmt)
+                with PeakRSS() as mem:
+                    start = time.perf_counter()
+                    job = exports.run_export(job.id)
+                    elapsed = time.perf_counter() - start
+                rows[f"{job_type} {fmt}"] = {
+                    "rows": job.row_count, "rows_per_s": job.row_count / elapsed,
+                    "rss_growth_mb": mem.peak - mem.base, "file_mb": os.path.getsize(job.file_path) / 2**20,
+                }
+
+        # Baseline: materialize the whole result first
+        stmt = exports.EXPORTS["appointments_export"]({})
+        columns = [c.name for c in stmt.selected_columns]
+        with PeakRSS() as mem:
+            start = time.perf_counter()
+            everything = db.session.execute(stmt).all()
+            count = exports.write_rows(os.path.join(app.config["EXPORT_DIR"], "baseline.csv.gz"), "csv",
+                                       columns, everything)
+            elapsed = time.perf_counter() - start
+        rows["baseline .all() appointments csv"] = {
+            "rows": count, "rows_per_s": count / elapsed, "rss_growth_mb": mem.peak - mem.base,
+        }
+
+    report(f"exports: {args.patients} synthetic patients", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# backend/benchmarks/bench_http.py
+"""
+HTTP load test: the debug server vs `python app.py serve` (gunicorn).
+
+    python -m benchmarks.bench_http --clients 16 --duration 10
+    python -m benchmarks.bench_http --servers serve --profile gevent
+
+Seeds a throwaway database, starts each server as a subprocess on a free
+port and drives the login and admin dashboard endpoints from --clients
+threads with keep-alive connections for --duration seconds each. Reports
+requests per second, error count and latency percentiles.
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks._common import make_app, percentile, report
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, port, args):
+    env = dict(os.environ, PORT=str(port))
+    cmd = [sys.executable, "app.py"]
+    if kind == "serve":
+        cmd += ["serve", "--bind", f"127.0.0.1:{port}", "--profile", args.profile]
+        if args.workers:
+            cmd += ["--workers", str(args.workers)]
+    proc = subprocess.Popen(cmd, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)  # own process group: the debug reloader forks a child
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    stop_server(proc)
+    raise RuntimeError(f"{kind} server did not start on port {port}")
+
+
+def stop_server(proc):
+    os.killpg(proc.pid, signal.SIGTERM)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+def request(conn, method, path, body=None, headers=None):
+    conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                 headers={"Content-Type": "application/json", **(headers or {})})
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def load(port, method, path, body, headers, clients, duration):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine, failed = [], 0
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                status, _ = request(conn, method, path, body, headers)
+                if status >= 400:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                continue
+            mine.append((time.perf_counter() - start) * 1000.0)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": len(latencies) / elapsed,
+        "errors": errors[0],
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--servers", default="debug,serve", help="comma separated: debug, serve")
+    parser.add_argument("--profile", default="gthread", choices=("gthread", "gevent"))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    from app import seed_database
+
+    seed_database(make_app())  # also exports DATABASE_URL for the server processes
+    rows = {}
+    for kind in args.servers.split(","):
+        port = free_port()
+        proc = start_server(kind, port, args)
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            _, body = request(conn, "POST", "/api/auth/login", {"username": "admin", "password": "admin123"})
+            token = json.loads(body)["access_token"]
+            conn.close()
+            rows[f"{kind}: login"] = load(
+                port, "POST", "/api/auth/login", {"username": "johndoe", "password": "patient123"}, None,
+                args.clients, args.duration,
+            )
+            rows[f"{kind}: dashboard"] = load(
+                port, "GET", "/api/admin/dashboard", None, {"Authorization": f"Bearer {token}"},
+                args.clients, args.duration,
+            )
+        finally:
+            stop_server(proc)
+
+    report(f"http: {args.clients} clients x {args.duration:.0f}s", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# backend/benchmarks/bench_http_cache.py
+"""
+Response cache: repeat views with the cache off, on, and with revalidation.
+
+    python -m benchmarks.bench_http_cache --patients 2000 --views 300
+
+Simulates the frontend re-fetching the profile, admin dashboard, doctor
+list and specialization list on every navigation. Each endpoint is fetched
+--views times with HTTP_CACHE_BACKEND=off, with the in-process cache, and
+with the cache plus the browser sending back the ETag it got
+(If-None-Match), and reports latency, server CPU per request and response
+bytes per request.
+"""
+import argparse
+import time
+
+from benchmarks._common import make_app, percentile, report
+from services import synthetic
+
+
+def login(client, username, password):
+    token = client.post("/api/auth/login", json={"username": username, "password": password}).json["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def views(client, path, headers, n, revalidate):
+    etag, latencies, sent = None, [], 0
+    cpu = time.process_time()
+    for _ in range(n):
+        extra = {"If-None-Match": etag} if revalidate and etag else {}
+        start = time.perf_counter()
+        response = client.get(path, headers={**headers, **extra})
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        assert response.status_code in (200, 304), (path, response.status_code)
+        etag = response.headers.get("ETag", etag)
+        sent += len(response.data)
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "cpu_ms_per_req": (time.process_time() - cpu) * 1000.0 / n,
+        "bytes_per_req": sent // n,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--views", type=int, default=300)
+    args = parser.parse_args()
+
+    from app import seed_database
+
+    app = make_app()
+    seed_database(app)
+    with app.app_context():
+        synthetic.generate_synthetic(args.patients, log=lambda *a: None)
+    client = app.test_client()
+    admin = login(client, "admin", "admin123")
+    patient = login(client, "johndoe", "patient123")
+    endpoints = [
+        ("profile", "/api/auth/profile", patient),
+        ("dashboard", "/api/admin/dashboard", admin),
+        ("doctors", "/api/doctors?limit=100&fields=id,full_name,qualification,specializations", patient),
+        ("specializations", "/api/specializations", patient),
+    ]
+    rows = {}
+    for mode, backend, revalidate in (("off", "off", False), ("cached", "memory", False),
+                                      ("cached+etag", "memory", True)):
+        app.config["HTTP_CACHE_BACKEND"] = backend
+        for name, path, headers in endpoints:
+            rows[f"{name}: {mode}"] = views(client, path, headers, args.views, revalidate)
+
+    report(f"http cache: {args.views} repeat views per endpoint", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# backend/benchmarks/bench_jobs.py
+"""
+Job queue throughput and its effect on request latency.
+
+    python -m benchmarks.bench_jobs --jobs 2000 --concurrency 4 --work-ms 5
+
+Enqueues --jobs tasks that each hold a worker for --work-ms, drains them
+with a database-backed worker pool and reports enqueue latency and jobs/s.
+Then measures GET /api/admin/dashboard while the pool is busy, compared with
+an idle system and with running the same work inline in the request.
+"""
+import argparse
+import time
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+
+from benchmarks._common import make_app, report, timeit
+from models.models import db, User
+from services import jobs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--work-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    @jobs.task("bench.work")
+    def work(payload):
+        time.sleep(args.work_ms / 1000.0)
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [{"id": 1, "username": "admin", "email": "admin@x", "password_hash": "x",
+                                           "role": "admin", "is_active": True, "blacklisted": False}])
+        db.session.commit()
+        token = create_access_token(identity="1", additional_claims={"role": "admin"})
+        enqueue = timeit(lambda: jobs.enqueue("bench.work", {"n": 1}, priority=1), repeat=args.jobs, warmup=0)
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    dashboard = lambda: client.get("/api/admin/dashboard", headers=headers)
+    idle = timeit(dashboard, repeat=200)
+
+    worker = jobs.Worker(app, concurrency=args.concurrency, poll_interval=0.01).start()
+    start = time.perf_counter()
+    busy = timeit(dashboard, repeat=200)
+    while worker.processed < args.jobs:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    worker.stop()
+
+    def inline_work():
+        time.sleep(args.work_ms / 1000.0)
+        return dashboard()
+    inline = timeit(inline_work, repeat=200)
+
+    report(f"jobs: {args.jobs} x {args.work_ms} ms tasks, {args.concurrency} worker threads", {
+        "enqueue": enqueue,
+        "drain": {"jobs": worker.processed, "jobs_per_s": worker.processed / elapsed,
+                  "ideal_per_s": args.concurrency * 1000.0 / args.work_ms},
+        "dashboard idle": idle,
+        "dashboard while draining": busy,
+        "dashboard with work inline": inline,
+    })
+
+
+if __name__ == "__main__":
+    main()
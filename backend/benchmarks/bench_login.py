@@ -0,0 +1,94 @@
+# backend/benchmarks/bench_login.py
+"""
+Login throughput under concurrent load.
+
+    python -m benchmarks.bench_login --threads 16 --logins 400 --method scrypt --legacy-method pbkdf2:sha256:600000
+
+Users start with hashes made by --legacy-method. The first pass over them
+therefore includes the transparent rehash to --method; the second pass is
+steady state. Reports logins/s and logins/s per core (hashing is bounded to
+PASSWORD_HASH_WORKERS cores, default all of them).
+"""
+import argparse
+import os
+import threading
+import time
+
+from sqlalchemy import insert, select
+
+from benchmarks._common import make_app, percentile, report
+from models.models import db, User
+from services import passwords
+
+PASSWORD = "bench-password"
+
+
+def run_pass(app, users, threads):
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    per_thread = [users[i::threads] for i in range(threads)]
+
+    def worker(names):
+        client = app.test_client()
+        for name in names:
+            start = time.perf_counter()
+            resp = client.post("/api/auth/login", json={"username": name, "password": PASSWORD})
+            elapsed = (time.perf_counter() - start) * 1000.0
+            with lock:
+                latencies.append(elapsed)
+                if resp.status_code != 200:
+                    failures.append(resp.status_code)
+
+    workers = [threading.Thread(target=worker, args=(names,)) for names in per_thread]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    cores = min(app.config["PASSWORD_HASH_WORKERS"], os.cpu_count() or 1)
+    return {
+        "logins_per_s": len(latencies) / elapsed,
+        "per_core": len(latencies) / elapsed / cores,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "failures": len(failures),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=400, help="distinct users, each logs in once per pass")
+    parser.add_argument("--method", default=passwords.DEFAULT_METHOD)
+    parser.add_argument("--legacy-method", default="pbkdf2:sha256:600000")
+    args = parser.parse_args()
+
+    os.environ["PASSWORD_HASH_METHOD"] = args.method
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        legacy = passwords.hash_password(PASSWORD, method=args.legacy_method)
+        db.session.execute(insert(User), [
+            {"username": f"user{i}", "email": f"user{i}@bench.example", "password_hash": legacy,
+             "role": "patient", "is_active": True, "blacklisted": False}
+            for i in range(args.logins)
+        ])
+        db.session.commit()
+    users = [f"user{i}" for i in range(args.logins)]
+
+    first = run_pass(app, users, args.threads)
+    steady = run_pass(app, users, args.threads)
+    with app.app_context():
+        stale = sum(passwords.needs_rehash(h) for h in db.session.execute(select(User.password_hash)).scalars())
+
+    report(f"login: {args.threads} threads, {args.logins} users, {args.legacy_method} -> {args.method}", {
+        "first pass (with rehash)": first,
+        "steady state": steady,
+        "hashing pool": {**passwords.pool_stats(), "cpus": os.cpu_count() or 1, "stale_hashes": stale},
+    })
+
+
+if __name__ == "__main__":
+    main()
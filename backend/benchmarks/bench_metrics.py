@@ -0,0 +1,110 @@
+# backend/benchmarks/bench_metrics.py
+"""
+Request metrics: what /metrics shows, and what instrumentation costs.
+
+    python -m benchmarks.bench_metrics --patients 2000 --requests 200
+
+Seeds synthetic data and drives the main read endpoints through the test
+client, then prints, per endpoint, the p50/p95 latency and the mean SQL
+statements and SQL time per request as read back from the metrics registry
+(i.e. what Prometheus would scrape). It then runs a loop that walks
+`Appointment.doctor.user` lazily, the N+1 pattern the detector flags, and
+the same loop with the relationships eager-loaded; and finally compares
+dashboard latency with the sampling profiler off and on (PROFILE_SLOW_MS
+set high enough that nothing is written, so only sampling is measured).
+"""
+import argparse
+import time
+
+from flask import Response
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from benchmarks._common import make_app, report, timeit
+from models.models import db, Appointment, DoctorProfile
+from services import metrics, synthetic
+
+
+def login(client, username, password):
+    token = client.post("/api/auth/login", json={"username": username, "password": password}).json["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def histogram_quantile(buckets, counts, q):
+    target, seen = q * sum(counts), 0
+    for bound, count in zip(list(buckets) + [float("inf")], counts):
+        seen += count
+        if seen >= target:
+            return bound
+    return float("inf")
+
+
+def walk(app, eager):
+    with app.test_request_context("/api/appointments"):
+        metrics._before_request()
+        query = db.select(Appointment).order_by(func.random()).limit(200)
+        if eager:
+            query = query.options(joinedload(Appointment.doctor).joinedload(DoctorProfile.user))
+        names = {a.doctor.user.full_name for a in db.session.scalars(query).unique()}
+        stats = metrics._current.get()
+        metrics._after_request(Response())
+        db.session.remove()
+        return {"queries": stats.queries, "flagged_statements": len(stats.repeated), "doctors": len(names)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    from app import seed_database
+
+    app = make_app()
+    seed_database(app)
+    with app.app_context():
+        synthetic.generate_synthetic(args.patients, log=lambda *a: None)
+    client = app.test_client()
+    admin = login(client, "admin", "admin123")
+    patient = login(client, "johndoe", "patient123")
+    paths = [
+        ("/api/admin/dashboard", admin), ("/api/admin/patients?limit=50", admin), ("/api/doctors?limit=50", admin),
+        ("/api/search?q=an", admin), ("/api/appointments?limit=100", admin), ("/api/treatments?limit=100", admin),
+        ("/api/slots/search?limit=50", patient), ("/api/notifications", patient),
+    ]
+    metrics.registry.reset()
+    for i in range(args.requests):
+        path, headers = paths[i % len(paths)]
+        assert client.get(path, headers=headers).status_code == 200, path
+
+    snapshot = metrics.registry.snapshot()
+    histograms = {(name, labels[0][1]): (b, c, s, n) for name, labels, b, c, s, n in snapshot["histograms"]}
+    rows = {}
+    for (name, endpoint), (buckets, counts, total, n) in sorted(histograms.items()):
+        if name != "hms_request_duration_seconds":
+            continue
+        queries = histograms[("hms_request_queries", endpoint)]
+        sql = histograms[("hms_request_query_seconds", endpoint)]
+        rows[endpoint] = {
+            "requests": n,
+            "p50_le_ms": histogram_quantile(buckets, counts, 0.5) * 1000.0,
+            "p95_le_ms": histogram_quantile(buckets, counts, 0.95) * 1000.0,
+            "mean_ms": total / n * 1000.0,
+            "queries_per_req": queries[2] / n,
+            "sql_ms_per_req": sql[2] / n * 1000.0,
+        }
+    report(f"metrics registry after {args.requests} requests", rows)
+
+    with app.app_context():
+        report("N+1 detection (200 appointments)", {"lazy": walk(app, eager=False), "joinedload": walk(app, eager=True)})
+
+    rows = {}
+    for label, slow_ms in (("profiler off", 0), ("profiler on", 60_000)):
+        app.config["PROFILE_SLOW_MS"] = slow_ms
+        rows[label] = timeit(lambda: client.get("/api/appointments?limit=100", headers=admin), repeat=args.requests)
+        time.sleep(0.05)
+    report("sampling profiler overhead (/api/appointments?limit=100)", rows)
+
+
+if __name__ == "__main__":
+    main()
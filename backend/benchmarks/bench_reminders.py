@@ -0,0 +1,124 @@
+# backend/benchmarks/bench_reminders.py
+"""
+Reminder fan-out: per-row inserts and sends vs batched inserts and the async sender.
+
+    python -m benchmarks.bench_reminders --appointments 20000 --latency-ms 20
+
+Books --appointments appointments for tomorrow, then compares creating
+their reminders one ORM insert + commit per row against
+`notifications.schedule_reminders`, and delivering a sample through a stub
+transport with --latency-ms per send one at a time against the asyncio
+sender at --concurrency (with --failure-rate of sends failing and retried).
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from benchmarks._common import make_app, report
+from models.models import db, Appointment, DoctorProfile, Notification, PatientProfile, User
+from services import notifications
+from services.db_utils import bulk_insert_raw
+from services.schedules import format_slot
+
+
+def populate(appointments):
+    doctors = max(100, appointments // 250)  # <= 250 five-minute slots each
+    conn = db.session.connection()
+    now = datetime.utcnow().isoformat(sep=" ")
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    users, doctor_rows, patient_rows, appts = [], [], [], []
+    for i in range(1, doctors + appointments + 1):
+        role = "doctor" if i <= doctors else "patient"
+        users.append({"id": i, "username": f"{role}{i}", "email": f"{role}{i}@bench.example", "password_hash": "x",
+                      "role": role, "full_name": f"{role.title()} {i}", "phone": None, "is_active": True,
+                      "blacklisted": False, "created_at": now, "updated_at": now})
+        if role == "doctor":
+            doctor_rows.append({"id": i, "user_id": i, "bio": None, "qualification": None,
+                                "consultation_fee": 500, "created_at": now, "updated_at": now})
+        else:
+            patient_rows.append({"id": i, "user_id": i, "dob": None, "gender": None, "address": None,
+                                 "emergency_contact": None, "created_at": now, "updated_at": now})
+            n = i - doctors
+            start = 2 * 60 + (n // doctors) * 5
+            appts.append({"id": n, "patient_id": i, "doctor_id": n % doctors + 1, "availability_id": None,
+                          "date": tomorrow, "time_slot": format_slot(start, start + 5), "status": "booked",
+                          "reason": None, "created_at": now, "updated_at": now})
+    for table, rows in ((User.__table__, users), (DoctorProfile.__table__, doctor_rows),
+                        (PatientProfile.__table__, patient_rows), (Appointment.__table__, appts)):
+        bulk_insert_raw(conn, table, rows)
+    db.session.commit()
+
+
+def per_row_reminders(day, limit):
+    """Baseline: one query for the day, then an ORM insert and commit per reminder."""
+    rows = db.session.execute(
+        select(Appointment.id, PatientProfile.user_id)
+        .join(PatientProfile, PatientProfile.id == Appointment.patient_id)
+        .where(Appointment.date == day, Appointment.status == "booked")
+        .limit(limit)
+    ).all()
+    for appointment_id, user_id in rows:
+        db.session.add(Notification(user_id=user_id, type="reminder",
+                                    payload=json.dumps({"appointment_id": appointment_id})))
+        db.session.commit()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--appointments", type=int, default=20_000)
+    parser.add_argument("--send", type=int, default=500, help="messages delivered per sender")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        populate(args.appointments)
+        day = date.today() + timedelta(days=1)
+        rows = {}
+
+        start = time.perf_counter()
+        baseline_n = per_row_reminders(day, limit=2000)  # one commit per row: a sample is enough
+        elapsed = time.perf_counter() - start
+        rows["schedule: per-row commit"] = {"rows": baseline_n, "rows_per_s": baseline_n / elapsed}
+        db.session.execute(delete(Notification))
+        db.session.commit()
+
+        start = time.perf_counter()
+        result = notifications.schedule_reminders(day)
+        elapsed = time.perf_counter() - start
+        rows["schedule: batched"] = {"rows": result["created"], "rows_per_s": result["created"] / elapsed}
+
+        user_ids = db.session.execute(select(PatientProfile.user_id).limit(1000)).scalars().all()
+        start = time.perf_counter()
+        for user_id in user_ids:
+            notifications.unread_count(user_id)
+        rows["unread count (partial index)"] = {
+            "per_call_ms": (time.perf_counter() - start) * 1000 / len(user_ids),
+            "unread_rows": db.session.execute(select(func.count()).select_from(Notification)).scalar(),
+        }
+
+        messages = [{"id": i, "type": "reminder", "email": None, "name": None, "payload": {}}
+                    for i in range(args.send)]
+        latency = args.latency_ms / 1000.0
+        for label, concurrency in (("deliver: sequential", 1), ("deliver: async", args.concurrency)):
+            transport = notifications.StubTransport(latency=latency, failure_rate=args.failure_rate, seed=1)
+            sender = notifications.Sender(transport, concurrency=concurrency, backoff=latency)
+            start = time.perf_counter()
+            results = asyncio.run(sender.send_all(messages))
+            elapsed = time.perf_counter() - start
+            rows[label] = {"msgs_per_s": len(messages) / elapsed,
+                           "failed": sum(1 for _, e in results if e), "concurrency": concurrency}
+
+    report(f"reminders: {args.appointments} appointments tomorrow", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# backend/benchmarks/bench_replicas.py
+"""
+Read-replica routing with two SQLite stand-ins (runs offline).
+
+    python -m benchmarks.bench_replicas --patients 5000 --requests 300
+
+Seeds a primary database, copies it into two replica files with SQLite's
+backup API (so they are snapshots that never catch up, i.e. maximal lag),
+then for each strategy:
+
+* drives the dashboard, doctor list, search and appointment list endpoints
+  and reports how many connection checkouts each engine served and the
+  request latency;
+* books an appointment as a patient and immediately lists that patient's
+  appointments, with and without read-your-writes stickiness, to show the
+  new booking is visible only when the user is pinned to the primary.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date
+
+from benchmarks._common import percentile, report
+from models.models import db, DoctorAvailability
+
+
+def snapshot(primary_path, replica_path):
+    src, dst = sqlite3.connect(primary_path), sqlite3.connect(replica_path)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def login(client, username, password):
+    token = client.post("/api/auth/login", json={"username": username, "password": password}).json["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def checkouts(app):
+    with app.app_context():
+        return {key or "primary": engine.pool.metrics.snapshot()["checkouts"] for key, engine in db.engines.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hms-replicas-")
+    primary = os.path.join(workdir, "primary.db")
+    copies = [os.path.join(workdir, f"replica{n}.db") for n in range(2)]
+    os.environ["DATABASE_URL"] = f"sqlite:///{primary}"
+    from app import create_app, seed_database
+    from services import replicas, synthetic
+
+    seed_app = create_app()
+    seed_database(seed_app)
+    with seed_app.app_context():
+        synthetic.generate_synthetic(args.patients, log=lambda *a: None)
+        db.session.execute(db.text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        for engine in db.engines.values():
+            engine.dispose()
+    for path in copies:
+        snapshot(primary, path)
+
+    os.environ["DB_REPLICA_URLS"] = ",".join(f"sqlite:///{path}" for path in copies)
+    rows = {}
+    for strategy in ("round_robin", "least_loaded"):
+        os.environ["DB_REPLICA_STRATEGY"] = strategy
+        app = create_app()
+        client = app.test_client()
+        admin = login(client, "admin", "admin123")
+        patient = login(client, "johndoe", "patient123")
+        replicas._sticky.clear()  # forget the previous strategy's bookings
+        before = checkouts(app)
+        paths = [("/api/admin/dashboard", admin), ("/api/doctors?limit=20", admin),
+                 ("/api/search?q=car&role=doctor", admin), ("/api/appointments?limit=20", patient)]
+        latencies = []
+        for i in range(args.requests):
+            path, headers = paths[i % len(paths)]
+            start = time.perf_counter()
+            assert client.get(path, headers=headers).status_code == 200, path
+            latencies.append((time.perf_counter() - start) * 1000.0)
+        after = checkouts(app)
+        rows[f"{strategy}: reads"] = {
+            **{f"{key}_checkouts": after[key] - before.get(key, 0) for key in after},
+            "p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95),
+        }
+
+        for sticky in (True, False):
+            app.config["DB_REPLICA_STICKY_SECONDS"] = 5.0 if sticky else 0.0
+            replicas._sticky.clear()
+            with app.app_context():
+                slot_id = db.session.execute(
+                    db.select(DoctorAvailability.id)
+                    .where(DoctorAvailability.is_booked.is_(False), DoctorAvailability.date > date.today())
+                    .limit(1)
+                ).scalar()
+            response = client.post("/api/appointments", json={"availability_id": slot_id}, headers=patient)
+            appointment_id = response.json["id"]
+            listed = client.get("/api/appointments?sort=-date&limit=100", headers=patient).json["items"]
+            rows[f"{strategy}: sticky={sticky}"] = {
+                "booked": response.status_code,
+                "visible_right_after": any(item["id"] == appointment_id for item in listed),
+            }
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+    report(f"replicas: 2 SQLite stand-ins, {args.requests} reads", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# backend/benchmarks/bench_reports.py
+"""
+Monthly reports: recount from raw rows vs daily rollups.
+
+    python -m benchmarks.bench_reports --patients 20000 --workers 4
+
+Loads a synthetic hospital, then builds last month's report for every
+doctor three ways: the per-doctor recount over appointments, treatments and
+status history that the rollups replace, `reports.build_month` on one
+thread and on --workers threads. Also reports the full rollup rebuild time
+and the cost of an ORM status change with the rollup hook installed.
+"""
+import argparse
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from benchmarks._common import make_app, report, timeit
+from models.models import db, Appointment, AppointmentStatusHistory, DoctorProfile, Treatment
+from services import reports, synthetic
+
+
+def recount(doctor_id, year, month):
+    """Baseline: one doctor's month aggregated from the base tables."""
+    first, last = reports.month_bounds(year, month)
+    in_month = (Appointment.doctor_id == doctor_id, Appointment.date.between(first, last))
+    by_status = dict(db.session.execute(
+        select(Appointment.status, func.count()).where(*in_month).group_by(Appointment.status)
+    ).all())
+    fee = db.session.execute(select(DoctorProfile.consultation_fee).where(DoctorProfile.id == doctor_id)).scalar()
+    followups = db.session.execute(
+        select(func.count()).select_from(Treatment)
+        .join(Appointment, Appointment.id == Treatment.appointment_id)
+        .where(*in_month, Treatment.followup_date.isnot(None))
+    ).scalar()
+    cancellations = db.session.execute(
+        select(func.count()).select_from(AppointmentStatusHistory)
+        .join(Appointment, Appointment.id == AppointmentStatusHistory.appointment_id)
+        .where(*in_month, AppointmentStatusHistory.new_status == "cancelled")
+    ).scalar()
+    return {
+        "bookings": sum(by_status.values()),
+        "completions": by_status.get("completed", 0),
+        "cancellations": cancellations,
+        "revenue": by_status.get("completed", 0) * (fee or 0),
+        "followups": followups,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    app = make_app()
+    app.config["REPORT_DIR"] = tempfile.mkdtemp(prefix="hms-reports-")
+    with app.app_context():
+        db.create_all()
+        synthetic.generate_synthetic(args.patients, log=lambda *a: None)
+        year, month = reports.previous_month()
+        doctor_ids = db.session.execute(select(DoctorProfile.id)).scalars().all()
+
+        start = time.perf_counter()
+        rows = reports.rebuild_rollups()
+        rebuild_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for doctor_id in doctor_ids:
+            recount(doctor_id, year, month)
+        db.session.commit()
+        recount_s = time.perf_counter() - start
+
+        results = {
+            "setup": {"doctors": len(doctor_ids), "rollup_rows": rows, "rebuild_s": rebuild_s},
+            "recount (per doctor)": {"total_s": recount_s, "per_doctor_ms": recount_s * 1000 / len(doctor_ids)},
+        }
+        for workers in sorted({1, args.workers}):
+            start = time.perf_counter()
+            summary = reports.build_month(year, month, workers=workers)
+            elapsed = time.perf_counter() - start
+            results[f"rollups ({workers} workers)"] = {
+                "total_s": elapsed, "per_doctor_ms": elapsed * 1000 / len(doctor_ids),
+                "bookings": summary["bookings"],
+            }
+
+        ids = iter(db.session.execute(
+            select(Appointment.id).where(Appointment.status == "booked").limit(200)
+        ).scalars().all())
+
+        def complete_one():
+            db.session.get(Appointment, next(ids)).status = "completed"
+            db.session.commit()
+
+        results["status change + rollup hook"] = timeit(complete_one, repeat=150, warmup=5)
+
+    report(f"monthly reports: {args.patients} patients", results)
+
+
+if __name__ == "__main__":
+    main()
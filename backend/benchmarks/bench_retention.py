@@ -0,0 +1,100 @@
+# backend/benchmarks/bench_retention.py
+"""
+Retention run over a hospital with a long history.
+
+    python -m benchmarks.bench_retention --patients 20000 --appointments 200000 --months 1
+
+Generates a synthetic hospital plus old read and unread notifications, then
+times the dry-run report and the run itself with RETENTION_APPOINTMENT_MONTHS
+set to --months. Reports rows removed, the longest single transaction (the
+longest any lock is held), the reported bytes against the shrink of the
+database file after VACUUM, and a doctor's appointment list before and after.
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select, text
+
+from benchmarks._common import make_app, report, timeit
+from models.models import db, DoctorProfile, Notification
+from services import listing, retention, synthetic
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=20000)
+    parser.add_argument("--appointments", type=int, default=200000)
+    parser.add_argument("--notifications", type=int, default=100000)
+    parser.add_argument("--months", type=int, default=1)
+    parser.add_argument("--chunk", type=int, default=retention.CHUNK_SIZE)
+    args = parser.parse_args()
+    os.environ["RETENTION_APPOINTMENT_MONTHS"] = str(args.months)
+    os.environ["RETENTION_CHUNK_SIZE"] = str(args.chunk)
+
+    from app import seed_database
+
+    app = make_app()
+    seed_database(app)
+    rows = {}
+    with app.app_context():
+        synthetic.generate_synthetic(args.patients, appointments=args.appointments, log=lambda *a: None)
+        old = datetime.utcnow() - timedelta(days=365)
+        db.session.execute(Notification.__table__.insert(), [
+            {"user_id": 1, "type": "reminder", "payload": '{"appointment_id": %d}' % i,
+             "is_read": i % 3 != 0, "created_at": old}
+            for i in range(args.notifications)
+        ])
+        db.session.commit()
+        doctor_id = db.session.scalar(select(DoctorProfile.id).limit(1))
+        path = db.engine.url.database
+
+        def doctor_list():
+            listing.paginate(listing.APPOINTMENTS, limit=50, filters={"doctor_id": doctor_id})
+            db.session.rollback()
+
+        rows["doctor appointments: before"] = timeit(doctor_list, repeat=30)
+
+        start = time.perf_counter()
+        dry = retention.report()
+        rows["dry run"] = {
+            "wall_ms": (time.perf_counter() - start) * 1000.0,
+            "rows": sum(n for p in dry.values() for n in p["rows"].values()),
+            "bytes": sum(p["bytes"] for p in dry.values()),
+        }
+
+        transactions, opened = [], [None]
+
+        def begin(session, transaction, connection):
+            opened[0] = time.perf_counter()
+
+        def end(session):
+            if opened[0] is not None:
+                transactions.append((time.perf_counter() - opened[0]) * 1000.0)
+                opened[0] = None
+
+        db.session.execute(text("VACUUM"))
+        size_before = os.path.getsize(path)
+        event.listen(db.session, "after_begin", begin)
+        event.listen(db.session, "after_commit", end)
+        start = time.perf_counter()
+        done = retention.run()
+        wall = time.perf_counter() - start
+        event.remove(db.session, "after_begin", begin)
+        event.remove(db.session, "after_commit", end)
+        db.session.execute(text("VACUUM"))
+        rows["run"] = {
+            "wall_ms": wall * 1000.0,
+            "rows": sum(n for p in done.values() for n in p["rows"].values()),
+            "chunks": sum(p.get("chunks", 0) for p in done.values()),
+            "longest_txn_ms": max(transactions, default=0.0),
+            "db_shrink_bytes": size_before - os.path.getsize(path),
+        }
+        rows["doctor appointments: after"] = timeit(doctor_list, repeat=30)
+
+    report(f"retention: {args.appointments} appointments, {args.notifications} notifications", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# backend/benchmarks/bench_revocation.py
+"""
+Per-request cost of token revocation checks.
+
+    python -m benchmarks.bench_revocation --revoked 100000 --checks 20000
+
+Compares the bloom-fronted store against a query per check, both for the
+blocklist lookup alone and for an authenticated GET /api/auth/profile.
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+
+from benchmarks._common import make_app, report, timeit
+from models.models import db, RevokedToken, User
+from services import revocation
+
+
+class QueryPerCheck(revocation.RevocationStore):
+    """Baseline: every check goes to the backend."""
+
+    def is_revoked(self, jti):
+        return self.backend.lookup(jti, datetime.utcnow()) is not None
+
+
+def per_check_us(store, jtis):
+    start = time.perf_counter()
+    for jti in jtis:
+        store.is_revoked(jti)
+    return (time.perf_counter() - start) / len(jtis) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--revoked", type=int, default=100_000)
+    parser.add_argument("--checks", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@x", "password_hash": "x",
+                                           "role": "patient", "is_active": True, "blacklisted": False}])
+        expires = datetime.utcnow() + timedelta(days=1)
+        revoked = [uuid.uuid4().hex for _ in range(args.revoked)]
+        db.session.execute(insert(RevokedToken), [
+            {"jti": jti, "user_id": 1, "revoked_at": datetime.utcnow(), "expires_at": expires} for jti in revoked
+        ])
+        db.session.commit()
+        token = create_access_token(identity="1", expires_delta=timedelta(days=1))
+
+        clean = [uuid.uuid4().hex for _ in range(args.checks)]
+        hot = revoked[: args.checks]
+        bloom = revocation.RevocationStore(revocation.DatabaseBackend(), sync_interval=1.0)
+        start = time.perf_counter()
+        bloom.is_revoked(clean[0])  # initial load of the filter
+        load_ms = (time.perf_counter() - start) * 1000.0
+        naive = QueryPerCheck(revocation.DatabaseBackend())
+        rows = {
+            "bloom: not revoked": {"us_per_check": per_check_us(bloom, clean)},
+            "bloom: revoked": {"us_per_check": per_check_us(bloom, hot)},
+            "query per check: not revoked": {"us_per_check": per_check_us(naive, clean[: args.checks // 10])},
+            "query per check: revoked": {"us_per_check": per_check_us(naive, hot[: args.checks // 10])},
+        }
+        rows["bloom store"] = {**bloom.stats(), "initial_load_ms": load_ms}
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    for label, store in (("profile, bloom store", bloom), ("profile, query per check", naive)):
+        revocation.reset_store(store)
+        rows[label] = timeit(lambda: client.get("/api/auth/profile", headers=headers), repeat=args.requests)
+    revocation.reset_store()
+
+    report(f"revocation: {args.revoked} revoked tokens", rows)
+
+
+if __name__ == "__main__":
+    main()
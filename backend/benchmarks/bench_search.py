@@ -0,0 +1,119 @@
+# backend/benchmarks/bench_search.py
+"""
+Doctor/patient search: full-text index vs LIKE '%term%' scans.
+
+    python -m benchmarks.bench_search --users 1000000
+
+Users get syllable-generated names (so term frequencies look like a real
+name distribution rather than a handful of repeated names); 1% are doctors
+with specializations and a bio. Reports the index build time and per-query
+latency for typeahead prefixes, full words and multi-word queries.
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import or_, select
+
+from benchmarks._common import make_app, report, timeit
+from models.models import db, DoctorProfile, DoctorSpecialization, Specialization, User
+from services import search
+from services.db_utils import bulk_insert_raw
+from services.synthetic import DIAGNOSES, SPECIALIZATIONS
+
+SYLLABLES = ["ka", "ri", "mo", "na", "shi", "to", "le", "an", "vi", "ra", "sa", "den", "mar", "lo",
+             "ber", "tan", "el", "ko", "mi", "ya", "ze", "pa", "dro", "su", "gar", "in", "ha", "chu"]
+
+
+def name(rng, syllables):
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+def populate(users, seed=7):
+    rng = random.Random(seed)
+    conn = db.session.connection()
+    now = "2025-01-01 00:00:00"
+    specs = [{"id": i + 1, "name": n, "description": d, "created_at": now, "updated_at": now}
+             for i, (n, d) in enumerate(SPECIALIZATIONS)]
+    bulk_insert_raw(conn, Specialization.__table__, specs)
+    batch, doctors, doc_specs = [], [], []
+    for uid in range(1, users + 1):
+        role = "doctor" if uid % 100 == 0 else "patient"
+        full_name = f"{name(rng, 2)} {name(rng, rng.choice((2, 3)))}"
+        batch.append({"id": uid, "username": f"{role}{uid}", "email": f"{role}{uid}@bench.example",
+                      "password_hash": "x", "role": role, "full_name": full_name, "phone": None,
+                      "is_active": True, "blacklisted": False, "created_at": now, "updated_at": now})
+        if role == "doctor":
+            doctor_id = len(doctors) + 1
+            doctors.append({"id": doctor_id, "user_id": uid, "bio": f"Treats {rng.choice(DIAGNOSES).lower()}",
+                            "qualification": "MBBS", "consultation_fee": 500, "created_at": now, "updated_at": now})
+            doc_specs.append({"id": len(doc_specs) + 1, "doctor_id": doctor_id,
+                              "specialization_id": rng.randint(1, len(specs))})
+        if len(batch) >= 20_000:
+            bulk_insert_raw(conn, User.__table__, batch)
+            batch = []
+    bulk_insert_raw(conn, User.__table__, batch)
+    bulk_insert_raw(conn, DoctorProfile.__table__, doctors)
+    bulk_insert_raw(conn, DoctorSpecialization.__table__, doc_specs)
+    db.session.commit()
+    return db.session.execute(select(User.full_name).where(User.id == users // 2)).scalar()
+
+
+def like_search(query, role=None, limit=10):
+    """Baseline: every word must appear somewhere in name, bio or specialization."""
+    stmt = (
+        select(User.id, User.full_name)
+        .outerjoin(DoctorProfile, DoctorProfile.user_id == User.id)
+        .outerjoin(DoctorSpecialization, DoctorSpecialization.doctor_id == DoctorProfile.id)
+        .outerjoin(Specialization, Specialization.id == DoctorSpecialization.specialization_id)
+        .where(User.role.in_([role] if role else search.ROLES))
+        .distinct()
+        .limit(limit)
+    )
+    for term in search._terms(query):
+        pattern = f"%{term}%"
+        stmt = stmt.where(or_(User.full_name.ilike(pattern), DoctorProfile.bio.ilike(pattern),
+                              Specialization.name.ilike(pattern)))
+    return db.session.execute(stmt).all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        sample = populate(args.users)
+        load_s = time.perf_counter() - start
+        start = time.perf_counter()
+        indexed = search.rebuild_index()
+        index_s = time.perf_counter() - start
+
+        first, last = sample.lower().split()
+        queries = {
+            "typeahead 2 chars": (first[:2], None),
+            "typeahead 4 chars": (first[:4], None),
+            "full name": (f"{first} {last}", None),
+            "surname prefix": (last[:5], None),
+            "doctor by specialization": ("cardio", "doctor"),
+            "doctor by condition": ("asthma", "doctor"),
+            "no match": ("qxzv", None),
+        }
+        rows = {"build": {"users": args.users, "load_s": load_s, "index_s": index_s, "indexed": indexed}}
+        for label, (q, role) in queries.items():
+            fts = timeit(lambda: search.search(q, role=role), repeat=args.repeat)
+            like = timeit(lambda: like_search(q, role=role), repeat=max(3, args.repeat // 10), warmup=1)
+            rows[f"{label} [{q}]"] = {
+                "fts_p50_ms": fts["p50_ms"], "fts_p95_ms": fts["p95_ms"], "like_p50_ms": like["p50_ms"],
+                "hits": len(search.search(q, role=role)),
+            }
+
+    report(f"search: {args.users} users", rows)
+
+
+if __name__ == "__main__":
+    main()
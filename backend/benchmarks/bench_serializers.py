@@ -0,0 +1,103 @@
+# backend/benchmarks/bench_serializers.py
+"""
+Serialization throughput per model: ORM entities vs column tuples, stdlib json vs orjson.
+
+    python -m benchmarks.bench_serializers --patients 5000 --rows 2000
+
+For every list schema (appointments, patients, doctors, treatments) with
+all its fields, measures rows per second for:
+
+* orm: full entities with the related ones selectin-loaded, dicts built by
+  attribute access (what the views did before services/serializers.py);
+* tuples: `Schema.select()` column tuples zipped into dicts;
+
+and, on the resulting dicts, the encoders: `json.dumps` configured like
+Flask's default provider (sorted keys), `serializers.dumps` (orjson when
+installed) and `stream_array` in 500-item chunks.
+"""
+import argparse
+import json
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from benchmarks._common import make_app, report
+from models.models import db
+from services import listing, serializers, synthetic
+
+
+def rate(fn, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+
+def orm_dicts(spec, names, limit):
+    options = []
+    for field in (spec.fields[n] for n in names):
+        loader = None
+        for rel in field.path:
+            loader = selectinload(rel) if loader is None else loader.selectinload(rel)
+        if loader is not None:
+            options.append(loader)
+    entities = db.session.scalars(select(spec.model).options(*options).order_by(spec.model.id).limit(limit)).all()
+
+    def value(obj, path, attr):
+        for i, rel in enumerate(path):
+            if obj is None:
+                return None
+            obj = getattr(obj, rel.key)
+            if isinstance(obj, list):
+                return [value(item, path[i + 1:], attr) for item in obj]
+        value_ = getattr(obj, attr.key) if obj is not None else None
+        return value_.isoformat() if hasattr(value_, "isoformat") else value_
+
+    items = [{n: value(e, spec.fields[n].path, spec.fields[n].attr) for n in names} for e in entities]
+    db.session.expunge_all()
+    return items
+
+
+def tuple_dicts(spec, names, limit):
+    stmt, plan = spec.schema.select(names)
+    return spec.schema.dicts(db.session.execute(stmt.order_by(spec.model.id).limit(limit)).all(), plan)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=5000)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from app import seed_database
+
+    app = make_app()
+    seed_database(app)
+    with app.app_context():
+        synthetic.generate_synthetic(args.patients, log=lambda *a: None)
+        rows = {}
+        for label, spec in (("appointments", listing.APPOINTMENTS), ("patients", listing.PATIENTS),
+                            ("doctors", listing.DOCTORS), ("treatments", listing.TREATMENTS)):
+            names = list(spec.fields)
+            items = tuple_dicts(spec, names, args.rows)
+            n = len(items)
+            stdlib = lambda: json.dumps(items, sort_keys=True, default=lambda v: v.isoformat())  # noqa: E731
+            rows[label] = {
+                "rows": n,
+                "orm_rows_per_s": rate(lambda: orm_dicts(spec, names, args.rows), n, args.repeat),
+                "tuple_rows_per_s": rate(lambda: tuple_dicts(spec, names, args.rows), n, args.repeat),
+                "json_rows_per_s": rate(stdlib, n, args.repeat),
+                "dumps_rows_per_s": rate(lambda: serializers.dumps(items), n, args.repeat),
+                "stream_rows_per_s": rate(lambda: b"".join(serializers.stream_array(items)), n, args.repeat),
+            }
+            assert serializers.loads(serializers.dumps(items)) == json.loads(stdlib())
+
+    report(f"serializers ({'orjson' if serializers.orjson else 'stdlib json'}): rows per second", rows)
+
+
+if __name__ == "__main__":
+    main()
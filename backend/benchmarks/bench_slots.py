@@ -0,0 +1,112 @@
+# backend/benchmarks/bench_slots.py
+"""
+Free-slot search: availability/appointment anti-join vs. doctor-day bitmaps.
+
+    python -m benchmarks.bench_slots --doctors 500 --days 30
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import and_, insert, select
+
+from benchmarks._common import make_app, report, timeit
+from models.models import (
+    db,
+    User,
+    DoctorProfile,
+    PatientProfile,
+    Specialization,
+    DoctorSpecialization,
+    DoctorAvailability,
+    Appointment,
+)
+from services import slots
+
+
+def populate(doctors, days, booked_ratio, seed=11):
+    rng = random.Random(seed)
+    db.session.execute(insert(User), [
+        {"id": i + 1, "username": f"d{i}", "email": f"d{i}@x", "password_hash": "x", "role": "doctor",
+         "full_name": f"Doctor {i}", "is_active": True, "blacklisted": False}
+        for i in range(doctors)
+    ] + [{"id": doctors + 1, "username": "p", "email": "p@x", "password_hash": "x", "role": "patient",
+          "is_active": True, "blacklisted": False}])
+    db.session.execute(insert(DoctorProfile), [{"id": i + 1, "user_id": i + 1} for i in range(doctors)])
+    db.session.execute(insert(PatientProfile), [{"id": 1, "user_id": doctors + 1}])
+    db.session.execute(insert(Specialization), [{"id": s + 1, "name": f"Spec{s}"} for s in range(5)])
+    db.session.execute(insert(DoctorSpecialization), [
+        {"doctor_id": i + 1, "specialization_id": i % 5 + 1} for i in range(doctors)
+    ])
+
+    today = date.today()
+    availability, appointments = [], []
+    for d in range(1, doctors + 1):
+        for offset in range(days):
+            day = today + timedelta(days=offset)
+            for n in range(16):  # 09:00-17:00 in 30 minute slots
+                start = 9 * 60 + n * 30
+                slot = f"{start // 60:02d}:{start % 60:02d}-{(start + 30) // 60:02d}:{(start + 30) % 60:02d}"
+                availability.append({"doctor_id": d, "date": day, "time_slot": slot,
+                                     "start_minute": start, "end_minute": start + 30, "is_active": True})
+                if rng.random() < booked_ratio:
+                    appointments.append({"patient_id": 1, "doctor_id": d, "date": day,
+                                         "time_slot": slot, "status": "booked"})
+    for i in range(0, len(availability), 50_000):
+        db.session.execute(insert(DoctorAvailability), availability[i:i + 50_000])
+    for i in range(0, len(appointments), 50_000):
+        db.session.execute(insert(Appointment), appointments[i:i + 50_000])
+    db.session.commit()
+    return len(availability), len(appointments)
+
+
+def naive_search(spec_id, limit):
+    """What the booking screen would do without bitmaps: anti-join then sort."""
+    stmt = (
+        select(DoctorAvailability.id, DoctorAvailability.doctor_id, DoctorAvailability.date, DoctorAvailability.time_slot)
+        .join(DoctorSpecialization, DoctorSpecialization.doctor_id == DoctorAvailability.doctor_id)
+        .outerjoin(Appointment, and_(
+            Appointment.doctor_id == DoctorAvailability.doctor_id,
+            Appointment.date == DoctorAvailability.date,
+            Appointment.time_slot == DoctorAvailability.time_slot,
+            Appointment.status != "cancelled",
+        ))
+        .where(
+            DoctorSpecialization.specialization_id == spec_id,
+            DoctorAvailability.date >= date.today() + timedelta(days=1),
+            DoctorAvailability.is_active.is_(True),
+            Appointment.id.is_(None),
+        )
+        .order_by(DoctorAvailability.date, DoctorAvailability.start_minute)
+        .limit(limit)
+    )
+    return db.session.execute(stmt).all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--booked", type=float, default=0.9, help="fraction of slots already booked")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        n_avail, n_appt = populate(args.doctors, args.days, args.booked)
+        day_rows = slots.rebuild_all()
+        tomorrow = date.today() + timedelta(days=1)
+
+        report(f"slot search @ {n_avail:,} availability rows / {n_appt:,} appointments / {day_rows:,} doctor-days", {
+            "anti-join (naive)": timeit(lambda: naive_search(1, args.limit), repeat=20),
+            "bitmap search by specialization": timeit(
+                lambda: slots.search_free_slots(specialization_id=1, date_from=tomorrow, limit=args.limit), repeat=200),
+            "bitmap search, one doctor-day": timeit(
+                lambda: slots.search_free_slots(doctor_id=1, date_from=tomorrow, date_to=tomorrow, limit=16),
+                repeat=500),
+        })
+
+
+if __name__ == "__main__":
+    main()
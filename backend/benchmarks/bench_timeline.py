@@ -0,0 +1,107 @@
+# backend/benchmarks/bench_timeline.py
+"""
+Patient timeline for patients with hundreds of visits.
+
+    python -m benchmarks.bench_timeline --patients 5 --appointments 3000
+
+Generates a few patients sharing --appointments appointments (600 visits
+each with the defaults) and, for the patient with the most visits,
+compares building the timeline with the models' default lazy loading
+(the N+1 cascade), with `timeline.load_timeline()` (fixed query count),
+and from the per-patient cache through the HTTP endpoint. Reports queries
+and latency, then checks that writing a treatment for the patient drops
+the cached entry.
+"""
+import argparse
+
+from sqlalchemy import event, func, select
+
+from benchmarks._common import make_app, report, timeit
+from models.models import db, Appointment, Treatment
+from services import synthetic, timeline
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine, self.count = engine, 0
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def lazy_timeline(patient_id):
+    appointments = db.session.scalars(
+        select(Appointment).where(Appointment.patient_id == patient_id)
+        .order_by(Appointment.date.desc(), Appointment.id.desc())
+    ).all()
+    visits = [timeline._visit(appt) for appt in appointments]
+    db.session.expunge_all()
+    return visits
+
+
+def eager_timeline(patient_id):
+    result = timeline.load_timeline(patient_id)
+    db.session.expunge_all()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=5)
+    parser.add_argument("--appointments", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from app import seed_database
+
+    app = make_app()
+    seed_database(app)
+    with app.app_context():
+        synthetic.generate_synthetic(args.patients, appointments=args.appointments, log=lambda *a: None)
+        patient_id, visits = db.session.execute(
+            select(Appointment.patient_id, func.count()).group_by(Appointment.patient_id)
+            .order_by(func.count().desc()).limit(1)
+        ).one()
+        engine = db.engine
+        rows = {}
+        for label, fn in (("lazy (N+1)", lazy_timeline), ("selectinload", eager_timeline)):
+            with QueryCounter(engine) as counter:
+                fn(patient_id)
+            rows[label] = {"queries": counter.count, **timeit(lambda: fn(patient_id), repeat=args.repeat)}
+        db.session.remove()
+
+    client = app.test_client()
+    token = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"}).json["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    path = f"/api/patients/{patient_id}/timeline"
+    timeline.invalidate()
+    cold = client.get(path, headers=headers)
+    assert cold.status_code == 200 and cold.json["visit_count"] == visits
+    rows["http: cold"] = {"queries": cold.headers["Server-Timing"].split('"')[1], "bytes": len(cold.data)}
+    rows["http: cached"] = {
+        "queries": client.get(path, headers=headers).headers["Server-Timing"].split('"')[1],
+        **timeit(lambda: client.get(path, headers=headers), repeat=args.repeat),
+    }
+
+    with app.app_context():
+        appointment = db.session.scalars(select(Appointment).filter_by(patient_id=patient_id).limit(1)).one()
+        db.session.add(Treatment(appointment_id=appointment.id, doctor_id=appointment.doctor_id, diagnosis="bench"))
+        db.session.commit()
+    after = client.get(path, headers=headers)
+    rows["after a new treatment"] = {
+        "queries": after.headers["Server-Timing"].split('"')[1],
+        "has_it": any(t["diagnosis"] == "bench" for v in after.json["visits"] for t in v["treatments"]),
+    }
+
+    report(f"timeline: patient {patient_id} with {visits} visits", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+# backend/benchmarks/suite.py
+"""
+Every API route, through the Flask test client and a multi-worker server,
+compared against a stored baseline.
+
+    python -m benchmarks.suite --patients 4000 --requests 100
+    python -m benchmarks.suite --save-baseline            # record benchmarks/baseline.json
+    python -m benchmarks.suite --modes client --only auth_login,admin_dashboard
+
+Builds the app with `create_app()` against a throwaway database seeded with
+`seed_database()` plus a synthetic hospital of --patients patients, then
+sends --requests requests (after --warmup unmeasured ones) to each route
+registered on the blueprint in controllers/urls.py:
+
+* client: one request at a time through `app.test_client()`, so the numbers
+  are the application alone;
+* server: `python app.py serve` (gunicorn, --workers processes) on a free
+  port, driven by --clients keep-alive connections at once.
+
+Every rule and method of the blueprint needs an entry in ROUTES; the run
+fails if one is missing, so a new route cannot go unmeasured. Routes that
+change data take fresh rows (free slots, booked appointments, usernames)
+for every request, so each request does the same work.
+
+Reports requests per second, p50/p95/p99 latency and SQL statements per
+request (from the Server-Timing header). With a baseline (--baseline, by
+default benchmarks/baseline.json, recorded on the same machine with the same
+sizes) the run exits with status 1 if a route got slower than --tolerance
+(p95 up or throughput down, ignoring changes below --floor-ms) or runs more
+queries than before; a route that looks slower is measured a second time
+and only counts if it still is. It exits with status 2 if a route is not
+covered, a request fails or the baseline was recorded with other sizes.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import select
+
+from benchmarks._common import make_app, percentile, report
+from benchmarks.bench_http import free_port, start_server, stop_server
+from models.models import (
+    db,
+    Appointment,
+    DoctorAvailability,
+    DoctorProfile,
+    DoctorScheduleTemplate,
+    Notification,
+    PatientProfile,
+    User,
+)
+from services import exports, jobs, synthetic
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+BLUEPRINT = "main_routes"
+# sizes a baseline is only comparable with
+SIZE_OPTIONS = ("patients", "appointments", "requests", "clients", "workers")
+
+
+class Fixtures:
+    """Ids, tokens and unique values the route recipes draw on."""
+
+    def __init__(self, app, per_route):
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        today = date.today()
+        with app.app_context():
+            users = {
+                u.username: u
+                for u in db.session.scalars(select(User).where(User.username.in_(("admin", "drsmith", "johndoe"))))
+            }
+            self.tokens = {
+                role: self._token(users[username])
+                for role, username in (("admin", "admin"), ("doctor", "drsmith"), ("patient", "johndoe"))
+            }
+            self.admin_id = users["admin"].id
+            self.doctor_id = db.session.scalar(
+                select(DoctorProfile.id).where(DoctorProfile.user_id == users["drsmith"].id)
+            )
+            patients = list(db.session.scalars(select(PatientProfile.id).order_by(PatientProfile.id)))
+            self.patient_id = patients[0]
+            self.patients = itertools.cycle(patients)
+            # the newest patients are blacklisted over and over; nothing else uses them
+            self.blacklist = list(db.session.scalars(
+                select(PatientProfile.user_id).order_by(PatientProfile.id.desc()).limit(20)
+            ))
+            self.templates = [
+                {"weekday": t.weekday, "time_range": t.time_range, "slot_minutes": t.slot_minutes}
+                for t in db.session.scalars(
+                    select(DoctorScheduleTemplate).where(DoctorScheduleTemplate.doctor_id == self.doctor_id)
+                )
+            ] or [{"weekday": 0, "time_range": "09:00-12:00", "slot_minutes": 30}]
+
+            self.pools = {
+                "free_slots": list(db.session.scalars(
+                    select(DoctorAvailability.id).where(
+                        DoctorAvailability.is_booked.is_(False), DoctorAvailability.date >= today
+                    ).order_by(DoctorAvailability.id).limit(per_route)
+                )),
+                # cancelled one per request, and five per bulk request
+                "booked": list(db.session.scalars(
+                    select(Appointment.id).where(
+                        Appointment.status == "booked", Appointment.date >= today
+                    ).order_by(Appointment.id).limit(per_route * 6)
+                )),
+                "logout_tokens": [self._token(users["johndoe"]) for _ in range(per_route)],
+            }
+            for pool, needed in (("free_slots", per_route), ("booked", per_route * 6)):
+                if len(self.pools[pool]) < needed:
+                    raise RuntimeError(
+                        f"Only {len(self.pools[pool])} of {needed} {pool}; use more --patients or fewer --requests"
+                    )
+
+            db.session.add_all([
+                Notification(user_id=users["johndoe"].id, type="appointment_reminder", payload="{}")
+                for _ in range(20)
+            ])
+            db.session.commit()
+            job = exports.queue_export(self.admin_id, "appointments_export", "csv", {"doctor_id": self.doctor_id})
+            jobs.run_job(job.id)
+            self.export_id = job.id
+            db.session.remove()
+
+    @staticmethod
+    def _token(user):
+        return create_access_token(
+            identity=str(user.id),
+            additional_claims={
+                "username": user.username, "role": user.role, "full_name": user.full_name, "is_active": user.is_active,
+            },
+            expires_delta=timedelta(days=1),
+        )
+
+    def unique(self, prefix):
+        return f"{prefix}{next(self._counter)}-{os.getpid()}"
+
+    def take(self, pool, n=1):
+        with self._lock:
+            items = self.pools[pool]
+            if len(items) < n:
+                raise RuntimeError(f"Ran out of {pool}")
+            taken, self.pools[pool] = items[:n], items[n:]
+        return taken
+
+    def patient(self):
+        with self._lock:
+            return next(self.patients)
+
+
+def _register(f):
+    name = f.unique("benchuser")
+    return "/api/auth/register", {
+        "username": name, "email": f"{name}@bench.example", "password": "bench-password", "full_name": "Bench User",
+    }
+
+
+def _onboard(f):
+    doctors = []
+    for _ in range(5):
+        name = f.unique("benchdoc")
+        doctors.append({"username": name, "email": f"{name}@bench.example", "password": "bench-password",
+                        "full_name": "Bench Doctor", "specializations": ["Cardiology"]})
+    return "/api/admin/doctors/bulk", {"doctors": doctors}
+
+
+# (endpoint, method) -> (token to send: a role, "logout" (a fresh one), "metrics" (METRICS_TOKEN) or None,
+#                        recipe(fixtures) -> (path, JSON body))
+ROUTES = {
+    # auth
+    ("auth_register", "POST"): (None, _register),
+    ("auth_login", "POST"): (None, lambda f: ("/api/auth/login", {"username": "johndoe", "password": "patient123"})),
+    ("auth_logout", "POST"): ("logout", lambda f: ("/api/auth/logout", None)),
+    ("auth_profile", "GET"): ("patient", lambda f: ("/api/auth/profile", None)),
+    ("auth_profile", "PUT"): ("patient", lambda f: ("/api/auth/profile", {"phone": "555-0100"})),
+    # admin
+    ("admin_dashboard", "GET"): ("admin", lambda f: ("/api/admin/dashboard", None)),
+    ("admin_patients", "GET"): ("admin", lambda f: ("/api/admin/patients?limit=50", None)),
+    ("admin_jobs", "GET"): ("admin", lambda f: ("/api/admin/jobs", None)),
+    ("admin_db_pool", "GET"): ("admin", lambda f: ("/api/admin/db/pool", None)),
+    ("admin_generate_availability", "POST"): ("admin", lambda f: (
+        "/api/admin/availability/generate", {"days": 7, "doctor_ids": [f.doctor_id]},
+    )),
+    ("admin_retention", "GET"): ("admin", lambda f: ("/api/admin/retention", None)),
+    ("admin_retention", "POST"): ("admin", lambda f: ("/api/admin/retention", {})),
+    ("admin_bulk_doctors", "POST"): ("admin", _onboard),
+    ("admin_bulk_blacklist", "POST"): ("admin", lambda f: ("/api/admin/users/blacklist", {"user_ids": f.blacklist})),
+    ("admin_bulk_appointment_status", "POST"): ("admin", lambda f: (
+        "/api/admin/appointments/status", {"status": "cancelled", "appointment_ids": f.take("booked", 5)},
+    )),
+    # slots and appointments
+    ("slot_search", "GET"): ("patient", lambda f: ("/api/slots/search?limit=20", None)),
+    ("appointment_book", "POST"): ("admin", lambda f: (
+        "/api/appointments", {"availability_id": f.take("free_slots")[0], "patient_id": f.patient()},
+    )),
+    ("appointment_list", "GET"): ("doctor", lambda f: ("/api/appointments?limit=50", None)),
+    ("appointment_cancel", "POST"): ("admin", lambda f: (f"/api/appointments/{f.take('booked')[0]}/cancel", {})),
+    ("treatment_list", "GET"): ("admin", lambda f: ("/api/treatments?limit=50", None)),
+    ("patient_timeline", "GET"): ("admin", lambda f: (f"/api/patients/{f.patient_id}/timeline", None)),
+    # directory
+    ("doctor_list", "GET"): ("patient", lambda f: ("/api/doctors?limit=50", None)),
+    ("specialization_list", "GET"): ("patient", lambda f: ("/api/specializations", None)),
+    ("search", "GET"): ("admin", lambda f: ("/api/search?q=smi", None)),
+    # exports
+    ("export_list", "GET"): ("admin", lambda f: ("/api/exports", None)),
+    ("export_list", "POST"): ("admin", lambda f: (
+        "/api/exports", {"type": "appointments_export", "doctor_id": f.doctor_id},
+    )),
+    ("export_status", "GET"): ("admin", lambda f: (f"/api/exports/{f.export_id}", None)),
+    ("export_download", "GET"): ("admin", lambda f: (f"/api/exports/{f.export_id}/download", None)),
+    # notifications
+    ("notification_list", "GET"): ("patient", lambda f: ("/api/notifications", None)),
+    ("notification_unread_count", "GET"): ("patient", lambda f: ("/api/notifications/unread-count", None)),
+    ("notification_mark_read", "POST"): ("patient", lambda f: ("/api/notifications/read", {})),
+    # metrics
+    ("metrics", "GET"): ("metrics", lambda f: ("/metrics", None)),
+    # doctor
+    ("doctor_schedule", "GET"): ("doctor", lambda f: ("/api/doctor/schedule", None)),
+    ("doctor_schedule", "PUT"): ("doctor", lambda f: ("/api/doctor/schedule", {"templates": f.templates})),
+    ("doctor_generate_availability", "POST"): ("doctor", lambda f: ("/api/doctor/availability/generate", {"days": 7})),
+    ("doctor_agenda", "GET"): ("doctor", lambda f: ("/api/doctor/agenda", None)),
+}
+
+
+def registered_routes(app):
+    """(endpoint, method) of every rule on the blueprint, in registration order."""
+    routes = []
+    for rule in app.url_map.iter_rules():
+        blueprint, _, endpoint = rule.endpoint.partition(".")
+        if blueprint == BLUEPRINT:
+            routes.extend((endpoint, m) for m in sorted(rule.methods - {"HEAD", "OPTIONS"}))
+    return routes
+
+
+def build_request(fixtures, route):
+    """(method, path, body, headers) for one request to `route`."""
+    role, recipe = ROUTES[route]
+    path, body = recipe(fixtures)
+    if role == "logout":
+        token = fixtures.take("logout_tokens")[0]
+    elif role == "metrics":
+        token = os.getenv("METRICS_TOKEN")
+    else:
+        token = fixtures.tokens.get(role)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return route[1], path, body, headers
+
+
+def queries(server_timing):
+    return int(server_timing.split('"')[1].split()[0])
+
+
+def summarize(wall, latencies, query_counts, errors):
+    return {
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "queries": sum(query_counts) / len(query_counts) if query_counts else 0.0,
+        "errors": errors,
+    }
+
+
+def run_client(app, fixtures, route, requests, warmup):
+    client = app.test_client()
+
+    def send():
+        method, path, body, headers = build_request(fixtures, route)
+        start = time.perf_counter()
+        response = client.open(path, method=method, json=body, headers=headers)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        return response.status_code, elapsed, response.headers.get("Server-Timing")
+
+    for _ in range(warmup):
+        send()
+    latencies, query_counts, errors = [], [], 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        status, elapsed, timing = send()
+        latencies.append(elapsed)
+        if timing:
+            query_counts.append(queries(timing))
+        errors += status >= 400
+    return summarize(time.perf_counter() - started, latencies, query_counts, errors)
+
+
+def run_server(port, fixtures, route, requests, warmup, clients):
+    remaining = itertools.count()
+    lock = threading.Lock()
+    latencies, query_counts, errors = [], [], [0]
+
+    def send(conn):
+        method, path, body, headers = build_request(fixtures, route)
+        start = time.perf_counter()
+        conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                     headers={"Content-Type": "application/json", **headers})
+        response = conn.getresponse()
+        response.read()
+        return response.status, (time.perf_counter() - start) * 1000.0, response.getheader("Server-Timing")
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        mine, counts, failed = [], [], 0
+        while next(remaining) < requests:
+            try:
+                status, elapsed, timing = send(conn)
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                continue
+            mine.append(elapsed)
+            if timing:
+                counts.append(queries(timing))
+            failed += status >= 400
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            query_counts.extend(counts)
+            errors[0] += failed
+
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    for _ in range(warmup):
+        send(conn)
+    conn.close()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(lambda _: client(), range(clients)))  # re-raises a client's exception
+    return summarize(time.perf_counter() - started, latencies, query_counts, errors[0])
+
+
+def compare(results, baseline, tolerance, floor_ms):
+    """Regressions of `results` against the baseline results, as messages."""
+    problems = []
+    for label, now in results.items():
+        before = baseline.get(label)
+        if before is None:
+            continue
+        if now["p95_ms"] > before["p95_ms"] * (1 + tolerance) and now["p95_ms"] - before["p95_ms"] > floor_ms:
+            problems.append(f"{label}: p95 {before['p95_ms']:.2f} -> {now['p95_ms']:.2f} ms")
+        if now["rps"] < before["rps"] / (1 + tolerance) and (
+            not now["rps"] or 1000.0 / now["rps"] - 1000.0 / before["rps"] > floor_ms
+        ):
+            problems.append(f"{label}: throughput {before['rps']:.1f} -> {now['rps']:.1f} req/s")
+        # statement counts are deterministic apart from cache hits, so only a real increase counts
+        if now["queries"] > before["queries"] * 1.1 + 0.5:
+            problems.append(f"{label}: queries per request {before['queries']:.1f} -> {now['queries']:.1f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=4000)
+    parser.add_argument("--appointments", type=int, default=None)
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per route and mode")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--modes", default="client,server", help="comma separated: client, server")
+    parser.add_argument("--only", default=None, help="comma separated endpoint names")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent connections in server mode")
+    parser.add_argument("--workers", type=int, default=None, help="server processes (default: server.py)")
+    parser.add_argument("--profile", default="gthread", choices=("gthread", "gevent"))
+    parser.add_argument("--baseline", default=os.path.join(BENCHMARKS, "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="record this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--floor-ms", type=float, default=1.0, help="ignore latency changes below this")
+    args = parser.parse_args()
+    modes = args.modes.split(",")
+
+    from app import seed_database
+
+    os.environ.setdefault("METRICS_TOKEN", secrets.token_urlsafe())  # /metrics refuses scrapes without one
+    app = make_app()  # also exports DATABASE_URL for the server processes
+    routes = registered_routes(app)
+    missing = [f"{method} {endpoint}" for endpoint, method in routes if (endpoint, method) not in ROUTES]
+    if missing:
+        print(f"No benchmark for: {', '.join(missing)} (add them to ROUTES)", file=sys.stderr)
+        sys.exit(2)
+    if args.only:
+        wanted = set(args.only.split(","))
+        routes = [r for r in routes if r[0] in wanted]
+
+    sizes = {name: getattr(args, name) for name in SIZE_OPTIONS}
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["sizes"] != sizes:
+            print(f"Baseline was recorded with {baseline['sizes']}, this run uses {sizes}", file=sys.stderr)
+            sys.exit(2)
+
+    seed_database(app)
+    with app.app_context():
+        synthetic.generate_synthetic(args.patients, appointments=args.appointments, log=lambda *a: None)
+        db.session.remove()
+    try:
+        # twice the rows when suspected regressions may be measured again
+        fixtures = Fixtures(app, (args.requests + args.warmup) * len(modes) * (2 if baseline else 1))
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+
+    results = {}
+    for mode in modes:
+        proc = None
+        if mode == "server":
+            port = free_port()
+            proc = start_server("serve", port, args)
+            measure = lambda route: run_server(port, fixtures, route, args.requests, args.warmup, args.clients)
+        else:
+            measure = lambda route: run_client(app, fixtures, route, args.requests, args.warmup)
+        try:
+            for route in routes:
+                label = f"{mode}: {route[1]} {route[0]}"
+                results[label] = measure(route)
+                # a stray slow tail (another process, a GC pause) is common: a regression has to show up twice
+                if baseline and compare({label: results[label]}, baseline["results"], args.tolerance, args.floor_ms):
+                    results[label] = measure(route)
+        finally:
+            if proc is not None:
+                stop_server(proc)
+
+    report(f"routes: {args.patients} patients, {args.requests} requests per route", results)
+
+    failed = [label for label, stats in results.items() if stats["errors"]]
+    if failed:
+        print(f"\nFailed requests: {', '.join(failed)}", file=sys.stderr)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"sizes": sizes, "results": results}, f, indent=2, sort_keys=True)
+        print(f"\nbaseline saved to {args.baseline}")
+    elif baseline:
+        regressions = compare(results, baseline["results"], args.tolerance, args.floor_ms)
+        for problem in regressions:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"\nno regressions against {args.baseline}")
+    if failed:
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,169 @@
 # admin.py
-from flask import jsonify
+from flask import jsonify, request
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from models.models import User
+from models.models import db
+from services import bulk, dashboard_stats, database, http_cache, jobs, listing, passwords, replicas, retention, schedules
+from .params import list_params, parse_date, parse_int
 from .permissions import admin_required
 
 class Dashboard(MethodView):
     decorators = [jwt_required()]
 
     @admin_required
+    @http_cache.cached("dashboard", last_modified=dashboard_stats.last_modified)
+    @replicas.read_only()
     def get(self):
-        data = {
-            "total_users": User.query.count(),
-            "active_users": User.query.filter_by(is_active=True).count(),
-            "inactive_users": User.query.filter_by(is_active=False).count(),
-        }
-        return jsonify(data), 200
+        # Served from the incrementally maintained counters table (see services/dashboard_stats.py)
+        return jsonify(dashboard_stats.get_stats()), 200
+
+
+class GenerateAvailability(MethodView):
+    decorators = [jwt_required()]
+
+    @admin_required
+    def post(self):
+        # {"start": "YYYY-MM-DD", "days": 7, "doctor_ids": [..]} - all doctors when doctor_ids is omitted
+        data = request.get_json(silent=True) or {}
+        doctor_ids = data.get("doctor_ids")
+        if doctor_ids is not None and not (
+            isinstance(doctor_ids, list) and all(isinstance(i, int) for i in doctor_ids)
+        ):
+            return jsonify({"error": "doctor_ids must be a list of integers"}), 400
+        try:
+            start = parse_date(data.get("start"))
+            days = parse_int(data.get("days"), default=schedules.DEFAULT_DAYS, minimum=1, maximum=31)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        result = schedules.generate_availability(start=start, days=days, doctor_ids=doctor_ids)
+        return jsonify(result), 200
+
+
+class PatientList(MethodView):
+    decorators = [jwt_required()]
+
+    @admin_required
+    @replicas.read_only()
+    def get(self):
+        # ?limit=&cursor=&fields=&user_id=&ids=1,2,3 (keyset paginated, see services/listing.py)
+        try:
+            page = listing.paginate(listing.PATIENTS, **list_params(request.args))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(page), 200
+
+
+class JobStats(MethodView):
+    decorators = [jwt_required()]
+
+    @admin_required
+    def get(self):
+        return jsonify(jobs.stats()), 200
+
+
+class PoolStats(MethodView):
+    decorators = [jwt_required()]
+
+    @admin_required
+    def get(self):
+        # Connections of this server process only
+        return jsonify(database.pool_stats()), 200
+
+
+def _bulk_items(data, key):
+    """The list under `key` of a bulk request body; raises ValueError if missing or too long."""
+    items = data.get(key)
+    if not isinstance(items, list) or not items:
+        raise ValueError(f"{key} must be a non-empty list")
+    if len(items) > bulk.max_items():
+        raise ValueError(f"At most {bulk.max_items()} {key} per request")
+    return items
+
+
+class BulkDoctorOnboarding(MethodView):
+    decorators = [jwt_required()]
+
+    @admin_required
+    def post(self):
+        # {"doctors": [{"username", "email", "password", "full_name", "specializations": [names or ids], ...}]}
+        data = request.get_json(silent=True) or {}
+        try:
+            items = _bulk_items(data, "doctors")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            result = bulk.onboard_doctors(items)
+        except passwords.HashingBusy:
+            # chunks committed before the pool filled up stay; a retry reports them as existing
+            db.session.rollback()
+            return jsonify({"error": "Server busy, please retry"}), 503, {"Retry-After": "1"}
+        return jsonify(result.as_dict()), 200
+
+
+class BulkBlacklist(MethodView):
+    decorators = [jwt_required()]
+
+    @admin_required
+    def post(self):
+        # {"user_ids": [..], "blacklisted": true}; false lifts the blacklist
+        data = request.get_json(silent=True) or {}
+        blacklisted = data.get("blacklisted", True)
+        if not isinstance(blacklisted, bool):
+            return jsonify({"error": "blacklisted must be a boolean"}), 400
+        try:
+            user_ids = _bulk_items(data, "user_ids")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        result = bulk.set_blacklisted(user_ids, blacklisted, acting_user_id=int(get_jwt_identity()))
+        return jsonify(result.as_dict()), 200
+
+
+class BulkAppointmentStatus(MethodView):
+    decorators = [jwt_required()]
+
+    @admin_required
+    def post(self):
+        # {"status": "cancelled", "note": "..", "appointment_ids": [..]}
+        # or, instead of ids, a doctor's booked appointments of one day: {"doctor_id": .., "date": "YYYY-MM-DD"}
+        data = request.get_json(silent=True) or {}
+        status = data.get("status")
+        if status not in bulk.STATUSES:
+            return jsonify({"error": f"status must be one of {', '.join(bulk.STATUSES)}"}), 400
+        note = data.get("note")
+        if note is not None and not isinstance(note, str):
+            return jsonify({"error": "note must be a string"}), 400
+        try:
+            if "appointment_ids" in data:
+                appointment_ids = _bulk_items(data, "appointment_ids")
+            else:
+                doctor_id = parse_int(data.get("doctor_id"))
+                day = parse_date(data.get("date"))
+                if doctor_id is None or day is None:
+                    raise ValueError("Give appointment_ids, or doctor_id and date")
+                appointment_ids = bulk.appointments_on(doctor_id, day)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        result = bulk.change_status(appointment_ids, status, note=note, changed_by_user_id=int(get_jwt_identity()))
+        return jsonify(result.as_dict()), 200
+
+
+class Retention(MethodView):
+    decorators = [jwt_required()]
+
+    @admin_required
+    def get(self):
+        # Dry run: rows, archive partitions and bytes each policy would reclaim (?policy=name, repeatable)
+        try:
+            return jsonify(retention.report(request.args.getlist("policy") or None)), 200
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    @admin_required
+    def post(self):
+        # {"policies": [..]} (all when omitted); runs on a worker, once per day and set of policies
+        data = request.get_json(silent=True) or {}
+        try:
+            job = retention.queue_run(data.get("policies"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"job_id": job.id, "status": job.status}), 202
@@ -0,0 +1,163 @@
+# backend/controllers/appointments.py
+from flask import Response, jsonify, request
+from flask.views import MethodView
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from models.models import db, Appointment, PatientProfile, DoctorProfile, Treatment
+from services import booking, listing, replicas, timeline
+from .doctor import current_doctor_id
+from .params import list_params
+from .permissions import roles_required
+
+
+def current_patient_id():
+    """PatientProfile.id of the patient making the request (None if missing)."""
+    return db.session.execute(
+        db.select(PatientProfile.id).filter_by(user_id=int(get_jwt_identity()))
+    ).scalar()
+
+
+def _own_rows_scope(patient_column, doctor_column):
+    """
+    Where clauses limiting a listing to the caller's own rows
+    (None when the caller has no matching profile).
+    """
+    role = get_jwt().get("role")
+    if role == "patient":
+        patient_id = current_patient_id()
+        return None if patient_id is None else [patient_column(patient_id)]
+    if role == "doctor":
+        doctor_id = current_doctor_id()
+        return None if doctor_id is None else [doctor_column(doctor_id)]
+    return []
+
+
+def _appointment_json(appt):
+    return {
+        "id": appt.id,
+        "patient_id": appt.patient_id,
+        "doctor_id": appt.doctor_id,
+        "availability_id": appt.availability_id,
+        "date": appt.date.isoformat(),
+        "time_slot": appt.time_slot,
+        "status": appt.status,
+        "reason": appt.reason,
+    }
+
+
+class BookAppointmentAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @roles_required(["patient", "admin"])
+    def post(self):
+        data = request.get_json() or {}
+        availability_id = data.get("availability_id")
+        if not isinstance(availability_id, int):
+            return jsonify({"error": "availability_id is required"}), 400
+
+        user_id = int(get_jwt_identity())
+        if get_jwt().get("role") == "patient":
+            patient_id = current_patient_id()
+            if patient_id is None:
+                return jsonify({"error": "Patient profile not found"}), 404
+        else:
+            patient_id = data.get("patient_id")
+            if not isinstance(patient_id, int):
+                return jsonify({"error": "patient_id is required"}), 400
+
+        try:
+            appt = booking.book_slot(
+                patient_id, availability_id, reason=data.get("reason"), changed_by_user_id=user_id
+            )
+        except booking.BookingError as e:
+            return jsonify({"error": str(e)}), e.status_code
+
+        return jsonify(_appointment_json(appt)), 201
+
+
+class CancelAppointmentAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @roles_required(["patient", "doctor", "admin"])
+    def post(self, appointment_id):
+        user_id = int(get_jwt_identity())
+        role = get_jwt().get("role")
+
+        appt = db.session.get(Appointment, appointment_id)
+        if appt is None:
+            return jsonify({"error": "Appointment not found"}), 404
+        if role == "patient":
+            owner = db.session.get(PatientProfile, appt.patient_id)
+            if owner is None or owner.user_id != user_id:
+                return jsonify({"error": "Unauthorized - not your appointment"}), 403
+        elif role == "doctor":
+            owner = db.session.get(DoctorProfile, appt.doctor_id)
+            if owner is None or owner.user_id != user_id:
+                return jsonify({"error": "Unauthorized - not your appointment"}), 403
+
+        data = request.get_json(silent=True) or {}
+        try:
+            appt = booking.cancel_appointment(appointment_id, changed_by_user_id=user_id, note=data.get("note"))
+        except booking.BookingError as e:
+            return jsonify({"error": str(e)}), e.status_code
+
+        return jsonify(_appointment_json(appt)), 200
+
+
+class AppointmentListAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @roles_required(["patient", "doctor", "admin"])
+    @replicas.read_only()
+    def get(self):
+        # Patients and doctors only ever see their own appointments
+        scope = _own_rows_scope(
+            lambda pid: Appointment.patient_id == pid, lambda did: Appointment.doctor_id == did
+        )
+        if scope is None:
+            return jsonify({"error": "Profile not found"}), 404
+        try:
+            page = listing.paginate(listing.APPOINTMENTS, scope=scope, **list_params(request.args))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(page), 200
+
+
+class TreatmentListAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @roles_required(["patient", "doctor", "admin"])
+    @replicas.read_only()
+    def get(self):
+        scope = _own_rows_scope(
+            listing.TREATMENTS.filters["patient_id"].condition, lambda did: Treatment.doctor_id == did
+        )
+        if scope is None:
+            return jsonify({"error": "Profile not found"}), 404
+        try:
+            page = listing.paginate(listing.TREATMENTS, scope=scope, **list_params(request.args))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(page), 200
+
+
+class PatientTimelineAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @roles_required(["patient", "doctor", "admin"])
+    @replicas.read_only()
+    def get(self, patient_id):
+        # Patients see their own history; doctors the history of patients they have an appointment with
+        role = get_jwt().get("role")
+        if role == "patient" and current_patient_id() != patient_id:
+            return jsonify({"error": "Unauthorized - own history only"}), 403
+        if role == "doctor":
+            doctor_id = current_doctor_id()
+            seen = doctor_id is not None and db.session.execute(
+                db.select(Appointment.id).filter_by(doctor_id=doctor_id, patient_id=patient_id).limit(1)
+            ).first()
+            if not seen:
+                return jsonify({"error": "Unauthorized - not a patient of this doctor"}), 403
+        body = timeline.get_timeline(patient_id)
+        if body is None:
+            return jsonify({"error": "Patient not found"}), 404
+        return Response(body, 200, mimetype="application/json")
@@ -8,6 +8,8 @@ from flask_jwt_extended import (
     get_jwt
 )
 from models.models import db, User, PatientProfile
+from services import http_cache, passwords, principals, revocation
+from .permissions import active_user_required
 
 
 class RegisterAPI(MethodView):
@@ -55,8 +57,17 @@ class LoginAPI(MethodView):
             return jsonify({"error": "Missing credentials"}), 400
 
         user = User.query.filter_by(username=username).first()
-        if not user or not user.check_password(password):
-            return jsonify({"error": "Invalid username or password"}), 401
+        try:
+            # verified on the bounded hashing pool so a login burst cannot oversubscribe the CPUs
+            if not user or not passwords.verify_pooled(user.password_hash, password):
+                return jsonify({"error": "Invalid username or password"}), 401
+
+            # transparently upgrade hashes made with older/weaker parameters
+            if passwords.needs_rehash(user.password_hash):
+                user.password_hash = passwords.hash_pooled(password)
+                db.session.commit()
+        except passwords.HashingBusy:
+            return jsonify({"error": "Server busy, please retry"}), 503, {"Retry-After": "1"}
 
         token = create_access_token(
             identity=str(user.id), 
@@ -90,21 +101,21 @@ class LogoutAPI(MethodView):
     decorators = [jwt_required()]
 
     def post(self):
-        # For JWT stateless tokens, just instruct client to discard token.
-        # If you use token revocation/blacklist, add logic here to blacklist the token.
-        return jsonify({"message": "Logout successful. Discard token client-side"}), 200
+        # The token stays revoked (blocklist loader) until it would have expired
+        revocation.revoke_token(get_jwt())
+        return jsonify({"message": "Logout successful"}), 200
 
 class ProfileAPI(MethodView):
     # require JWT for all profile actions
     decorators = [jwt_required()]
 
+    # the account check runs before the cache lookup, so a disabled user never gets a cached profile
+    @active_user_required
+    @http_cache.cached("profile", vary="user", last_modified=http_cache.profile_last_modified)
     def get(self):
-        user_id = get_jwt_identity()   # now just an int
+        user_id = int(get_jwt_identity())
         claims = get_jwt()             # extra fields stored in token
-
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
+        user = principals.get_principal(user_id)
 
         return jsonify({
             "id": user.id,
@@ -117,8 +128,15 @@ class ProfileAPI(MethodView):
         }), 200
 
     def put(self):
-        user_id = get_jwt_identity()   # now just an int
-        user = User.query.get(user_id)
+        user_id = int(get_jwt_identity())
+        principal = principals.get_principal(user_id)
+        if not principal:
+            return jsonify({"error": "User not found"}), 404
+        if not principals.is_allowed(principal):
+            return jsonify({"error": "Account is disabled"}), 403
+
+        # Loaded through the ORM so update hooks (cache invalidation etc.) run
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
 
@@ -0,0 +1,58 @@
+# backend/controllers/directory.py
+from flask import jsonify, request
+from flask.views import MethodView
+from flask_jwt_extended import jwt_required, get_jwt
+from models.models import Specialization
+from services import http_cache, listing, replicas, search
+from .params import list_params, parse_int
+
+
+class DoctorListAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @http_cache.cached("doctors", last_modified=http_cache.doctors_last_modified)
+    @replicas.read_only()
+    def get(self):
+        # ?limit=&cursor=&fields=&specialization_id= (keyset paginated, see services/listing.py)
+        try:
+            page = listing.paginate(listing.DOCTORS, **list_params(request.args))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(page), 200
+
+
+class SpecializationListAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @http_cache.cached("specializations", last_modified=http_cache.specializations_last_modified)
+    @replicas.read_only()
+    def get(self):
+        rows = Specialization.query.with_entities(
+            Specialization.id, Specialization.name, Specialization.description
+        ).order_by(Specialization.name)
+        return jsonify({"specializations": [
+            {"id": r.id, "name": r.name, "description": r.description} for r in rows
+        ]}), 200
+
+
+class SearchAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @replicas.read_only()
+    def get(self):
+        # ?q=<words, matched as prefixes>&role=doctor|patient&limit= ; only admins may search patients
+        args = request.args
+        role = args.get("role") or None
+        if role not in (None, "doctor", "patient"):
+            return jsonify({"error": "role must be 'doctor' or 'patient'"}), 400
+        if get_jwt().get("role") != "admin":
+            if role == "patient":
+                return jsonify({"error": "Unauthorized - admin only"}), 403
+            role = "doctor"
+        try:
+            limit = parse_int(args.get("limit"), default=10, minimum=1, maximum=50)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        results = search.search(args.get("q", ""), role=role, limit=limit)
+        return jsonify({"results": results, "count": len(results)}), 200
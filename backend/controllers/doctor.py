@@ -0,0 +1,80 @@
+# backend/controllers/doctor.py
+from flask import Response, jsonify, request
+from flask.views import MethodView
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.models import db, DoctorProfile, DoctorScheduleTemplate
+from services import agenda, schedules
+from .params import parse_date, parse_int
+from .permissions import doctor_required
+
+
+def current_doctor_id():
+    """DoctorProfile.id of the doctor making the request (None if missing)."""
+    return db.session.execute(
+        db.select(DoctorProfile.id).filter_by(user_id=int(get_jwt_identity()))
+    ).scalar()
+
+
+class ScheduleAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @doctor_required
+    def get(self):
+        doctor_id = current_doctor_id()
+        if doctor_id is None:
+            return jsonify({"error": "Doctor profile not found"}), 404
+        templates = DoctorScheduleTemplate.query.filter_by(doctor_id=doctor_id).order_by(
+            DoctorScheduleTemplate.weekday, DoctorScheduleTemplate.start_minute
+        )
+        return jsonify({"templates": [schedules.template_json(t) for t in templates]}), 200
+
+    @doctor_required
+    def put(self):
+        doctor_id = current_doctor_id()
+        if doctor_id is None:
+            return jsonify({"error": "Doctor profile not found"}), 404
+        data = request.get_json(silent=True)
+        entries = data.get("templates") if isinstance(data, dict) else None
+        if not isinstance(entries, list):
+            return jsonify({"error": "templates must be a list"}), 400
+        try:
+            templates = schedules.set_weekly_template(doctor_id, entries)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"templates": [schedules.template_json(t) for t in templates]}), 200
+
+
+class GenerateAvailabilityAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @doctor_required
+    def post(self):
+        doctor_id = current_doctor_id()
+        if doctor_id is None:
+            return jsonify({"error": "Doctor profile not found"}), 404
+        data = request.get_json(silent=True) or {}
+        try:
+            start = parse_date(data.get("start"))
+            days = parse_int(data.get("days"), default=schedules.DEFAULT_DAYS, minimum=1, maximum=31)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        result = schedules.generate_availability(start=start, days=days, doctor_ids=[doctor_id])
+        return jsonify(result), 200
+
+
+class AgendaAPI(MethodView):
+    decorators = [jwt_required()]
+
+    @doctor_required
+    def get(self):
+        doctor_id = current_doctor_id()
+        if doctor_id is None:
+            return jsonify({"error": "Doctor profile not found"}), 404
+        try:
+            start = parse_date(request.args.get("start"))
+            days = parse_int(request.args.get("days"), default=agenda.DEFAULT_DAYS, minimum=1, maximum=31)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        body = agenda.encode_response(doctor_id, agenda.get_days(doctor_id, start=start, days=days))
+        return Response(body, mimetype="application/json")
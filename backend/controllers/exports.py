@@ -0,0 +1,81 @@
+# backend/controllers/exports.py
+import os
+
+from flask import jsonify, request, send_file
+from flask.views import MethodView
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from models.models import db, ExportJob
+from services import exports
+from .appointments import current_patient_id
+from .doctor import current_doctor_id
+
+
+def _own_job(export_id):
+    """The ExportJob if the caller may see it (owner or admin), else None."""
+    job = db.session.get(ExportJob, export_id)
+    if job is None:
+        return None
+    if get_jwt().get("role") != "admin" and job.user_id != int(get_jwt_identity()):
+        return None
+    return job
+
+
+class ExportListAPI(MethodView):
+    decorators = [jwt_required()]
+
+    def get(self):
+        jobs = (
+            ExportJob.query.filter_by(user_id=int(get_jwt_identity()))
+            .order_by(ExportJob.id.desc())
+            .limit(50)
+        )
+        return jsonify({"exports": [exports.export_json(j) for j in jobs]}), 200
+
+    def post(self):
+        # {"type": "treatment_export"|"appointments_export", "format": "csv"|"ndjson"|"json",
+        #  "patient_id":, "doctor_id":, "from":, "to": } - patients/doctors only export their own rows
+        data = request.get_json(silent=True) or {}
+        filters = {k: data.get(k) for k in exports.FILTERS if k in data}
+        role = get_jwt().get("role")
+        if role == "patient":
+            filters["patient_id"] = current_patient_id()
+            if filters["patient_id"] is None:
+                return jsonify({"error": "Patient profile not found"}), 404
+        elif role == "doctor":
+            filters["doctor_id"] = current_doctor_id()
+            if filters["doctor_id"] is None:
+                return jsonify({"error": "Doctor profile not found"}), 404
+
+        try:
+            # produced by a background worker; poll GET /api/exports/<id> (or wait for the notification)
+            job = exports.queue_export(
+                int(get_jwt_identity()), data.get("type", "treatment_export"), data.get("format", "csv"), filters,
+                request_key=request.headers.get("Idempotency-Key"),
+            )
+        except exports.ExportError as e:
+            return jsonify({"error": str(e)}), e.status_code
+        return jsonify(exports.export_json(job)), 202
+
+
+class ExportAPI(MethodView):
+    decorators = [jwt_required()]
+
+    def get(self, export_id):
+        job = _own_job(export_id)
+        if job is None:
+            return jsonify({"error": "Export not found"}), 404
+        return jsonify(exports.export_json(job)), 200
+
+
+class ExportDownloadAPI(MethodView):
+    decorators = [jwt_required()]
+
+    def get(self, export_id):
+        job = _own_job(export_id)
+        if job is None:
+            return jsonify({"error": "Export not found"}), 404
+        if job.status != "completed" or not job.file_path or not os.path.exists(job.file_path):
+            return jsonify({"error": f"Export is {job.status}"}), 409
+        # served as stored: gzip bytes, named *.csv.gz / *.ndjson.gz / *.json.gz
+        return send_file(job.file_path, mimetype="application/gzip", as_attachment=True,
+                         download_name=os.path.basename(job.file_path))
@@ -0,0 +1,18 @@
+# backend/controllers/metrics.py
+import hmac
+
+from flask import Response, current_app, jsonify, request
+from flask.views import MethodView
+from services import metrics
+
+
+class MetricsAPI(MethodView):
+    # Scraped by Prometheus, so no JWT but "Authorization: Bearer <METRICS_TOKEN>"; refused while no token is set
+    def get(self):
+        token = current_app.config.get("METRICS_TOKEN")
+        if not token:
+            return jsonify({"error": "Metrics are disabled; set METRICS_TOKEN"}), 403
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return jsonify({"error": "Invalid metrics token"}), 401
+        body = metrics.render(metrics.collect())
+        return Response(body, 200, content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,38 @@
+# backend/controllers/notifications.py
+from flask import jsonify, request
+from flask.views import MethodView
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.models import Notification
+from services import notifications
+
+
+class NotificationListAPI(MethodView):
+    decorators = [jwt_required()]
+
+    def get(self):
+        items = (
+            Notification.query.filter_by(user_id=int(get_jwt_identity()))
+            .order_by(Notification.id.desc())
+            .limit(50)
+        )
+        return jsonify({"notifications": [notifications.notification_json(n) for n in items]}), 200
+
+
+class UnreadCountAPI(MethodView):
+    decorators = [jwt_required()]
+
+    def get(self):
+        return jsonify({"unread": notifications.unread_count(int(get_jwt_identity()))}), 200
+
+
+class MarkReadAPI(MethodView):
+    decorators = [jwt_required()]
+
+    def post(self):
+        # {"ids": [..]} marks those, {} marks everything read
+        data = request.get_json(silent=True) or {}
+        ids = data.get("ids")
+        if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+            return jsonify({"error": "ids must be a list of integers"}), 400
+        updated = notifications.mark_read(int(get_jwt_identity()), ids)
+        return jsonify({"updated": updated}), 200
@@ -0,0 +1,39 @@
+# backend/controllers/params.py
+from datetime import date
+
+
+def parse_date(value, default=None):
+    """Parse an ISO 'YYYY-MM-DD' query parameter; raises ValueError on bad input."""
+    if value in (None, ""):
+        return default
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid date {value!r}, expected YYYY-MM-DD")
+
+
+def parse_int(value, default=None, minimum=None, maximum=None):
+    """Parse an integer query parameter, clamped to [minimum, maximum]."""
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid integer {value!r}")
+    if minimum is not None:
+        number = max(minimum, number)
+    if maximum is not None:
+        number = min(maximum, number)
+    return number
+
+
+def list_params(args):
+    """Keyword arguments for services.listing.paginate() from query args."""
+    fields = args.get("fields")
+    return {
+        "limit": parse_int(args.get("limit"), 20, minimum=1, maximum=100),
+        "cursor": args.get("cursor") or None,
+        "sort": args.get("sort") or None,
+        "fields": [f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        "filters": {k: v for k, v in args.items() if k not in ("limit", "cursor", "sort", "fields")},
+    }
@@ -2,7 +2,7 @@
 from functools import wraps
 from flask import jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
-from models.models import User
+from services import principals
 
 def _get_role_and_id_from_token():
     """
@@ -50,22 +50,47 @@ def roles_required(roles):
         return decorated
     return wrapper
 
+def _active_principal():
+    """(principal, None) for the JWT's user, or (None, error response) if unknown or disabled."""
+    user_id, role_in_token = _get_role_and_id_from_token()
+    if user_id is None:
+        return None, (jsonify({"error": "Invalid token"}), 401)
+    user = principals.get_principal(user_id)
+    if not user:
+        return None, (jsonify({"error": "User not found"}), 404)
+    if not principals.is_allowed(user):
+        return None, (jsonify({"error": "Account is disabled"}), 403)
+    return user, None
+
+
 def current_user_required(fn):
-    """Inject current_user model into view from JWT identity."""
+    """
+    Inject current_user (a cached, read-only principals.Principal) into view
+    from JWT identity. Load the User model explicitly when it must be modified.
+    """
     @wraps(fn)
     def decorated(*args, **kwargs):
         verify_jwt_in_request()
-        user_id, role_in_token = _get_role_and_id_from_token()
-        if user_id is None:
-            return jsonify({"error": "Invalid token"}), 401
-
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-
+        user, error = _active_principal()
+        if error:
+            return error
         return fn(current_user=user, *args, **kwargs)
     return decorated
 
+def active_user_required(fn):
+    """
+    Refuse unknown, deactivated and blacklisted users before the view runs.
+    Put it above @http_cache.cached so a cached response is never served to them.
+    """
+    @wraps(fn)
+    def decorated(*args, **kwargs):
+        verify_jwt_in_request()
+        user, error = _active_principal()
+        if error:
+            return error
+        return fn(*args, **kwargs)
+    return decorated
+
 # Shortcuts
 def admin_required(fn):
     return role_required("admin")(fn)
@@ -0,0 +1,31 @@
+# backend/controllers/slots.py
+from flask import jsonify, request
+from flask.views import MethodView
+from flask_jwt_extended import jwt_required
+from services import slots
+from .params import parse_date, parse_int
+
+
+class SlotSearchAPI(MethodView):
+    decorators = [jwt_required()]
+
+    def get(self):
+        args = request.args
+        try:
+            date_from = parse_date(args.get("from"))
+            date_to = parse_date(args.get("to"))
+            limit = parse_int(args.get("limit"), default=10, minimum=1, maximum=100)
+            doctor_id = parse_int(args.get("doctor_id"))
+            specialization_id = parse_int(args.get("specialization_id"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        results = slots.search_free_slots(
+            specialization=args.get("specialization"),
+            specialization_id=specialization_id,
+            doctor_id=doctor_id,
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit,
+        )
+        return jsonify({"slots": results, "count": len(results)}), 200
@@ -1,7 +1,10 @@
 from flask import Blueprint
-from controllers import auth , admin
+from controllers import auth , admin, slots, appointments, doctor, directory, exports, metrics, notifications
+from services import metrics as request_metrics
 
 main_routes = Blueprint("main_routes", __name__)
+# Latency / SQL counters per endpoint, N+1 warnings, slow-request profiles (services/metrics.py)
+request_metrics.instrument(main_routes)
 
 # ==== AUTH ====
 # Register
@@ -38,7 +41,197 @@ main_routes.add_url_rule(
     view_func=admin.Dashboard.as_view("admin_dashboard"),
     methods=["GET"])
 
+# Patients, keyset paginated: ?limit=&cursor=&fields=&user_id=&ids=
+main_routes.add_url_rule(
+    "/api/admin/patients",
+    view_func=admin.PatientList.as_view("admin_patients"),
+    methods=["GET"],
+)
+
+# Background job counts by status
+main_routes.add_url_rule(
+    "/api/admin/jobs",
+    view_func=admin.JobStats.as_view("admin_jobs"),
+    methods=["GET"],
+)
+
+# Database connection pool checkouts / waits (this process)
+main_routes.add_url_rule(
+    "/api/admin/db/pool",
+    view_func=admin.PoolStats.as_view("admin_db_pool"),
+    methods=["GET"],
+)
+
+# Expand every doctor's weekly template into availability
+main_routes.add_url_rule(
+    "/api/admin/availability/generate",
+    view_func=admin.GenerateAvailability.as_view("admin_generate_availability"),
+    methods=["POST"],
+)
+
+# Retention: GET is a dry-run report, POST queues a run
+main_routes.add_url_rule(
+    "/api/admin/retention",
+    view_func=admin.Retention.as_view("admin_retention"),
+    methods=["GET", "POST"],
+)
+
+# Bulk operations, per-item results: {"doctors": [..]}, {"user_ids": [..], "blacklisted": true},
+# {"status": .., "appointment_ids": [..]} or {"status": .., "doctor_id": .., "date": ..}
+main_routes.add_url_rule(
+    "/api/admin/doctors/bulk",
+    view_func=admin.BulkDoctorOnboarding.as_view("admin_bulk_doctors"),
+    methods=["POST"],
+)
+
+main_routes.add_url_rule(
+    "/api/admin/users/blacklist",
+    view_func=admin.BulkBlacklist.as_view("admin_bulk_blacklist"),
+    methods=["POST"],
+)
+
+main_routes.add_url_rule(
+    "/api/admin/appointments/status",
+    view_func=admin.BulkAppointmentStatus.as_view("admin_bulk_appointment_status"),
+    methods=["POST"],
+)
+
+# ==== SLOTS ====
+# Free slot search: ?specialization=&specialization_id=&doctor_id=&from=&to=&limit=
+main_routes.add_url_rule(
+    "/api/slots/search",
+    view_func=slots.SlotSearchAPI.as_view("slot_search"),
+    methods=["GET"],
+)
+
+# ==== APPOINTMENTS ====
+# Book a slot: {"availability_id": .., "reason": .., "patient_id": (admin only)}
+main_routes.add_url_rule(
+    "/api/appointments",
+    view_func=appointments.BookAppointmentAPI.as_view("appointment_book"),
+    methods=["POST"],
+)
+
+# List (own rows for patients/doctors): ?limit=&cursor=&sort=date|-date&fields=&status=&from=&to=&doctor_id=&patient_id=
+main_routes.add_url_rule(
+    "/api/appointments",
+    view_func=appointments.AppointmentListAPI.as_view("appointment_list"),
+    methods=["GET"],
+)
+
+main_routes.add_url_rule(
+    "/api/appointments/<int:appointment_id>/cancel",
+    view_func=appointments.CancelAppointmentAPI.as_view("appointment_cancel"),
+    methods=["POST"],
+)
+
+# Treatments (own rows for patients/doctors): ?limit=&cursor=&sort=&fields=&doctor_id=&patient_id=&appointment_id=
+main_routes.add_url_rule(
+    "/api/treatments",
+    view_func=appointments.TreatmentListAPI.as_view("treatment_list"),
+    methods=["GET"],
+)
+
+# One patient's appointments with treatments, doctors and status changes, newest first
+main_routes.add_url_rule(
+    "/api/patients/<int:patient_id>/timeline",
+    view_func=appointments.PatientTimelineAPI.as_view("patient_timeline"),
+    methods=["GET"],
+)
+
+# ==== DIRECTORY ====
+# Doctors: ?limit=&cursor=&fields=&specialization_id=
+main_routes.add_url_rule(
+    "/api/doctors",
+    view_func=directory.DoctorListAPI.as_view("doctor_list"),
+    methods=["GET"],
+)
+
+# All specializations by name
+main_routes.add_url_rule(
+    "/api/specializations",
+    view_func=directory.SpecializationListAPI.as_view("specialization_list"),
+    methods=["GET"],
+)
+
+# Typeahead search over doctors (and patients, admin only): ?q=&role=&limit=
+main_routes.add_url_rule(
+    "/api/search",
+    view_func=directory.SearchAPI.as_view("search"),
+    methods=["GET"],
+)
+
+# ==== EXPORTS ====
+# Create: {"type": "treatment_export"|"appointments_export", "format": "csv"|"ndjson", filters..}; list own jobs
+main_routes.add_url_rule(
+    "/api/exports",
+    view_func=exports.ExportListAPI.as_view("export_list"),
+    methods=["GET", "POST"],
+)
+
+main_routes.add_url_rule(
+    "/api/exports/<int:export_id>",
+    view_func=exports.ExportAPI.as_view("export_status"),
+    methods=["GET"],
+)
+
+main_routes.add_url_rule(
+    "/api/exports/<int:export_id>/download",
+    view_func=exports.ExportDownloadAPI.as_view("export_download"),
+    methods=["GET"],
+)
+
+# ==== NOTIFICATIONS ====
+# Latest 50 of the caller's notifications
+main_routes.add_url_rule(
+    "/api/notifications",
+    view_func=notifications.NotificationListAPI.as_view("notification_list"),
+    methods=["GET"],
+)
+
+main_routes.add_url_rule(
+    "/api/notifications/unread-count",
+    view_func=notifications.UnreadCountAPI.as_view("notification_unread_count"),
+    methods=["GET"],
+)
+
+# {"ids": [..]} or {} for all
+main_routes.add_url_rule(
+    "/api/notifications/read",
+    view_func=notifications.MarkReadAPI.as_view("notification_mark_read"),
+    methods=["POST"],
+)
+
+# ==== METRICS ====
+# Prometheus text format (all workers when METRICS_DIR is set); METRICS_TOKEN required
+main_routes.add_url_rule(
+    "/metrics",
+    view_func=metrics.MetricsAPI.as_view("metrics"),
+    methods=["GET"],
+)
+
 # ==== DOCTOR ====
+# Weekly schedule template (same URL serves GET and PUT)
+main_routes.add_url_rule(
+    "/api/doctor/schedule",
+    view_func=doctor.ScheduleAPI.as_view("doctor_schedule"),
+    methods=["GET", "PUT"],
+)
+
+# Publish availability for the next N days from the template
+main_routes.add_url_rule(
+    "/api/doctor/availability/generate",
+    view_func=doctor.GenerateAvailabilityAPI.as_view("doctor_generate_availability"),
+    methods=["POST"],
+)
+
+# Day-by-day agenda: slots with their appointments and patients (?start=YYYY-MM-DD&days=N)
+main_routes.add_url_rule(
+    "/api/doctor/agenda",
+    view_func=doctor.AgendaAPI.as_view("doctor_agenda"),
+    methods=["GET"],
+)
+
 # main_routes.add_url_rule("/api/doctor/dashboard", view_func=doctor.dashboard, methods=["GET"])
 
 # ==== PATIENT ====
@@ -0,0 +1,5 @@
+# backend/gunicorn.conf.py
+# Read by `gunicorn "app:create_app()"` run from backend/; `python app.py serve` uses the same settings.
+from server import settings
+
+globals().update(settings())
@@ -1,8 +1,28 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import validates
 
-db = SQLAlchemy()
+from services import passwords, replicas
+
+# reads inside replicas.read_only() may be served by a replica bind
+db = SQLAlchemy(session_options={"class_": replicas.RoutingSession})
+
+
+SLOT_MINUTES = 30  # grid of bookable slots; the bitmaps of services/slots.py have one bit per step
+
+
+def parse_time_slot(time_slot: str):
+    """'09:00-09:30' -> (540, 570) minutes since midnight."""
+    try:
+        start, end = time_slot.split("-")
+        sh, sm = (int(p) for p in start.strip().split(":"))
+        eh, em = (int(p) for p in end.strip().split(":"))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid time slot {time_slot!r}, expected 'HH:MM-HH:MM'")
+    start_minute, end_minute = sh * 60 + sm, eh * 60 + em
+    if not 0 <= start_minute < end_minute <= 24 * 60:
+        raise ValueError(f"Invalid time slot {time_slot!r}")
+    return start_minute, end_minute
 
 
 class TimestampMixin:
@@ -13,6 +33,8 @@ class TimestampMixin:
 
 class User(db.Model, TimestampMixin):
     __tablename__ = "users"
+    # principals.py polls for recently updated users
+    __table_args__ = (db.Index("ix_users_updated_at", "updated_at"),)
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
@@ -29,10 +51,10 @@ class User(db.Model, TimestampMixin):
     export_jobs = db.relationship("ExportJob", back_populates="user")
 
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return passwords.verify_password(self.password_hash, password)
 
     def __repr__(self):
         return f"<User {self.username} role={self.role}>"
@@ -53,6 +75,7 @@ class DoctorProfile(db.Model, TimestampMixin):
     appointments = db.relationship("Appointment", back_populates="doctor", cascade="all,delete")
     monthly_reports = db.relationship("MonthlyReport", back_populates="doctor", cascade="all,delete")
     treatments = db.relationship("Treatment", back_populates="doctor", cascade="all,delete")
+    schedule_templates = db.relationship("DoctorScheduleTemplate", back_populates="doctor", cascade="all,delete")
 
     def __repr__(self):
         return f"<DoctorProfile user_id={self.user_id}>"
@@ -90,7 +113,10 @@ class Specialization(db.Model, TimestampMixin):
 
 class DoctorSpecialization(db.Model):
     __tablename__ = "doctor_specializations"
-    __table_args__ = (db.UniqueConstraint("doctor_id", "specialization_id", name="uq_doctor_specialization"),)
+    __table_args__ = (
+        db.UniqueConstraint("doctor_id", "specialization_id", name="uq_doctor_specialization"),
+        db.Index("ix_doctor_spec_specialization_doctor", "specialization_id", "doctor_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     doctor_id = db.Column(db.Integer, db.ForeignKey("doctor_profiles.id", ondelete="CASCADE"), nullable=False)
@@ -105,27 +131,106 @@ class DoctorSpecialization(db.Model):
 
 class DoctorAvailability(db.Model, TimestampMixin):
     __tablename__ = "doctor_availability"
-    __table_args__ = (db.UniqueConstraint("doctor_id", "date", "time_slot", name="uq_doc_date_slot"),)
+    __table_args__ = (
+        db.UniqueConstraint("doctor_id", "date", "time_slot", name="uq_doc_date_slot"),
+        db.Index("ix_availability_doctor_date_start", "doctor_id", "date", "start_minute"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     doctor_id = db.Column(db.Integer, db.ForeignKey("doctor_profiles.id", ondelete="CASCADE"), nullable=False, index=True)
     date = db.Column(db.Date, nullable=False, index=True)
     time_slot = db.Column(db.String(50), nullable=False)  # e.g. '09:00-09:30'
+    start_minute = db.Column(db.Integer, nullable=False)  # parsed from time_slot, minutes since midnight
+    end_minute = db.Column(db.Integer, nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    is_booked = db.Column(db.Boolean, default=False, nullable=False)
+    version = db.Column(db.Integer, default=0, nullable=False)  # bumped by every claim/release (optimistic lock)
 
     doctor = db.relationship("DoctorProfile", back_populates="availability")
     appointment = db.relationship("Appointment", back_populates="availability", uselist=False)
 
+    @validates("time_slot")
+    def _parse_slot(self, key, value):
+        start, end = parse_time_slot(value)
+        if start % SLOT_MINUTES or end % SLOT_MINUTES:
+            raise ValueError(f"Time slot {value!r} must start and end on the hour or half hour")
+        self.start_minute, self.end_minute = start, end
+        return value
+
     def __repr__(self):
         return f"<DoctorAvailability doc={self.doctor_id} date={self.date} slot={self.time_slot}>"
 
 
+class DoctorScheduleTemplate(db.Model, TimestampMixin):
+    """Recurring weekly working hours, expanded into DoctorAvailability rows."""
+    __tablename__ = "doctor_schedule_templates"
+    __table_args__ = (db.UniqueConstraint("doctor_id", "weekday", "time_range", name="uq_template_doctor_day_range"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey("doctor_profiles.id", ondelete="CASCADE"), nullable=False, index=True)
+    weekday = db.Column(db.Integer, nullable=False)  # 0=Monday .. 6=Sunday
+    time_range = db.Column(db.String(50), nullable=False)  # e.g. '09:00-13:00'
+    start_minute = db.Column(db.Integer, nullable=False)
+    end_minute = db.Column(db.Integer, nullable=False)
+    slot_minutes = db.Column(db.Integer, nullable=False, default=30)
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+
+    doctor = db.relationship("DoctorProfile", back_populates="schedule_templates")
+
+    @validates("time_range")
+    def _parse_range(self, key, value):
+        self.start_minute, self.end_minute = parse_time_slot(value)
+        return value
+
+    def __repr__(self):
+        return f"<DoctorScheduleTemplate doc={self.doctor_id} weekday={self.weekday} {self.time_range}>"
+
+
+class DoctorDaySlots(db.Model):
+    """Per doctor/day bitmaps of offered and booked slots (bit n = minutes [n*30, n*30+30))."""
+    __tablename__ = "doctor_day_slots"
+    __table_args__ = (db.Index("ix_day_slots_date_doctor", "date", "doctor_id"),)
+
+    doctor_id = db.Column(db.Integer, db.ForeignKey("doctor_profiles.id", ondelete="CASCADE"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    available_mask = db.Column(db.BigInteger, nullable=False, default=0)
+    booked_mask = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DoctorDaySlots doc={self.doctor_id} date={self.date} free={self.available_mask & ~self.booked_mask:#x}>"
+
+
+class DoctorAgenda(db.Model):
+    """Materialized day agenda of a doctor: the day's slots as a JSON array sorted by start minute."""
+    __tablename__ = "doctor_agendas"
+
+    doctor_id = db.Column(db.Integer, db.ForeignKey("doctor_profiles.id", ondelete="CASCADE"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    slots = db.Column(db.Text, nullable=False, default="[]")  # see services/agenda.py for the entry layout
+    built_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<DoctorAgenda doc={self.doctor_id} date={self.date}>"
+
+
 class Appointment(db.Model, TimestampMixin):
     __tablename__ = "appointments"
-    __table_args__ = (db.UniqueConstraint("doctor_id", "date", "time_slot", name="uq_appointment_doc_date_slot"),)
+    __table_args__ = (
+        # Cancelled appointments must not keep their slot, so uniqueness only covers live ones.
+        db.Index(
+            "uq_appointment_doc_date_slot", "doctor_id", "date", "time_slot",
+            unique=True,
+            sqlite_where=db.text("status != 'cancelled'"),
+            postgresql_where=db.text("status != 'cancelled'"),
+        ),
+        db.Index("ix_appointment_doctor_date_status", "doctor_id", "date", "status"),
+        # keyset pagination on (date, id), globally and per patient
+        db.Index("ix_appointment_date_id", "date", "id"),
+        db.Index("ix_appointment_patient_date_id", "patient_id", "date", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    patient_id = db.Column(db.Integer, db.ForeignKey("patient_profiles.id", ondelete="CASCADE"), nullable=False, index=True)
+    patient_id = db.Column(db.Integer, db.ForeignKey("patient_profiles.id", ondelete="CASCADE"), nullable=False)
     doctor_id = db.Column(db.Integer, db.ForeignKey("doctor_profiles.id", ondelete="CASCADE"), nullable=False, index=True)
     availability_id = db.Column(db.Integer, db.ForeignKey("doctor_availability.id", ondelete="SET NULL"), nullable=True)
     date = db.Column(db.Date, nullable=False)
@@ -163,10 +268,15 @@ class AppointmentStatusHistory(db.Model):
 
 class Treatment(db.Model, TimestampMixin):
     __tablename__ = "treatments"
+    __table_args__ = (
+        # keyset pagination on (created_at, id), globally and per doctor
+        db.Index("ix_treatment_created_id", "created_at", "id"),
+        db.Index("ix_treatment_doctor_created_id", "doctor_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     appointment_id = db.Column(db.Integer, db.ForeignKey("appointments.id", ondelete="CASCADE"), nullable=False, index=True)
-    doctor_id = db.Column(db.Integer, db.ForeignKey("doctor_profiles.id"), nullable=False, index=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey("doctor_profiles.id"), nullable=False)
     diagnosis = db.Column(db.Text, nullable=True)
     prescription = db.Column(db.Text, nullable=True)
     notes = db.Column(db.Text, nullable=True)
@@ -185,8 +295,11 @@ class ExportJob(db.Model, TimestampMixin):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     job_type = db.Column(db.String(50), nullable=False)  # 'treatment_export', 'appointments_export', etc.
-    status = db.Column(db.String(30), nullable=False, default="pending")
+    status = db.Column(db.String(30), nullable=False, default="pending")  # 'pending' | 'running' | 'completed' | 'failed'
+    params = db.Column(db.Text, nullable=True)  # JSON: format and filters, e.g. {"format": "csv", "patient_id": 3}
     file_path = db.Column(db.Text, nullable=True)
+    row_count = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
     completed_at = db.Column(db.DateTime, nullable=True)
 
     user = db.relationship("User", back_populates="export_jobs")
@@ -211,16 +324,97 @@ class MonthlyReport(db.Model, TimestampMixin):
         return f"<MonthlyReport doctor={self.doctor_id} {self.month}/{self.year}>"
 
 
+class DoctorDailyStats(db.Model):
+    """Per doctor/day appointment and treatment totals; MonthlyReport is built from these."""
+    __tablename__ = "doctor_daily_stats"
+
+    doctor_id = db.Column(db.Integer, db.ForeignKey("doctor_profiles.id", ondelete="CASCADE"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)  # appointment date (treatment date for follow-ups)
+    bookings = db.Column(db.Integer, nullable=False, default=0)  # appointments on this day, any status
+    completions = db.Column(db.Integer, nullable=False, default=0)
+    cancellations = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.BigInteger, nullable=False, default=0)  # consultation_fee of completed appointments
+    followups = db.Column(db.Integer, nullable=False, default=0)  # treatments that set a followup_date
+
+    def __repr__(self):
+        return f"<DoctorDailyStats doc={self.doctor_id} date={self.date} bookings={self.bookings}>"
+
+
 class Notification(db.Model, TimestampMixin):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # unread counts only ever look at unread rows
+        db.Index(
+            "ix_notifications_unread", "user_id", "is_read",
+            sqlite_where=db.text("is_read = 0"),
+            postgresql_where=db.text("is_read = false"),
+        ),
+        # the delivery queue: rows not delivered yet, oldest first
+        db.Index(
+            "ix_notifications_undelivered", "id",
+            sqlite_where=db.text("delivered_at IS NULL"),
+            postgresql_where=db.text("delivered_at IS NULL"),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
     type = db.Column(db.String(50), nullable=False)  # 'reminder','export_ready','report_sent', etc.
     payload = db.Column(db.Text, nullable=True)  # JSON text message or payload
     is_read = db.Column(db.Boolean, default=False, nullable=False)
+    dedupe_key = db.Column(db.String(120), nullable=True, unique=True)  # e.g. 'reminder:<appointment id>:<date>'
+    delivered_at = db.Column(db.DateTime, nullable=True)  # sent through the transport
+    delivery_attempts = db.Column(db.Integer, nullable=False, default=0)
+    delivery_error = db.Column(db.Text, nullable=True)
 
     user = db.relationship("User")
 
     def __repr__(self):
         return f"<Notification id={self.id} user={self.user_id} type={self.type}>"
+
+
+class DashboardCounter(db.Model):
+    __tablename__ = "dashboard_counters"
+
+    # scope: 'users' | 'appointments' | 'appointments_on' | 'meta'
+    scope = db.Column(db.String(30), primary_key=True)
+    key = db.Column(db.String(60), primary_key=True)  # e.g. 'doctor:active', 'booked', '2025-01-31'
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DashboardCounter {self.scope}/{self.key}={self.value}>"
+
+
+class RevokedToken(db.Model):
+    __tablename__ = "revoked_tokens"
+
+    jti = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # purge after the token would have expired
+
+    def __repr__(self):
+        return f"<RevokedToken {self.jti} user={self.user_id}>"
+
+
+class Job(db.Model, TimestampMixin):
+    __tablename__ = "jobs"
+    __table_args__ = (db.Index("ix_jobs_queue", "status", "priority", "run_after"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)  # registered task name, e.g. 'exports.run'
+    payload = db.Column(db.Text, nullable=True)  # JSON arguments
+    priority = db.Column(db.Integer, nullable=False, default=0)  # higher runs first
+    status = db.Column(db.String(20), nullable=False, default="queued")  # 'queued' | 'running' | 'succeeded' | 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    idempotency_key = db.Column(db.String(200), nullable=True, unique=True)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)  # JSON return value
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Job id={self.id} {self.name} status={self.status} attempts={self.attempts}>"
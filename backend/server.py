@@ -0,0 +1,132 @@
+# backend/server.py
+"""
+Production server settings (gunicorn).
+
+`python app.py serve` runs the app under gunicorn with these settings;
+`gunicorn "app:create_app()"` picks up the same ones from gunicorn.conf.py.
+Every value can be overridden from the environment:
+
+* HMS_SERVER_PROFILE: "gthread" (default) - WEB_CONCURRENCY processes
+  (2 x cores + 1) with HMS_THREADS threads each (4; requests mostly wait on
+  the database), or "gevent" - one process per core, each serving up to
+  HMS_WORKER_CONNECTIONS greenlets (needs the `gevent` package, and
+  `psycogreen` on PostgreSQL);
+* HMS_BIND (0.0.0.0:$PORT), HMS_KEEPALIVE, HMS_TIMEOUT,
+  HMS_GRACEFUL_TIMEOUT, HMS_MAX_REQUESTS, HMS_ACCESS_LOG.
+
+The app is created once in the master (preload_app) and forked, so workers
+share its memory pages; database connections are opened lazily and any the
+master happened to open are discarded in each child after fork. SIGHUP
+restarts workers gracefully (in-flight requests get HMS_GRACEFUL_TIMEOUT
+seconds); new code needs SIGUSR2 followed by SIGQUIT to the old master.
+When a worker exits, its metrics snapshot is folded into the retired
+totals (services/metrics.py). Before the workers start, the master builds
+the dashboard counters if they are missing or outdated.
+"""
+import multiprocessing
+import os
+
+
+PROFILES = ("gthread", "gevent")
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def settings(profile=None, **overrides):
+    """Gunicorn settings for `profile`, with keyword overrides (e.g. workers=4)."""
+    profile = profile or os.getenv("HMS_SERVER_PROFILE", "gthread")
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown server profile {profile!r}; allowed: {', '.join(PROFILES)}")
+    cores = multiprocessing.cpu_count()
+    options = {
+        "bind": os.getenv("HMS_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}"),
+        "preload_app": True,
+        "keepalive": _env_int("HMS_KEEPALIVE", 5),  # seconds; keep above the load balancer's idle timeout
+        "timeout": _env_int("HMS_TIMEOUT", 30),
+        "graceful_timeout": _env_int("HMS_GRACEFUL_TIMEOUT", 30),
+        # recycle workers now and then so slow leaks cannot accumulate; jitter avoids restarting all at once
+        "max_requests": _env_int("HMS_MAX_REQUESTS", 5000),
+        "max_requests_jitter": _env_int("HMS_MAX_REQUESTS_JITTER", 500),
+        "accesslog": os.getenv("HMS_ACCESS_LOG") or None,
+        "post_fork": post_fork,
+        "child_exit": child_exit,
+        "when_ready": when_ready,
+    }
+    if profile == "gevent":
+        options.update(
+            worker_class="gevent",
+            workers=_env_int("WEB_CONCURRENCY", cores),
+            worker_connections=_env_int("HMS_WORKER_CONNECTIONS", 1000),
+        )
+    else:
+        options.update(
+            worker_class="gthread",
+            workers=_env_int("WEB_CONCURRENCY", 2 * cores + 1),
+            threads=_env_int("HMS_THREADS", 4),
+        )
+    options.update({k: v for k, v in overrides.items() if v is not None})
+    return options
+
+
+# --- hooks ----------------------------------------------------------------------
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master; each worker opens its own."""
+    from models.models import db
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    """Fold an exited worker's metrics snapshot (METRICS_DIR) into the retired totals."""
+    directory = os.getenv("METRICS_DIR")
+    if directory:
+        from services import metrics
+
+        metrics.retire_exited(directory, pid=worker.pid)
+
+
+def when_ready(server):
+    """Build missing or outdated dashboard counters once, in the master, before any request reads them."""
+    from sqlalchemy.exc import SQLAlchemyError
+    from services import dashboard_stats
+
+    with server.app.wsgi().app_context():
+        try:
+            if dashboard_stats.ensure_counters():
+                server.log.info("Rebuilt dashboard counters")
+        except SQLAlchemyError as e:
+            server.log.warning("Dashboard counters not checked (run init-db?): %s", e)
+    server.log.info("HMS ready: %s workers (%s)", server.cfg.workers, server.cfg.worker_class_str)
+
+
+# --- runner -----------------------------------------------------------------------
+
+
+def serve(app, profile=None, **overrides):
+    """Run `app` under gunicorn until the master is stopped."""
+    from gunicorn.app.base import BaseApplication
+
+    options = settings(profile, **overrides)
+    if options["worker_class"] == "gevent":
+        try:
+            import gevent  # noqa: F401
+        except ImportError:
+            raise RuntimeError("HMS_SERVER_PROFILE=gevent requires the 'gevent' package")
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Application().run()
@@ -0,0 +1,330 @@
+# backend/services/agenda.py
+"""
+Per doctor/day agendas.
+
+A doctor's agenda for a day is the list of the day's slots sorted by start
+minute, each one either free (an active DoctorAvailability row) or taken by
+a live appointment and carrying the appointment and patient references. It
+is kept in three places, tried in order by `get_days()`:
+
+1. memory: the encoded JSON of each (doctor_id, date) in a per-process LRU
+   (AGENDA_CACHE_SIZE entries, AGENDA_CACHE_TTL seconds);
+2. `doctor_agendas`: one row per doctor/day holding the slots as a compact
+   JSON array of ENTRY_FIELDS tuples, read with a primary key range scan;
+3. the base tables: availability plus appointments joined to the patients'
+   names, for days that were never materialized.
+
+Whenever a flush touches availability, appointments or a patient's name,
+the affected doctor-days are rebuilt in `doctor_agendas` in the same
+transaction (like the slot bitmaps of services/slots.py) and dropped from
+this process's memory immediately and again on commit; Core statements call
+`refresh_days()` themselves. Other server processes pick the change up when
+their memory entries expire.
+
+Loads are serialized per doctor (striped locks), so when every doctor opens
+the agenda at the start of the day, repeated requests for one doctor wait
+for the first load instead of all running it.
+"""
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, select, union
+
+from models.models import (
+    db,
+    parse_time_slot,
+    Appointment,
+    DoctorAgenda,
+    DoctorAvailability,
+    PatientProfile,
+    User,
+)
+from services import metrics, serializers
+from services.cache import ALL_KEYS, TTLCache, invalidate_on_commit
+from services.db_utils import attr_changed, dialect_insert, previous_value, track_attributes
+from services.slots import INACTIVE_STATUSES
+
+ENTRY_FIELDS = (
+    "start_minute", "end_minute", "time_slot", "availability_id",
+    "appointment_id", "status", "patient_id", "patient_name", "reason",
+)
+DEFAULT_DAYS = 1
+REBUILD_DAYS = 14
+_CHUNK = 500
+_LOCKS = [threading.Lock() for _ in range(64)]
+
+_cache = TTLCache(
+    maxsize=int(os.getenv("AGENDA_CACHE_SIZE", "20000")),
+    ttl=float(os.getenv("AGENDA_CACHE_TTL", "30")),
+)
+
+track_attributes(DoctorAvailability, "doctor_id", "date")
+track_attributes(Appointment, "doctor_id", "date")
+
+metrics.HELP["hms_agenda_days_total"] = ("counter", "Agenda days served by source (memory, stored, built).")
+
+
+class _Invalidator:
+    """Drops memory entries; loads that overlap an invalidation do not store their result."""
+
+    def __init__(self):
+        self.generation = 0
+
+    def invalidate(self, key=ALL_KEYS):
+        self.generation += 1
+        _cache.invalidate(key)
+
+
+_invalidator = _Invalidator()
+
+
+# --- building -------------------------------------------------------------------
+
+
+def _build(conn, days):
+    """{(doctor_id, date): [entry, ...]} for the given pairs, entries sorted by start minute."""
+    agendas = {day: {} for day in days}
+    keys = sorted(days)
+    av = DoctorAvailability
+    for i in range(0, len(keys), _CHUNK):
+        chunk = keys[i:i + _CHUNK]
+        doctors, dates = {d for d, _ in chunk}, {day for _, day in chunk}
+        offered = conn.execute(
+            select(av.id, av.doctor_id, av.date, av.time_slot, av.start_minute, av.end_minute).where(
+                av.doctor_id.in_(doctors), av.date.in_(dates), av.is_active.is_(True)
+            )
+        )
+        for row in offered:
+            entries = agendas.get((row.doctor_id, row.date))
+            if entries is not None:
+                entries[row.time_slot] = [row.start_minute, row.end_minute, row.time_slot, row.id] + [None] * 5
+        booked = conn.execute(
+            select(
+                Appointment.id, Appointment.doctor_id, Appointment.date, Appointment.time_slot,
+                Appointment.status, Appointment.availability_id, Appointment.patient_id,
+                User.full_name, Appointment.reason,
+            )
+            .join(PatientProfile, PatientProfile.id == Appointment.patient_id)
+            .join(User, User.id == PatientProfile.user_id)
+            .where(
+                Appointment.doctor_id.in_(doctors),
+                Appointment.date.in_(dates),
+                Appointment.status.notin_(INACTIVE_STATUSES),
+            )
+        )
+        for row in booked:
+            entries = agendas.get((row.doctor_id, row.date))
+            if entries is None:
+                continue
+            entry = entries.get(row.time_slot)
+            if entry is None:  # booked outside the published availability
+                start, end = parse_time_slot(row.time_slot)
+                entry = entries[row.time_slot] = [start, end, row.time_slot, row.availability_id, None]
+            entry[4:] = [row.id, row.status, row.patient_id, row.full_name, row.reason]
+    # time slots are unique within a day, so the sort never compares past them
+    return {day: sorted(entries.values()) for day, entries in agendas.items()}
+
+
+def _write(conn, agendas):
+    table = DoctorAgenda.__table__
+    now = datetime.utcnow()
+    rows = [
+        {"doctor_id": doctor_id, "date": day, "slots": serializers.dumps(entries).decode("utf-8"), "built_at": now}
+        for (doctor_id, day), entries in agendas.items()
+    ]
+    for i in range(0, len(rows), _CHUNK):
+        stmt = dialect_insert(conn, table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["doctor_id", "date"],
+            set_={"slots": stmt.excluded.slots, "built_at": stmt.excluded.built_at},
+        )
+        conn.execute(stmt, rows[i:i + _CHUNK])
+
+
+def refresh_days(conn, days):
+    """Rebuild the stored agendas of the given (doctor_id, date) pairs and drop them from memory."""
+    days = {d for d in days if d[0] is not None and d[1] is not None}
+    if not days:
+        return
+    _write(conn, _build(conn, days))
+    for key in days:
+        _invalidator.invalidate(key)
+        invalidate_on_commit(db.session, _invalidator, key)
+
+
+def forget_days(conn, days):
+    """Drop the stored and in-memory agendas of (doctor_id, date) pairs; they are rebuilt when read."""
+    keys = sorted(d for d in days if d[0] is not None and d[1] is not None)
+    for i in range(0, len(keys), _CHUNK):
+        chunk = keys[i:i + _CHUNK]
+        # may also drop other pairs of these doctors and dates, which only costs a rebuild
+        conn.execute(DoctorAgenda.__table__.delete().where(
+            DoctorAgenda.doctor_id.in_({d for d, _ in chunk}),
+            DoctorAgenda.date.in_({day for _, day in chunk}),
+        ))
+    for key in keys:
+        _invalidator.invalidate(key)
+        invalidate_on_commit(db.session, _invalidator, key)
+
+
+def rebuild_all(start=None, days=REBUILD_DAYS):
+    """
+    Replace every stored agenda with those of [start, start + days) (init-db,
+    bulk loaders); other days are built from the base tables when asked for.
+    """
+    start = start or date.today()
+    end = start + timedelta(days=days)
+    conn = db.session.connection()
+    keys = conn.execute(union(
+        select(DoctorAvailability.doctor_id, DoctorAvailability.date).where(
+            DoctorAvailability.date >= start, DoctorAvailability.date < end, DoctorAvailability.is_active.is_(True)
+        ),
+        select(Appointment.doctor_id, Appointment.date).where(
+            Appointment.date >= start, Appointment.date < end, Appointment.status.notin_(INACTIVE_STATUSES)
+        ),
+    )).all()
+    conn.execute(DoctorAgenda.__table__.delete())
+    keys = [tuple(k) for k in keys]
+    for i in range(0, len(keys), _CHUNK):
+        _write(conn, _build(conn, set(keys[i:i + _CHUNK])))
+    db.session.commit()
+    _invalidator.invalidate()
+    return len(keys)
+
+
+# --- reading --------------------------------------------------------------------
+
+
+def _slot(entry):
+    start, end, time_slot, availability_id, appointment_id, status, patient_id, patient_name, reason = entry
+    return {
+        "time_slot": time_slot,
+        "start_minute": start,
+        "end_minute": end,
+        "availability_id": availability_id,
+        "appointment": None if appointment_id is None else {
+            "id": appointment_id,
+            "status": status,
+            "patient_id": patient_id,
+            "patient_name": patient_name,
+            "reason": reason,
+        },
+    }
+
+
+def _encode(day, entries):
+    return serializers.dumps({
+        "date": day,
+        "booked": sum(1 for e in entries if e[4] is not None),
+        "slots": [_slot(e) for e in entries],
+    })
+
+
+def _count(source, n):
+    if n:
+        metrics.registry.inc("hms_agenda_days_total", (("source", source),), n)
+
+
+def _load(doctor_id, dates):
+    """Encoded agendas of `dates` from `doctor_agendas`, falling back to the base tables."""
+    generation = _invalidator.generation
+    conn = db.session.connection()
+    stored = conn.execute(
+        select(DoctorAgenda.date, DoctorAgenda.slots).where(
+            DoctorAgenda.doctor_id == doctor_id, DoctorAgenda.date.in_(dates)
+        )
+    )
+    entries = {day: serializers.loads(slots) for day, slots in stored}
+    missing = [day for day in dates if day not in entries]
+    if missing:
+        built = _build(conn, {(doctor_id, day) for day in missing})
+        entries.update((day, agenda) for (_, day), agenda in built.items())
+    _count("stored", len(dates) - len(missing))
+    _count("built", len(missing))
+
+    bodies = {day: _encode(day, entries[day]) for day in dates}
+    if _invalidator.generation == generation:  # nothing was written meanwhile
+        for day, body in bodies.items():
+            _cache.set((doctor_id, day), body)
+    return bodies
+
+
+def get_days(doctor_id, start=None, days=DEFAULT_DAYS):
+    """Encoded day agendas (a list of JSON bytes) of `doctor_id` for [start, start + days)."""
+    start = start or date.today()
+    dates = [start + timedelta(days=i) for i in range(days)]
+    bodies = {day: _cache.get((doctor_id, day)) for day in dates}
+    missing = [day for day, body in bodies.items() if body is None]
+    _count("memory", len(dates) - len(missing))
+    if missing:
+        with _LOCKS[doctor_id % len(_LOCKS)]:
+            # a request for the same doctor may have loaded them while we waited
+            for day in missing:
+                bodies[day] = _cache.get((doctor_id, day))
+            missing = [day for day in missing if bodies[day] is None]
+            if missing:
+                bodies.update(_load(doctor_id, missing))
+    return [bodies[day] for day in dates]
+
+
+def encode_response(doctor_id, bodies):
+    return b'{"doctor_id":%d,"days":[%s]}' % (doctor_id, b",".join(bodies))
+
+
+def load_day(doctor_id, day):
+    """The agenda of one day straight from the base tables, as a dict (no caching)."""
+    entries = _build(db.session.connection(), {(doctor_id, day)})[(doctor_id, day)]
+    return serializers.loads(_encode(day, entries))
+
+
+def invalidate(key=ALL_KEYS):
+    """Drop the memory entry of a (doctor_id, date) pair, or all of them."""
+    _invalidator.invalidate(key)
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+# --- incremental maintenance ----------------------------------------------------------
+
+
+_WATCHED = {
+    DoctorAvailability: ("doctor_id", "date", "time_slot", "is_active"),
+    Appointment: ("doctor_id", "date", "time_slot", "status", "patient_id", "availability_id", "reason"),
+}
+
+
+def _touched_days(session):
+    days, renamed = set(), set()
+    # session.new / .dirty build a fresh IdentitySet on every access
+    new, dirty = session.new, session.dirty
+    for obj in list(new) + list(dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            if obj in dirty and obj.role == "patient" and attr_changed(obj, "full_name"):
+                renamed.add(obj.id)
+            continue
+        watched = _WATCHED.get(type(obj))
+        if watched is None:
+            continue
+        if obj in dirty and not any(attr_changed(obj, a) for a in watched):
+            continue
+        days.add((obj.doctor_id, obj.date))
+        if obj not in new:
+            days.add((previous_value(obj, "doctor_id"), previous_value(obj, "date")))
+    if renamed:
+        days.update(tuple(row) for row in session.connection().execute(
+            select(Appointment.doctor_id, Appointment.date)
+            .join(PatientProfile, PatientProfile.id == Appointment.patient_id)
+            .where(PatientProfile.user_id.in_(renamed), Appointment.status.notin_(INACTIVE_STATUSES))
+            .distinct()
+        ))
+    return days
+
+
+@event.listens_for(db.session, "after_flush")
+def _refresh_touched_days(session, flush_context):
+    days = _touched_days(session)
+    if days:
+        refresh_days(session.connection(), days)
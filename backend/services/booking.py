@@ -0,0 +1,215 @@
+# backend/services/booking.py
+"""
+Contention-safe booking.
+
+A slot is claimed with a conditional UPDATE on `doctor_availability`
+(`... WHERE id = :id AND version = :seen AND NOT is_booked`), so losers of a
+race find out from the row count instead of attempting an Appointment
+insert and tripping `uq_appointment_doc_date_slot`. On PostgreSQL the slot
+row is first locked with SELECT ... FOR UPDATE SKIP LOCKED so contenders do
+not queue behind each other. The Appointment and its AppointmentStatusHistory
+row are written in the same transaction; transient failures (lost version
+race, unique violations, lock timeouts and deadlocks) are retried with
+bounded, jittered exponential backoff. Other database errors, such as a
+foreign key violation, are raised at once.
+"""
+import random
+import threading
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from models.models import db, Appointment, AppointmentStatusHistory, DoctorAvailability, PatientProfile
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 0.005  # seconds
+BACKOFF_CAP = 0.2
+
+# PostgreSQL SQLSTATEs worth another attempt: unique violation, serialization
+# failure, deadlock, lock not available
+RETRY_SQLSTATES = ("23505", "40001", "40P01", "55P03")
+# the same conditions as reported by SQLite
+RETRY_MESSAGES = ("unique constraint failed", "database is locked", "database table is locked")
+
+
+class BookingError(Exception):
+    status_code = 409
+
+
+class SlotNotFound(BookingError):
+    status_code = 404
+
+
+class SlotUnavailable(BookingError):
+    """The slot is inactive or already booked; retrying will not help."""
+
+
+class AppointmentNotFound(BookingError):
+    status_code = 404
+
+
+class PatientNotFound(BookingError):
+    status_code = 404
+
+
+class InvalidTransition(BookingError):
+    pass
+
+
+class BookingContention(BookingError):
+    """Retries were exhausted without a definitive answer."""
+    status_code = 503
+
+
+class _LostRace(Exception):
+    pass
+
+
+_stats_lock = threading.Lock()
+_stats = {"booked": 0, "cancelled": 0, "unavailable": 0, "retries": 0, "exhausted": 0}
+
+
+def _count(name, n=1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _backoff(attempt):
+    delay = min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt))
+    time.sleep(random.uniform(0, delay))
+
+
+def _transient(exc):
+    """Whether a database error may go away on retry (a concurrent writer won, or held a lock)."""
+    orig = getattr(exc, "orig", None)
+    code = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if code is not None:
+        return code in RETRY_SQLSTATES
+    message = str(orig or exc).lower()
+    return any(m in message for m in RETRY_MESSAGES)
+
+
+def _with_retries(fn, max_attempts):
+    for attempt in range(max_attempts):
+        try:
+            return fn()
+        except (_LostRace, IntegrityError, OperationalError) as e:
+            db.session.rollback()
+            if not isinstance(e, _LostRace) and not _transient(e):
+                raise
+            if attempt + 1 < max_attempts:
+                _count("retries")
+                _backoff(attempt)
+        except BookingError:
+            db.session.rollback()
+            raise
+    _count("exhausted")
+    raise BookingContention("Slot is under heavy contention, please retry")
+
+
+def _read_slot(availability_id):
+    stmt = select(
+        DoctorAvailability.id,
+        DoctorAvailability.doctor_id,
+        DoctorAvailability.date,
+        DoctorAvailability.time_slot,
+        DoctorAvailability.is_active,
+        DoctorAvailability.is_booked,
+        DoctorAvailability.version,
+    ).where(DoctorAvailability.id == availability_id)
+    if db.session.get_bind().dialect.name == "postgresql":
+        row = db.session.execute(stmt.with_for_update(skip_locked=True)).first()
+        if row is None and db.session.get(DoctorAvailability, availability_id) is not None:
+            raise _LostRace()  # locked by a concurrent booker
+        return row
+    return db.session.execute(stmt).first()
+
+
+def _claim(slot):
+    result = db.session.execute(
+        update(DoctorAvailability)
+        .where(
+            DoctorAvailability.id == slot.id,
+            DoctorAvailability.version == slot.version,
+            DoctorAvailability.is_booked.is_(False),
+        )
+        .values(is_booked=True, version=DoctorAvailability.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise _LostRace()
+
+
+def book_slot(patient_id, availability_id, reason=None, changed_by_user_id=None, max_attempts=MAX_ATTEMPTS):
+    """Book `availability_id` for `patient_id`; returns the new Appointment."""
+    if db.session.scalar(select(PatientProfile.id).where(PatientProfile.id == patient_id)) is None:
+        raise PatientNotFound("Patient not found")
+
+    def attempt():
+        slot = _read_slot(availability_id)
+        if slot is None:
+            raise SlotNotFound("Slot not found")
+        if not slot.is_active or slot.is_booked:
+            _count("unavailable")
+            raise SlotUnavailable("Slot is no longer available")
+        _claim(slot)
+
+        appointment = Appointment(
+            patient_id=patient_id,
+            doctor_id=slot.doctor_id,
+            availability_id=slot.id,
+            date=slot.date,
+            time_slot=slot.time_slot,
+            status="booked",
+            reason=reason,
+        )
+        appointment.status_history.append(
+            AppointmentStatusHistory(old_status=None, new_status="booked", changed_by_user_id=changed_by_user_id)
+        )
+        db.session.add(appointment)
+        db.session.commit()
+        _count("booked")
+        return appointment
+
+    return _with_retries(attempt, max_attempts)
+
+
+def cancel_appointment(appointment_id, changed_by_user_id=None, note=None, max_attempts=MAX_ATTEMPTS):
+    """Cancel an appointment and release its availability slot in one transaction."""
+
+    def attempt():
+        appointment = db.session.get(Appointment, appointment_id)
+        if appointment is None:
+            raise AppointmentNotFound("Appointment not found")
+        if appointment.status != "booked":
+            raise InvalidTransition(f"Cannot cancel an appointment that is {appointment.status}")
+
+        old_status = appointment.status
+        appointment.status = "cancelled"
+        db.session.add(
+            AppointmentStatusHistory(
+                appointment_id=appointment.id,
+                old_status=old_status,
+                new_status="cancelled",
+                changed_by_user_id=changed_by_user_id,
+                note=note,
+            )
+        )
+        if appointment.availability_id is not None:
+            db.session.execute(
+                update(DoctorAvailability)
+                .where(DoctorAvailability.id == appointment.availability_id)
+                .values(is_booked=False, version=DoctorAvailability.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+        _count("cancelled")
+        return appointment
+
+    return _with_retries(attempt, max_attempts)
@@ -0,0 +1,326 @@
+# backend/services/bulk.py
+"""
+Batch admin operations: doctor onboarding, blacklisting and appointment
+status changes for thousands of items per call.
+
+Items are processed in chunks of BULK_CHUNK_SIZE. A chunk is validated with
+one query for the rows it refers to, its changes are staged on the session
+and written by a single flush and commit, so the after_flush hooks (slot
+bitmaps, agendas, counters, rollups, search index, caches) see the whole
+chunk at once instead of one entity per transaction, and the unit of work
+batches UPDATEs of the same columns into one executemany. New users and
+profiles need their ids back, which SQLite can only return one INSERT at a
+time (PostgreSQL batches them); status history rows need none and are one
+executemany INSERT per chunk, as is releasing the slots of cancelled
+appointments.
+
+Every item gets a result, in input order:
+
+    {"index": 0, "ok": true, "id": 17}
+    {"index": 1, "ok": false, "error": "Appointment not found"}
+
+Validation failures only fail their item. If the commit of a chunk fails
+(e.g. a concurrent request took a username), the chunk is redone with one
+savepoint per item, so only the offending items fail.
+"""
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from models.models import (
+    db,
+    Appointment,
+    AppointmentStatusHistory,
+    DoctorAvailability,
+    DoctorProfile,
+    DoctorSpecialization,
+    Specialization,
+    User,
+)
+from services import passwords
+
+CHUNK_SIZE = 500
+MAX_ITEMS = 10000
+
+# appointment status changes an admin may apply in bulk
+TRANSITIONS = {
+    "booked": ("completed", "cancelled"),
+}
+STATUSES = ("booked", "completed", "cancelled")
+
+
+class BulkResult:
+    def __init__(self, total):
+        self.results = [None] * total
+
+    def ok(self, index, **fields):
+        self.results[index] = {"index": index, "ok": True, **fields}
+
+    def error(self, index, message, **fields):
+        self.results[index] = {"index": index, "ok": False, **fields, "error": message}
+
+    def as_dict(self):
+        succeeded = sum(1 for r in self.results if r["ok"])
+        return {
+            "total": len(self.results),
+            "succeeded": succeeded,
+            "failed": len(self.results) - succeeded,
+            "results": self.results,
+        }
+
+
+def chunk_size():
+    return current_app.config.get("BULK_CHUNK_SIZE", CHUNK_SIZE)
+
+
+def max_items():
+    return current_app.config.get("BULK_MAX_ITEMS", MAX_ITEMS)
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _db_error(exc):
+    return "Conflicts with a concurrent change" if isinstance(exc, IntegrityError) else "Database busy, please retry"
+
+
+def _run(items, stage, describe):
+    """
+    Apply `stage` to `items` chunk by chunk; returns the BulkResult.
+
+    stage(pairs, result) validates [(index, item)], records failures in
+    `result`, stages the changes of the valid items on the session and
+    returns {index: staged object}. describe(obj) gives the result fields of
+    a staged object once it has been flushed.
+    """
+    result = BulkResult(len(items))
+    pairs = list(enumerate(items))
+    size = chunk_size()
+    for start in range(0, len(pairs), size):
+        chunk = pairs[start:start + size]
+        try:
+            staged = stage(chunk, result)
+            db.session.flush()
+            done = {index: describe(obj) for index, obj in staged.items()}
+            db.session.commit()
+        except (IntegrityError, OperationalError):
+            db.session.rollback()
+            done = _run_one_by_one(chunk, stage, describe, result)
+        for index, fields in done.items():
+            result.ok(index, **fields)
+    return result
+
+
+def _run_one_by_one(chunk, stage, describe, result):
+    done = {}
+    for pair in chunk:
+        try:
+            with db.session.begin_nested():
+                staged = stage([pair], result)
+                db.session.flush()
+                done.update((index, describe(obj)) for index, obj in staged.items())
+        except (IntegrityError, OperationalError) as e:
+            result.error(pair[0], _db_error(e))
+    db.session.commit()
+    return done
+
+
+# --- doctor onboarding ------------------------------------------------------------------
+
+
+DOCTOR_FIELDS = ("username", "email", "password", "full_name", "phone", "bio", "qualification",
+                 "consultation_fee", "specializations")
+
+
+def _doctor_problem(item):
+    if not isinstance(item, dict):
+        return "Each doctor must be an object"
+    unknown = [k for k in item if k not in DOCTOR_FIELDS]
+    if unknown:
+        return f"Unknown fields {', '.join(unknown)}"
+    for key in ("username", "email", "password"):
+        if not isinstance(item.get(key), str) or not item[key].strip():
+            return f"{key} is required"
+    fee = item.get("consultation_fee")
+    if fee is not None and (not _is_id(fee) or fee < 0):
+        return "consultation_fee must be a non-negative integer"
+    specs = item.get("specializations", [])
+    if not isinstance(specs, list) or not all(_is_id(s) or isinstance(s, str) for s in specs):
+        return "specializations must be a list of names or ids"
+    return None
+
+
+def onboard_doctors(items):
+    """Create a doctor user and profile (with specializations) per item."""
+    specializations = db.session.execute(select(Specialization.id, Specialization.name)).all()
+    by_name = {name.lower(): sid for sid, name in specializations}
+    ids = {sid for sid, _ in specializations}
+    first_index = {}  # username / email -> index of the item that claimed it in this request
+
+    def stage(chunk, result):
+        valid = []
+        for index, item in chunk:
+            problem = _doctor_problem(item)
+            if problem is None:
+                spec_ids = []
+                for spec in item.get("specializations", []):
+                    sid = spec if isinstance(spec, int) else by_name.get(spec.strip().lower())
+                    if sid not in ids:
+                        problem = f"Unknown specialization {spec!r}"
+                        break
+                    if sid not in spec_ids:
+                        spec_ids.append(sid)
+            if problem is not None:
+                result.error(index, problem)
+            else:
+                valid.append((index, item, spec_ids))
+        if not valid:
+            return {}
+
+        usernames = {item["username"] for _, item, _ in valid}
+        emails = {item["email"] for _, item, _ in valid}
+        taken = db.session.execute(
+            select(User.username, User.email).where(or_(User.username.in_(usernames), User.email.in_(emails)))
+        ).all()
+        taken_usernames = {u for u, _ in taken}
+        taken_emails = {e for _, e in taken}
+
+        accepted = []
+        for index, item, spec_ids in valid:
+            username, email = item["username"], item["email"]
+            if username in taken_usernames or first_index.get(("username", username), index) != index:
+                result.error(index, "Username already exists", username=username)
+            elif email in taken_emails or first_index.get(("email", email), index) != index:
+                result.error(index, "Email already exists", username=username)
+            else:
+                first_index[("username", username)] = first_index[("email", email)] = index
+                accepted.append((index, item, spec_ids))
+
+        hashes = passwords.hash_many(item["password"] for _, item, _ in accepted)
+        staged = {}
+        for (index, item, spec_ids), password_hash in zip(accepted, hashes):
+            user = User(
+                username=item["username"],
+                email=item["email"],
+                password_hash=password_hash,
+                role="doctor",
+                full_name=item.get("full_name"),
+                phone=item.get("phone"),
+                is_active=True,
+            )
+            profile = DoctorProfile(
+                user=user,
+                bio=item.get("bio"),
+                qualification=item.get("qualification"),
+                consultation_fee=item.get("consultation_fee"),
+                specializations=[DoctorSpecialization(specialization_id=sid) for sid in spec_ids],
+            )
+            db.session.add(profile)
+            staged[index] = profile
+        return staged
+
+    def describe(profile):
+        return {"username": profile.user.username, "user_id": profile.user_id, "doctor_id": profile.id}
+
+    return _run(items, stage, describe)
+
+
+# --- blacklisting ------------------------------------------------------------------------
+
+
+def set_blacklisted(user_ids, blacklisted=True, acting_user_id=None):
+    """Blacklist (or clear) each user; admins and the acting user are refused."""
+
+    def stage(chunk, result):
+        ids = {user_id for _, user_id in chunk if _is_id(user_id)}
+        users = {u.id: u for u in db.session.scalars(select(User).where(User.id.in_(ids)))} if ids else {}
+        staged = {}
+        for index, user_id in chunk:
+            user = users.get(user_id) if _is_id(user_id) else None
+            if not _is_id(user_id):
+                result.error(index, "user id must be an integer", id=user_id)
+            elif user is None:
+                result.error(index, "User not found", id=user_id)
+            elif user.role == "admin" or user.id == acting_user_id:
+                result.error(index, "Admins cannot be blacklisted", id=user_id)
+            else:
+                user.blacklisted = blacklisted
+                staged[index] = user
+        return staged
+
+    def describe(user):
+        return {"id": user.id, "blacklisted": user.blacklisted}
+
+    return _run(user_ids, stage, describe)
+
+
+# --- appointment status ------------------------------------------------------------------
+
+
+def appointments_on(doctor_id, day, status="booked"):
+    """Ids of a doctor's appointments on `day` with `status` (e.g. everything to cancel for a sick day)."""
+    return list(db.session.scalars(
+        select(Appointment.id).where(
+            Appointment.doctor_id == doctor_id, Appointment.date == day, Appointment.status == status
+        ).order_by(Appointment.time_slot)
+    ))
+
+
+def change_status(appointment_ids, status, note=None, changed_by_user_id=None):
+    """
+    Move each appointment to `status`, writing its status history row;
+    cancelling releases the appointment's slot. Appointments already in
+    `status` are reported as unchanged.
+    """
+    if status not in STATUSES:
+        raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+
+    def stage(chunk, result):
+        ids = {appointment_id for _, appointment_id in chunk if _is_id(appointment_id)}
+        appointments = (
+            {a.id: a for a in db.session.scalars(select(Appointment).where(Appointment.id.in_(ids)))} if ids else {}
+        )
+        staged, history, release = {}, [], []
+        now = datetime.utcnow()
+        for index, appointment_id in chunk:
+            appointment = appointments.get(appointment_id) if _is_id(appointment_id) else None
+            if not _is_id(appointment_id):
+                result.error(index, "appointment id must be an integer", id=appointment_id)
+            elif appointment is None:
+                result.error(index, "Appointment not found", id=appointment_id)
+            elif appointment.status == status:
+                result.ok(index, id=appointment_id, status=status, changed=False)
+            elif status not in TRANSITIONS.get(appointment.status, ()):
+                result.error(index, f"Cannot change a {appointment.status} appointment to {status}", id=appointment_id)
+            else:
+                history.append({
+                    "appointment_id": appointment.id,
+                    "old_status": appointment.status,
+                    "new_status": status,
+                    "changed_by_user_id": changed_by_user_id,
+                    "note": note,
+                    "changed_at": now,
+                })
+                appointment.status = status
+                if status == "cancelled" and appointment.availability_id is not None:
+                    release.append(appointment.availability_id)
+                staged[index] = appointment
+        if history:
+            # no primary keys needed back, so this is one executemany
+            db.session.execute(insert(AppointmentStatusHistory), history)
+        if release:
+            db.session.execute(
+                update(DoctorAvailability)
+                .where(DoctorAvailability.id.in_(release))
+                .values(is_booked=False, version=DoctorAvailability.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+        return staged
+
+    def describe(appointment):
+        return {"id": appointment.id, "status": appointment.status, "changed": True}
+
+    return _run(appointment_ids, stage, describe)
@@ -0,0 +1,91 @@
+# backend/services/cache.py
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from models.models import db
+
+_MISSING = object()
+ALL_KEYS = object()
+_instances = weakref.WeakSet()
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _instances.add(self)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                expires_at, value = item
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key=ALL_KEYS):
+        with self._lock:
+            if key is ALL_KEYS:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+def invalidate_all():
+    """Empty every TTLCache of this process (e.g. between tests on fresh databases)."""
+    for cache in list(_instances):
+        cache.invalidate()
+
+
+def invalidate_on_commit(session, cache, key=ALL_KEYS):
+    """Drop `key` from `cache` once the current transaction of `session` ends."""
+    session.info.setdefault("pending_invalidations", set()).add((cache, key))
+
+
+def _flush_invalidations(session, *args):
+    pending = session.info.pop("pending_invalidations", None)
+    for cache, key in pending or ():
+        cache.invalidate(key)
+
+
+# A rolled back transaction may still have been observed by a concurrent
+# loader, so invalidate on both outcomes.
+event.listen(db.session, "after_commit", _flush_invalidations)
+event.listen(db.session, "after_soft_rollback", _flush_invalidations)
@@ -0,0 +1,233 @@
+# backend/services/dashboard_stats.py
+"""
+Admin dashboard counters.
+
+Counts live in the small `dashboard_counters` table and are kept current by
+an `after_flush` hook that turns every User / Appointment insert, update and
+delete into aggregated deltas (one upsert per touched counter per flush).
+Reads are a primary-key lookup of a handful of rows behind a TTL cache, so
+their cost does not depend on the size of `users` or `appointments`.
+The per-day counts (todays_appointments) leave out cancelled appointments.
+
+Every change also moves the ("meta", "changed_at") row (epoch
+milliseconds), which `last_modified()` reads for the dashboard's
+Last-Modified, so revalidation sees writes made by any server process.
+
+Reads never rebuild: `init-db` does, and so does `ensure_counters()` at
+server start (server.py) when the table is missing its meta row or was
+built by an older version of the counters. Until then the dashboard shows
+what the table has and logs a warning.
+"""
+import logging
+import os
+import time
+from collections import Counter
+from datetime import date
+
+from sqlalchemy import String, case, cast, delete, event, func, literal, or_, select, union_all
+from sqlalchemy.exc import IntegrityError
+
+from models.models import db, User, Appointment, DashboardCounter
+from services.cache import TTLCache, invalidate_on_commit
+from services.slots import INACTIVE_STATUSES
+from services.db_utils import (
+    apply_increments,
+    attr_changed,
+    current_value,
+    dialect_insert,
+    previous_value,
+    track_attributes,
+)
+
+log = logging.getLogger(__name__)
+
+VERSION = 2  # bump when a counter's meaning changes, so ensure_counters() rebuilds: 2 = per-day counts skip cancelled
+
+_cache = TTLCache(maxsize=4, ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "5")))
+_CACHE_KEY = "dashboard"
+_TABLE = DashboardCounter.__table__
+
+track_attributes(User, "role", "is_active")
+track_attributes(Appointment, "status", "date")
+
+
+def _user_key(role, is_active):
+    return ("users", f"{role}:{'active' if is_active else 'inactive'}")
+
+
+def add_day_delta(deltas, day, status, delta):
+    """Count an appointment of `status` on `day` in the per-day counters, unless it is cancelled."""
+    if status not in INACTIVE_STATUSES:
+        deltas[("appointments_on", day.isoformat())] += delta
+
+
+def _grouped_counts_query():
+    """All dashboard counters computed from the base tables in one statement."""
+    users = select(
+        literal("users").label("scope"),
+        (User.role + literal(":") + case((User.is_active, "active"), else_="inactive")).label("key"),
+        func.count().label("value"),
+    ).group_by(User.role, User.is_active)
+    by_status = select(
+        literal("appointments").label("scope"),
+        Appointment.status.label("key"),
+        func.count().label("value"),
+    ).group_by(Appointment.status)
+    by_date = select(
+        literal("appointments_on").label("scope"),
+        cast(Appointment.date, String).label("key"),
+        func.count().label("value"),
+    ).where(Appointment.status.notin_(INACTIVE_STATUSES)).group_by(Appointment.date)
+    return union_all(users, by_status, by_date)
+
+
+def rebuild_counters():
+    """Recompute every counter from the base tables (used by init-db and bulk loaders)."""
+    rows = [dict(r._mapping) for r in db.session.execute(_grouped_counts_query())]
+    rows.append({"scope": "meta", "key": "initialized", "value": VERSION})
+    rows.append(_changed_now())
+    try:
+        db.session.execute(delete(_TABLE))
+        if rows:
+            db.session.execute(_TABLE.insert(), rows)
+        db.session.commit()
+    except IntegrityError:
+        # Another worker rebuilt concurrently; its result is just as good.
+        db.session.rollback()
+    _cache.invalidate()
+
+
+def ensure_counters():
+    """Rebuild the counters if they were never built or were built by an older VERSION; for startup."""
+    built = db.session.scalar(
+        select(_TABLE.c.value).where(_TABLE.c.scope == "meta", _TABLE.c.key == "initialized")
+    )
+    db.session.rollback()
+    if built != VERSION:
+        rebuild_counters()
+        return True
+    return False
+
+
+def _changed_now():
+    return {"scope": "meta", "key": "changed_at", "value": time.time_ns() // 1_000_000}
+
+
+def apply_deltas(conn, deltas):
+    """Add a {(scope, key): delta} mapping onto the counters table."""
+    rows = [
+        {"scope": scope, "key": key, "value": delta}
+        for (scope, key), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+    apply_increments(conn, _TABLE, ["scope", "key"], rows)
+    stmt = dialect_insert(conn, _TABLE)
+    conn.execute(stmt.on_conflict_do_update(index_elements=["scope", "key"], set_={"value": stmt.excluded.value}),
+                 _changed_now())
+
+
+def last_modified():
+    """When the counters last changed (epoch seconds), or None; the dashboard's Last-Modified."""
+    changed = db.session.scalar(
+        select(_TABLE.c.value).where(_TABLE.c.scope == "meta", _TABLE.c.key == "changed_at")
+    )
+    return changed / 1000 if changed is not None else None
+
+
+def _read_counters():
+    today = date.today().isoformat()
+    stmt = select(_TABLE.c.scope, _TABLE.c.key, _TABLE.c.value).where(
+        or_(
+            _TABLE.c.scope.in_(("users", "appointments", "meta")),
+            (_TABLE.c.scope == "appointments_on") & (_TABLE.c.key == today),
+        )
+    )
+    rows = db.session.execute(stmt).all()
+    if not any(r.scope == "meta" and r.key == "initialized" and r.value == VERSION for r in rows):
+        log.warning("dashboard counters are not built (version %s); run init-db or restart the server", VERSION)
+    return rows, today
+
+
+def _compute_stats():
+    rows, today = _read_counters()
+    users_by_role = {}
+    appointments_by_status = {}
+    todays = 0
+    for scope, key, value in rows:
+        if scope == "users":
+            role, _, state = key.rpartition(":")
+            users_by_role.setdefault(role, {"active": 0, "inactive": 0})[state] = value
+        elif scope == "appointments":
+            appointments_by_status[key] = value
+        elif scope == "appointments_on" and key == today:
+            todays = value
+
+    active = sum(r["active"] for r in users_by_role.values())
+    inactive = sum(r["inactive"] for r in users_by_role.values())
+
+    def role_total(role):
+        counts = users_by_role.get(role, {})
+        return counts.get("active", 0) + counts.get("inactive", 0)
+
+    return {
+        "total_users": active + inactive,
+        "active_users": active,
+        "inactive_users": inactive,
+        "total_admins": role_total("admin"),
+        "total_doctors": role_total("doctor"),
+        "total_patients": role_total("patient"),
+        "users_by_role": users_by_role,
+        "total_appointments": sum(appointments_by_status.values()),
+        "appointments_by_status": appointments_by_status,
+        "todays_appointments": todays,
+    }
+
+
+def get_stats():
+    """Dashboard counters, served from the TTL cache when fresh."""
+    return _cache.get_or_load(_CACHE_KEY, _compute_stats)
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def invalidate():
+    _cache.invalidate()
+
+
+@event.listens_for(db.session, "after_flush")
+def _track_changes(session, flush_context):
+    deltas = Counter()
+
+    for obj in session.new:
+        if isinstance(obj, User):
+            deltas[_user_key(obj.role, current_value(obj, "is_active", True))] += 1
+        elif isinstance(obj, Appointment):
+            deltas[("appointments", current_value(obj, "status", "booked"))] += 1
+            add_day_delta(deltas, obj.date, current_value(obj, "status", "booked"), 1)
+
+    for obj in session.dirty:
+        if isinstance(obj, User) and (attr_changed(obj, "role") or attr_changed(obj, "is_active")):
+            deltas[_user_key(previous_value(obj, "role"), previous_value(obj, "is_active", True))] -= 1
+            deltas[_user_key(obj.role, current_value(obj, "is_active", True))] += 1
+        elif isinstance(obj, Appointment):
+            if attr_changed(obj, "status"):
+                deltas[("appointments", previous_value(obj, "status", "booked"))] -= 1
+                deltas[("appointments", current_value(obj, "status", "booked"))] += 1
+            if attr_changed(obj, "status") or attr_changed(obj, "date"):
+                add_day_delta(deltas, previous_value(obj, "date"), previous_value(obj, "status", "booked"), -1)
+                add_day_delta(deltas, obj.date, current_value(obj, "status", "booked"), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            deltas[_user_key(previous_value(obj, "role"), previous_value(obj, "is_active", True))] -= 1
+        elif isinstance(obj, Appointment):
+            deltas[("appointments", previous_value(obj, "status", "booked"))] -= 1
+            add_day_delta(deltas, previous_value(obj, "date"), previous_value(obj, "status", "booked"), -1)
+
+    if any(deltas.values()):
+        apply_deltas(session.connection(), deltas)
+        invalidate_on_commit(session, _cache)
@@ -0,0 +1,229 @@
+# backend/services/database.py
+"""
+Engine configuration and connection pool metrics.
+
+`configure(app)` fills SQLALCHEMY_ENGINE_OPTIONS before `db.init_app()`:
+
+* PostgreSQL: a pool of DB_POOL_SIZE connections plus DB_MAX_OVERFLOW
+  temporary ones (size it to the threads of one server process), checked
+  with a ping before use (DB_POOL_PRE_PING) and replaced after
+  DB_POOL_RECYCLE seconds so idle connections dropped by the server or a
+  proxy never reach a request. Waiting longer than DB_POOL_TIMEOUT for a
+  connection raises.
+* SQLite files: the same pool, and every new connection gets WAL journaling
+  (readers no longer block the writer), synchronous=NORMAL (no fsync per
+  commit; WAL stays consistent after a crash), a busy timeout so a writer
+  waits for the lock instead of failing with "database is locked", a
+  memory-mapped read window and a larger page cache. All are configurable
+  through SQLITE_* settings.
+
+DB_REPLICA_URLS (comma separated) adds one `replica_<n>` bind per read
+replica, configured like the primary; services/replicas.py routes reads to
+them.
+
+Pools are `MeteredQueuePool`s, which count checkouts, new connections and
+the time spent waiting for a free connection; `pool_stats()` reports them
+per bind.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+from models.models import db
+from services import replicas
+
+DEFAULTS = {
+    "DB_POOL_SIZE": 10,
+    "DB_MAX_OVERFLOW": 20,
+    "DB_POOL_TIMEOUT": 30,
+    "DB_POOL_RECYCLE": 1800,
+    "DB_POOL_PRE_PING": True,
+    "SQLITE_JOURNAL_MODE": "WAL",
+    "SQLITE_SYNCHRONOUS": "NORMAL",
+    "SQLITE_BUSY_TIMEOUT_MS": 5000,
+    "SQLITE_MMAP_SIZE": 256 * 1024 * 1024,
+    "SQLITE_CACHE_SIZE": -64 * 1024,  # negative: KiB, i.e. 64 MiB per connection
+}
+WAIT_THRESHOLD = 0.001  # checkouts slower than this count as having waited
+
+
+def _config_value(config, name):
+    value = config.get(name, os.getenv(name))
+    if value is None:
+        return DEFAULTS[name]
+    default = DEFAULTS[name]
+    if isinstance(default, bool):
+        return value if isinstance(value, bool) else str(value).lower() in ("1", "true", "yes", "on")
+    return type(default)(value)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.connects = 0
+            self.waits = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.timeouts = 0
+
+    def record_checkout(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            if seconds >= WAIT_THRESHOLD:
+                self.waits += 1
+                self.wait_seconds += seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "waits": self.waits,
+                "wait_ms_total": self.wait_seconds * 1000.0,
+                "wait_ms_max": self.max_wait_seconds * 1000.0,
+                "timeouts": self.timeouts,
+            }
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.metrics = PoolMetrics()
+        self._connecting = threading.local()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics  # keep counting across engine.dispose()
+        return pool
+
+    def _do_get(self):
+        self._connecting.seconds = 0.0
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeout:
+            self.metrics.record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        # opening a new connection is not waiting for a free one
+        self.metrics.record_checkout(time.perf_counter() - start - self._connecting.seconds)
+        return conn
+
+    def _create_connection(self):
+        self.metrics.record_connect()
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            self._connecting.seconds = getattr(self._connecting, "seconds", 0.0) + time.perf_counter() - start
+
+
+def _is_sqlite_file(url):
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def engine_options(uri, config):
+    """SQLALCHEMY_ENGINE_OPTIONS for `uri` (in-memory SQLite keeps Flask-SQLAlchemy's StaticPool)."""
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite" and not _is_sqlite_file(url):
+        return {}
+    options = {
+        "poolclass": MeteredQueuePool,
+        "pool_size": _config_value(config, "DB_POOL_SIZE"),
+        "max_overflow": _config_value(config, "DB_MAX_OVERFLOW"),
+        "pool_timeout": _config_value(config, "DB_POOL_TIMEOUT"),
+    }
+    if url.get_backend_name() == "sqlite":
+        # Python's own lock wait; busy_timeout below covers the rest
+        options["connect_args"] = {"timeout": _config_value(config, "SQLITE_BUSY_TIMEOUT_MS") / 1000.0}
+    else:
+        options["pool_pre_ping"] = _config_value(config, "DB_POOL_PRE_PING")
+        options["pool_recycle"] = _config_value(config, "DB_POOL_RECYCLE")
+    return options
+
+
+def sqlite_pragmas(config):
+    return [
+        f"PRAGMA synchronous={_config_value(config, 'SQLITE_SYNCHRONOUS')}",
+        f"PRAGMA busy_timeout={_config_value(config, 'SQLITE_BUSY_TIMEOUT_MS')}",
+        f"PRAGMA mmap_size={_config_value(config, 'SQLITE_MMAP_SIZE')}",
+        f"PRAGMA cache_size={_config_value(config, 'SQLITE_CACHE_SIZE')}",
+    ]
+
+
+def install_pragmas(engine, config):
+    """Run the SQLite pragmas on every new DBAPI connection of `engine`."""
+    pragmas = sqlite_pragmas(config)
+    journal_mode = f"PRAGMA journal_mode={_config_value(config, 'SQLITE_JOURNAL_MODE')}"
+
+    def run(dbapi_connection, statements):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    # The journal mode is stored in the database file; switching it needs an
+    # exclusive lock, so only the engine's first connection does it.
+    @event.listens_for(engine, "first_connect")
+    def _set_journal_mode(dbapi_connection, connection_record):
+        run(dbapi_connection, [pragmas[1], journal_mode])
+
+    @event.listens_for(engine, "connect")
+    def _apply(dbapi_connection, connection_record):
+        run(dbapi_connection, pragmas)
+
+
+def configure(app):
+    """Set engine options (and replica binds) from config; call before `db.init_app(app)`."""
+    options = engine_options(app.config["SQLALCHEMY_DATABASE_URI"], app.config)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {**options, **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})}
+    urls = app.config.get("DB_REPLICA_URLS") or []
+    if isinstance(urls, str):
+        urls = [u.strip() for u in urls.split(",") if u.strip()]
+    binds = app.config.setdefault("SQLALCHEMY_BINDS", {})
+    for n, url in enumerate(urls):
+        binds[f"{replicas.PREFIX}{n}"] = {"url": url, **engine_options(url, app.config)}
+
+
+def init_app(app):
+    """Attach per-connection setup to the app's engines; call after `db.init_app(app)`."""
+    with app.app_context():
+        for engine in db.engines.values():
+            if _is_sqlite_file(engine.url):
+                install_pragmas(engine, app.config)
+
+
+def pool_stats():
+    """Checkout/wait metrics and current occupancy of every engine's pool."""
+    stats = {}
+    for key, engine in db.engines.items():
+        pool = engine.pool
+        entry = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update(size=pool.size(), checked_out=pool.checkedout(), idle=pool.checkedin(),
+                         overflow=max(0, pool.overflow()))
+        if isinstance(pool, MeteredQueuePool):
+            entry.update(pool.metrics.snapshot())
+        stats[key or "default"] = entry
+    return stats
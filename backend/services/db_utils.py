@@ -0,0 +1,114 @@
+# backend/services/db_utils.py
+from sqlalchemy import event, inspect
+
+from models.models import db
+
+# class -> attribute names whose pre-flush values are needed by after_flush hooks
+_tracked = {}
+
+
+def dialect_insert(bind, table):
+    """Return an INSERT construct supporting ON CONFLICT for the bind's dialect."""
+    name = bind.dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT is not supported for dialect {name!r}")
+    return insert(table)
+
+
+def apply_increments(conn, table, key_columns, rows):
+    """
+    Upsert `rows` into `table`, adding their value columns onto existing rows.
+
+    Every row must carry the same keys: the `key_columns` plus the numeric
+    columns to increment.
+    """
+    if not rows:
+        return
+    value_columns = [c for c in rows[0] if c not in key_columns]
+    stmt = dialect_insert(conn, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={c: table.c[c] + stmt.excluded[c] for c in value_columns},
+    )
+    conn.execute(stmt, rows)
+
+
+def previous_value(obj, attr, default=None):
+    """Value of `attr` as last loaded from the database (pre-flush)."""
+    hist = inspect(obj).attrs[attr].history
+    if hist.deleted:
+        return hist.deleted[0]
+    if hist.unchanged:
+        return hist.unchanged[0]
+    value = getattr(obj, attr)
+    return default if value is None else value
+
+
+def current_value(obj, attr, default=None):
+    value = getattr(obj, attr)
+    return default if value is None else value
+
+
+def attr_changed(obj, attr):
+    return inspect(obj).attrs[attr].history.has_changes()
+
+
+def track_attributes(cls, *attrs):
+    """
+    Make the previous value of `attrs` available to after_flush hooks.
+
+    Enables active history (so assigning to an expired attribute still loads
+    the old value) and loads the attributes of deleted instances before their
+    rows disappear.
+    """
+    names = _tracked.setdefault(cls, set())
+    for attr in attrs:
+        if attr not in names:
+            event.listen(getattr(cls, attr), "set", _noop_set, active_history=True)
+            names.add(attr)
+
+
+def _noop_set(target, value, oldvalue, initiator):
+    return value
+
+
+@event.listens_for(db.session, "before_flush")
+def _load_deleted_attributes(session, flush_context, instances):
+    for obj in session.deleted:
+        for cls, names in _tracked.items():
+            if isinstance(obj, cls):
+                for name in names:
+                    getattr(obj, name)
+
+
+def bulk_insert_raw(conn, table, rows):
+    """
+    executemany `rows` (dicts with identical keys) straight through the DBAPI.
+
+    Skips SQLAlchemy's per-row default and type processing, so every column
+    must be supplied and values must already be driver-ready (ISO strings
+    for dates work on SQLite and PostgreSQL alike).
+    """
+    if not rows:
+        return
+    compiled = table.insert().compile(dialect=conn.dialect, column_keys=list(rows[0]))
+    if compiled.positiontup:
+        params = [tuple(row[key] for key in compiled.positiontup) for row in rows]
+    else:
+        params = rows
+    conn.exec_driver_sql(str(compiled), params)
+
+
+def sync_sequences(conn, tables):
+    """After inserting explicit ids on PostgreSQL, move each serial sequence past max(id)."""
+    if conn.dialect.name != "postgresql":
+        return
+    for table in tables:
+        conn.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+        )
@@ -0,0 +1,243 @@
+# backend/services/exports.py
+"""
+Streaming CSV / NDJSON / JSON exports that drive ExportJob.
+
+Rows are selected as plain column tuples and fetched in FETCH_SIZE batches
+(`yield_per`, a server-side cursor on PostgreSQL), then formatted and written
+one at a time into a gzip file, so memory stays flat whatever the row count.
+The "json" format is one JSON array, encoded by serializers.stream_array()
+a chunk of rows at a time.
+The file is written under a temporary name and renamed when complete.
+Requests only create the ExportJob and queue an `exports.run` background
+job (services/jobs.py); the worker that runs it moves the export pending -> running -> completed (file_path, row_count,
+completed_at) or failed (error). On completion an `export_ready`
+Notification is written for the job's owner.
+"""
+import csv
+import gzip
+import json
+import os
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from models.models import (
+    db, Appointment, DoctorProfile, ExportJob, Job, Notification, PatientProfile, Treatment, User,
+)
+from services import jobs, serializers
+
+FETCH_SIZE = 2000
+COMPRESS_LEVEL = 6
+FORMATS = {"csv": ".csv.gz", "ndjson": ".ndjson.gz", "json": ".json.gz"}
+FILTERS = ("patient_id", "doctor_id", "from", "to")
+
+
+class ExportError(Exception):
+    status_code = 400
+
+
+class ExportNotFound(ExportError):
+    status_code = 404
+
+
+def export_dir():
+    path = current_app.config.get("EXPORT_DIR") or os.path.join(current_app.instance_path, "exports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _with_people(stmt, patient_fk, doctor_fk):
+    patient_user, doctor_user = aliased(User), aliased(User)
+    return (
+        stmt.add_columns(patient_user.full_name.label("patient_name"), doctor_user.full_name.label("doctor_name"))
+        .join(PatientProfile, PatientProfile.id == patient_fk)
+        .join(patient_user, patient_user.id == PatientProfile.user_id)
+        .join(DoctorProfile, DoctorProfile.id == doctor_fk)
+        .join(doctor_user, doctor_user.id == DoctorProfile.user_id)
+    )
+
+
+def _filtered(stmt, params):
+    if params.get("patient_id") is not None:
+        stmt = stmt.where(Appointment.patient_id == params["patient_id"])
+    if params.get("doctor_id") is not None:
+        stmt = stmt.where(Appointment.doctor_id == params["doctor_id"])
+    if params.get("from"):
+        stmt = stmt.where(Appointment.date >= date.fromisoformat(params["from"]))
+    if params.get("to"):
+        stmt = stmt.where(Appointment.date <= date.fromisoformat(params["to"]))
+    return stmt
+
+
+def _treatments(params):
+    stmt = select(
+        Treatment.id, Treatment.appointment_id, Appointment.date.label("appointment_date"),
+        Appointment.patient_id, Treatment.doctor_id, Treatment.diagnosis, Treatment.prescription,
+        Treatment.notes, Treatment.followup_date, Treatment.created_at,
+    ).join(Appointment, Appointment.id == Treatment.appointment_id)
+    stmt = _with_people(stmt, Appointment.patient_id, Treatment.doctor_id)
+    return _filtered(stmt, params).order_by(Treatment.id)
+
+
+def _appointments(params):
+    stmt = select(
+        Appointment.id, Appointment.date, Appointment.time_slot, Appointment.status, Appointment.patient_id,
+        Appointment.doctor_id, Appointment.reason, Appointment.created_at,
+    )
+    stmt = _with_people(stmt, Appointment.patient_id, Appointment.doctor_id)
+    return _filtered(stmt, params).order_by(Appointment.id)
+
+
+EXPORTS = {
+    "treatment_export": _treatments,
+    "appointments_export": _appointments,
+}
+
+
+def _stream(stmt):
+    """Yield row tuples FETCH_SIZE at a time from the database."""
+    result = db.session.execute(stmt.execution_options(yield_per=FETCH_SIZE))
+    try:
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        result.close()
+
+
+def write_rows(path, fmt, columns, rows):
+    """Write `rows` (an iterable of tuples) to a gzip file; returns the row count."""
+    count = 0
+
+    def items():
+        nonlocal count
+        for row in rows:
+            yield dict(zip(columns, row))
+            count += 1
+
+    with gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=COMPRESS_LEVEL) as out:
+        if fmt == "csv":
+            writer = csv.writer(out)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        elif fmt == "json":
+            for chunk in serializers.stream_array(items()):
+                out.write(chunk.decode("utf-8"))
+        else:
+            for row in rows:
+                out.write(serializers.dumps(dict(zip(columns, row))).decode("utf-8"))
+                out.write("\n")
+                count += 1
+    return count
+
+
+def create_export(user_id, job_type, fmt="csv", filters=None):
+    """Validate and queue an export; returns the pending ExportJob."""
+    if job_type not in EXPORTS:
+        raise ExportError(f"Unknown export type {job_type!r}; allowed: {', '.join(EXPORTS)}")
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format {fmt!r}; allowed: {', '.join(FORMATS)}")
+    params = {"format": fmt}
+    for key, value in (filters or {}).items():
+        if key not in FILTERS:
+            raise ExportError(f"Unknown filter {key!r}; allowed: {', '.join(FILTERS)}")
+        if value is None:
+            continue
+        try:
+            params[key] = date.fromisoformat(value).isoformat() if key in ("from", "to") else int(value)
+        except (TypeError, ValueError):
+            raise ExportError(f"Invalid value for {key}: {value!r}")
+    job = ExportJob(user_id=user_id, job_type=job_type, status="pending", params=json.dumps(params))
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def run_export(job_id):
+    """Produce the file for a pending (or failed) export; returns the ExportJob."""
+    job = db.session.get(ExportJob, job_id)
+    if job is None:
+        raise ExportNotFound("Export not found")
+    if job.status == "completed":
+        return job
+
+    job_type, user_id = job.job_type, job.user_id
+    params = json.loads(job.params or "{}")
+    fmt = params.get("format", "csv")
+    path = os.path.join(export_dir(), f"{job_type}-{job_id}{FORMATS[fmt]}")
+    partial = path + ".part"
+    job.status = "running"
+    db.session.commit()
+
+    stmt = EXPORTS[job_type](params)
+    columns = [c.name for c in stmt.selected_columns]
+    try:
+        count = write_rows(partial, fmt, columns, _stream(stmt))
+        os.replace(partial, path)
+    except Exception as e:
+        db.session.rollback()
+        if os.path.exists(partial):
+            os.remove(partial)
+        job = db.session.get(ExportJob, job_id)
+        job.status = "failed"
+        job.error = str(e)[:1000]
+        db.session.commit()
+        raise
+
+    job = db.session.get(ExportJob, job_id)
+    job.status = "completed"
+    job.file_path = path
+    job.row_count = count
+    job.error = None
+    job.completed_at = datetime.utcnow()
+    db.session.add(Notification(
+        user_id=user_id,
+        type="export_ready",
+        payload=json.dumps({"export_id": job_id, "job_type": job_type, "format": fmt, "rows": count}),
+    ))
+    db.session.commit()
+    return job
+
+
+@jobs.task("exports.run", max_attempts=3)
+def _run_export_task(payload):
+    job = run_export(payload["export_id"])
+    return {"export_id": job.id, "rows": job.row_count}
+
+
+def queue_export(user_id, job_type, fmt="csv", filters=None, request_key=None):
+    """
+    Create an export and queue it for a worker; returns the ExportJob.
+
+    Repeating a request with the same `request_key` returns the export the
+    first request created instead of starting another.
+    """
+    key = f"export:{user_id}:{request_key}" if request_key else None
+    if key is not None:
+        queued = Job.query.filter_by(idempotency_key=key).first()
+        if queued is not None:
+            return db.session.get(ExportJob, json.loads(queued.payload)["export_id"])
+    export = create_export(user_id, job_type, fmt, filters)
+    export_id = export.id
+    job = jobs.enqueue("exports.run", {"export_id": export_id}, idempotency_key=key)
+    if json.loads(job.payload)["export_id"] != export_id:  # a concurrent duplicate request won
+        db.session.delete(db.session.get(ExportJob, export_id))
+        db.session.commit()
+        export_id = json.loads(job.payload)["export_id"]
+    return db.session.get(ExportJob, export_id)
+
+
+def export_json(job):
+    return {
+        "id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "params": json.loads(job.params or "{}"),
+        "row_count": job.row_count,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+    }
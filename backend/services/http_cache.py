@@ -0,0 +1,297 @@
+# backend/services/http_cache.py
+"""
+Response cache with ETag / Last-Modified validators for read endpoints.
+
+    class DoctorListAPI(MethodView):
+        @http_cache.cached("doctors", last_modified=http_cache.doctors_last_modified)
+        def get(self): ...
+
+A cached GET is stored per namespace, path, query arguments and (with
+`vary="role"` / `vary="user"`) the caller's role or user id. Repeat
+requests get the stored body without running the view or touching the
+database, and a request whose `If-None-Match` / `If-Modified-Since` still
+matches gets an empty 304 instead. On a miss, a request carrying only
+`If-Modified-Since` is answered from the `last_modified` function (the
+newest `updated_at` of the rows behind the response) before the view runs;
+views without one always run, since a stamp alone may not know about
+another process's writes.
+Responses are `Cache-Control: private, no-cache`, so browsers keep them
+and revalidate on every navigation.
+
+Every namespace has a stamp, the time of its last invalidation, which is
+part of the cache keys and the floor of Last-Modified (so deletes, which
+leave no `updated_at` behind, still move it forward). An `after_flush`
+hook maps written models to namespaces (NAMESPACES) and moves their stamps
+once the transaction commits; Core UPDATE/DELETE statements must call
+`invalidate()` themselves.
+
+HTTP_CACHE_BACKEND selects where entries and stamps live:
+
+* memory (default): an LRU in each server process. Another process's
+  writes reach it only through expiry, so entries live HTTP_CACHE_TTL
+  seconds, MEMORY_TTL (5) by default: the gunicorn profiles run several
+  workers (server.py);
+* redis: shared by all workers (HTTP_CACHE_URL, needs the `redis` package),
+  entries live HTTP_CACHE_TTL seconds, TTL (60) by default;
+* off: no caching.
+"""
+import hashlib
+import pickle
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import Response, current_app, request
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event, func, select, union_all
+
+from models.models import db, Appointment, DoctorProfile, DoctorSpecialization, Specialization, User
+from services import metrics
+from services.cache import TTLCache, invalidate_on_commit
+
+TTL = 60.0
+MEMORY_TTL = 5.0  # per-process entries miss other workers' writes until they expire
+SIZE = 2048
+
+# model -> namespaces whose responses it feeds; callables get the written object
+NAMESPACES = {
+    User: (lambda user: f"profile:{user.id}", "doctors", "dashboard"),
+    DoctorProfile: ("doctors",),
+    DoctorSpecialization: ("doctors",),
+    Specialization: ("specializations", "doctors"),
+    Appointment: ("dashboard",),
+}
+
+metrics.HELP["hms_http_cache_total"] = ("counter", "Response cache lookups by namespace and result.")
+
+
+# --- backends ---------------------------------------------------------------
+
+
+class MemoryBackend:
+    def __init__(self, maxsize, ttl):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._stamps = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, entry):
+        self.entries.set(key, entry)
+
+    def stamp(self, namespace):
+        with self._lock:
+            return self._stamps.setdefault(namespace, time.time())
+
+    def bump(self, namespace):
+        with self._lock:
+            self._stamps[namespace] = max(time.time(), self._stamps.get(namespace, 0.0) + 1e-6)
+
+
+class RedisBackend:
+    def __init__(self, url, ttl, prefix="hms:http:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("HTTP_CACHE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, entry):
+        self.client.set(self.prefix + key, pickle.dumps(entry), ex=max(1, int(self.ttl)))
+
+    def stamp(self, namespace):
+        key = f"{self.prefix}stamp:{namespace}"
+        now = repr(time.time())
+        self.client.set(key, now, nx=True)
+        return float(self.client.get(key) or now)
+
+    def bump(self, namespace):
+        self.client.set(f"{self.prefix}stamp:{namespace}", repr(time.time()))
+
+
+_backends = {}
+
+
+def backend():
+    """The configured backend, or None when caching is off."""
+    config = current_app.config
+    kind = config.get("HTTP_CACHE_BACKEND", "memory")
+    if kind == "off":
+        return None
+    if kind not in _backends:
+        ttl = config.get("HTTP_CACHE_TTL")
+        if kind == "memory":
+            ttl = ttl or MEMORY_TTL
+            _backends[kind] = MemoryBackend(config.get("HTTP_CACHE_SIZE", SIZE), ttl)
+        elif kind == "redis":
+            _backends[kind] = RedisBackend(config["HTTP_CACHE_URL"], ttl or TTL)
+        else:
+            raise ValueError(f"Unknown HTTP_CACHE_BACKEND {kind!r}")
+    return _backends[kind]
+
+
+# --- invalidation -------------------------------------------------------------
+
+
+class _Invalidator:
+    """Adapter so services/cache.py's commit hook can move namespace stamps."""
+
+    def invalidate(self, namespace):
+        for b in list(_backends.values()):
+            b.bump(namespace)
+
+
+_invalidator = _Invalidator()
+
+
+def invalidate(*namespaces):
+    """Move the stamps of `namespaces` now (e.g. after a Core UPDATE)."""
+    for namespace in namespaces:
+        _invalidator.invalidate(namespace)
+
+
+def namespaces_for(obj):
+    for ns in NAMESPACES.get(type(obj), ()):
+        yield ns(obj) if callable(ns) else ns
+
+
+@event.listens_for(db.session, "after_flush")
+def _track_changes(session, flush_context):
+    if not _backends:
+        return
+    seen = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        for namespace in namespaces_for(obj):
+            if namespace not in seen:
+                seen.add(namespace)
+                invalidate_on_commit(session, _invalidator, namespace)
+
+
+# --- last-modified helpers ----------------------------------------------------
+
+
+def _max_updated(*sources):
+    """Newest updated_at (created_at if never updated) over (model, *where) sources, in one statement."""
+    parts = [
+        select(func.max(func.coalesce(model.updated_at, model.created_at)).label("ts")).where(*where)
+        for model, *where in sources
+    ]
+    newest = union_all(*parts).subquery() if len(parts) > 1 else parts[0].subquery()
+    value = db.session.execute(select(func.max(newest.c.ts))).scalar()
+    if isinstance(value, str):  # SQLite returns max() over a union as text
+        value = datetime.fromisoformat(value)
+    return value
+
+
+def profile_last_modified():
+    return _max_updated((User, User.id == int(get_jwt_identity())))
+
+
+def doctors_last_modified():
+    return _max_updated((DoctorProfile,), (User, User.role == "doctor"), (Specialization,))
+
+
+def specializations_last_modified():
+    return _max_updated((Specialization,))
+
+
+# --- decorator ------------------------------------------------------------------
+
+
+def _http_date_floor(value):
+    """`value` (naive UTC datetime or epoch seconds) as an aware datetime truncated to seconds."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value, timezone.utc)
+    elif value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def _cache_key(namespace, stamp, vary):
+    args = urlencode(sorted(request.args.items(multi=True)))
+    key = f"{namespace}@{stamp!r}|{request.path}?{args}"
+    if vary == "role":
+        key += f"|role={get_jwt().get('role')}"
+    return key
+
+
+def _respond(entry, cached):
+    response = Response(entry["body"], 200, mimetype=entry["mimetype"])
+    response.set_etag(entry["etag"])
+    response.last_modified = entry["last_modified"]
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Authorization")
+    response.headers["X-Cache"] = "HIT" if cached else "MISS"
+    return response.make_conditional(request)
+
+
+def _count(namespace, result):
+    metrics.registry.inc("hms_http_cache_total", (("namespace", namespace), ("result", result)))
+
+
+def cached(namespace, vary=None, last_modified=None):
+    """
+    Cache a view's 200 responses under `namespace`.
+
+    vary: None (same response for every caller), "role" or "user" (the
+    namespace becomes `<namespace>:<user id>`, matching NAMESPACES).
+    last_modified: callable returning the newest `updated_at` behind the
+    response (naive UTC datetime) or None.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            store = backend()
+            if store is None or request.method != "GET":
+                return fn(*args, **kwargs)
+            ns = f"{namespace}:{get_jwt_identity()}" if vary == "user" else namespace
+            stamp = store.stamp(ns)
+            key = _cache_key(ns, stamp, vary)
+
+            entry = store.get(key)
+            if entry is not None:
+                response = _respond(entry, cached=True)
+                _count(namespace, "not_modified" if response.status_code == 304 else "hit")
+                return response
+
+            modified = _http_date_floor(stamp)
+            if last_modified is not None:
+                newest = _http_date_floor(last_modified())
+                modified = max(modified, newest) if newest else modified
+            since = request.if_modified_since
+            if last_modified is not None and since is not None and not request.if_none_match and modified <= since:
+                _count(namespace, "not_modified")
+                response = Response(status=304)
+                response.last_modified = modified
+                return response
+
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            body = response.get_data()
+            entry = {
+                "body": body,
+                "mimetype": response.mimetype,
+                "etag": hashlib.sha1(body).hexdigest()[:20],
+                "last_modified": modified,
+            }
+            store.set(key, entry)
+            response = _respond(entry, cached=False)
+            _count(namespace, "not_modified" if response.status_code == 304 else "miss")
+            return response
+
+        return inner
+
+    return wrapper
+
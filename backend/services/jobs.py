@@ -0,0 +1,320 @@
+# backend/services/jobs.py
+"""
+Background jobs.
+
+Tasks are plain functions registered with `@task("name")` that take the
+job's JSON payload. `enqueue()` records a Job row (an `idempotency_key`
+makes repeated enqueues return the existing job) and hands it to the
+configured backend (JOB_BACKEND):
+
+* database (default): workers (`python app.py worker`) poll the `jobs`
+  table, highest priority first, and claim a row with a conditional UPDATE
+  (`... WHERE id = :id AND status = 'queued'`), so any number of worker
+  threads and processes can share the table;
+* inline: the job runs immediately in the calling process (development,
+  tests);
+* celery: the job id is sent to Celery (JOB_BROKER_URL); a Celery worker
+  started with `make_celery(app)` runs it. The Job row still carries status,
+  retries and idempotency.
+
+A failed job is retried with exponential backoff until `max_attempts`, then
+left `failed` with its last error. Jobs still `running` after
+JOB_LEASE_SECONDS (the worker most likely died) are put back in the queue,
+so the lease must exceed the longest expected job; one that has used up its
+`max_attempts` is marked `failed` instead, so a job that keeps killing its
+worker is not retried forever.
+"""
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models.models import db, Job
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE = 5  # seconds, doubled per attempt
+RETRY_CAP = 600
+POLL_INTERVAL = 0.5
+LEASE_SECONDS = 1800
+
+_tasks = {}
+
+
+class JobError(Exception):
+    pass
+
+
+def task(name, max_attempts=DEFAULT_MAX_ATTEMPTS, priority=0):
+    """Register `fn(payload)` as task `name`."""
+    def register(fn):
+        _tasks[name] = {"fn": fn, "max_attempts": max_attempts, "priority": priority}
+        return fn
+    return register
+
+
+# --- backends ---------------------------------------------------------------
+
+
+class DatabaseBackend:
+    """Jobs stay in the table until a worker claims them."""
+
+    def dispatch(self, job_id, priority, run_after):
+        pass
+
+
+class InlineBackend:
+    def dispatch(self, job_id, priority, run_after):
+        run_job(job_id)
+
+
+class CeleryBackend:
+    def __init__(self, broker_url):
+        try:
+            from celery import Celery
+        except ImportError:
+            raise RuntimeError("JOB_BACKEND=celery requires the 'celery' package")
+        self.celery = Celery("hms", broker=broker_url)
+
+    def dispatch(self, job_id, priority, run_after):
+        self.celery.send_task("hms.run_job", args=[job_id], priority=max(0, min(9, priority)), eta=run_after)
+
+
+def make_celery(app):
+    """Celery app whose `hms.run_job` task runs jobs inside `app`'s context."""
+    from celery import Celery
+
+    celery = Celery("hms", broker=app.config["JOB_BROKER_URL"])
+
+    @celery.task(name="hms.run_job")
+    def run(job_id):
+        with app.app_context():
+            try:
+                run_job(job_id)
+            finally:
+                db.session.remove()
+
+    return celery
+
+
+_backends = {}
+
+
+def backend():
+    kind = current_app.config.get("JOB_BACKEND", "database")
+    if kind not in _backends:
+        if kind == "database":
+            _backends[kind] = DatabaseBackend()
+        elif kind == "inline":
+            _backends[kind] = InlineBackend()
+        elif kind == "celery":
+            _backends[kind] = CeleryBackend(current_app.config["JOB_BROKER_URL"])
+        else:
+            raise JobError(f"Unknown JOB_BACKEND {kind!r}")
+    return _backends[kind]
+
+
+# --- producing --------------------------------------------------------------
+
+
+def enqueue(name, payload=None, priority=None, idempotency_key=None, delay=0, max_attempts=None):
+    """Queue task `name`; returns the Job (the existing one for a known idempotency_key)."""
+    if name not in _tasks:
+        raise JobError(f"Unknown task {name!r}")
+    spec = _tasks[name]
+    if idempotency_key is not None:
+        existing = Job.query.filter_by(idempotency_key=idempotency_key).first()
+        if existing is not None:
+            return existing
+
+    job = Job(
+        name=name,
+        payload=json.dumps(payload or {}),
+        priority=spec["priority"] if priority is None else priority,
+        max_attempts=max_attempts or spec["max_attempts"],
+        run_after=datetime.utcnow() + timedelta(seconds=delay),
+        idempotency_key=idempotency_key,
+    )
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:  # lost an idempotency race
+        db.session.rollback()
+        return Job.query.filter_by(idempotency_key=idempotency_key).one()
+    job_id, job_priority, run_after = job.id, job.priority, job.run_after
+    backend().dispatch(job_id, job_priority, run_after if delay else None)
+    return db.session.get(Job, job_id)
+
+
+# --- consuming --------------------------------------------------------------
+
+
+def _claim(job_id, worker_id):
+    result = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == "queued")
+        .values(status="running", locked_by=worker_id, locked_at=datetime.utcnow(), attempts=Job.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _retry_delay(attempts):
+    return min(RETRY_CAP, RETRY_BASE * 2 ** (attempts - 1))
+
+
+def run_job(job_id, worker_id=None):
+    """Claim and execute one job; returns True if this call ran it."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    if not _claim(job_id, worker_id):
+        return False
+    job = db.session.get(Job, job_id)
+    spec = _tasks.get(job.name)
+    payload = json.loads(job.payload or "{}")
+    try:
+        if spec is None:
+            raise JobError(f"Unknown task {job.name!r}")
+        result = spec["fn"](payload)
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.last_error = "".join(traceback.format_exception_only(type(e), e)).strip()[:2000]
+        job.locked_by = job.locked_at = None
+        if job.attempts < job.max_attempts:
+            job.status = "queued"
+            job.run_after = datetime.utcnow() + timedelta(seconds=_retry_delay(job.attempts))
+        else:
+            job.status = "failed"
+            job.finished_at = datetime.utcnow()
+        db.session.commit()
+        log.warning("job %s (%s) attempt %s failed: %s", job_id, job.name, job.attempts, job.last_error)
+        return True
+
+    job = db.session.get(Job, job_id)
+    job.status = "succeeded"
+    job.result = json.dumps(result, default=str) if result is not None else None
+    job.last_error = None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def next_job_ids(limit=1, now=None):
+    """Ids of the next runnable jobs, highest priority first."""
+    stmt = (
+        select(Job.id)
+        .where(Job.status == "queued", Job.run_after <= (now or datetime.utcnow()))
+        .order_by(Job.priority.desc(), Job.run_after, Job.id)
+        .limit(limit)
+    )
+    if db.session.get_bind().dialect.name == "postgresql":
+        stmt = stmt.with_for_update(skip_locked=True)
+    return db.session.execute(stmt).scalars().all()
+
+
+def requeue_stale(lease=LEASE_SECONDS):
+    """
+    Put jobs that have been running for longer than `lease` seconds back in the
+    queue, or fail them if they have no attempts left; returns how many.
+    """
+    now = datetime.utcnow()
+    stale = update(Job).where(Job.status == "running", Job.locked_at < now - timedelta(seconds=lease))
+    failed = db.session.execute(
+        stale.where(Job.attempts >= Job.max_attempts)
+        .values(status="failed", locked_by=None, locked_at=None, finished_at=now, last_error="lease expired")
+        .execution_options(synchronize_session=False)
+    )
+    requeued = db.session.execute(
+        stale.values(status="queued", locked_by=None, locked_at=None, last_error="lease expired")
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if failed.rowcount:
+        log.warning("%s jobs failed: lease expired on their last attempt", failed.rowcount)
+    return failed.rowcount + requeued.rowcount
+
+
+def stats():
+    counts = dict(db.session.execute(select(Job.status, func.count()).group_by(Job.status)).all())
+    return {status: counts.get(status, 0) for status in ("queued", "running", "succeeded", "failed")}
+
+
+class Worker:
+    """A pool of `concurrency` threads polling the jobs table."""
+
+    def __init__(self, app, concurrency=None, poll_interval=POLL_INTERVAL):
+        self.app = app
+        self.concurrency = concurrency or app.config.get("JOB_CONCURRENCY") or os.cpu_count() or 1
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def _loop(self, n):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{n}"
+        idle = self.poll_interval
+        with self.app.app_context():
+            while not self.stopping.is_set():
+                ran = False
+                try:
+                    for job_id in next_job_ids(limit=self.concurrency):
+                        if run_job(job_id, worker_id):
+                            ran = True
+                            with self._lock:
+                                self.processed += 1
+                            break
+                    else:
+                        db.session.rollback()  # release the read (and row locks on PostgreSQL)
+                except Exception:
+                    log.exception("worker %s: poll failed", worker_id)
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                if ran:
+                    idle = self.poll_interval
+                else:
+                    self.stopping.wait(idle)
+                    idle = min(idle * 2, self.poll_interval * 8)
+
+    def _reaper(self):
+        with self.app.app_context():
+            while not self.stopping.wait(max(1.0, self.app.config.get("JOB_LEASE_SECONDS", LEASE_SECONDS) / 4)):
+                try:
+                    requeue_stale(self.app.config.get("JOB_LEASE_SECONDS", LEASE_SECONDS))
+                except Exception:
+                    log.exception("requeueing stale jobs failed")
+                finally:
+                    db.session.remove()
+
+    def start(self):
+        self.threads = [threading.Thread(target=self._loop, args=(n,), daemon=True) for n in range(self.concurrency)]
+        self.threads.append(threading.Thread(target=self._reaper, daemon=True))
+        for t in self.threads:
+            t.start()
+        return self
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        for t in self.threads:
+            t.join(timeout)
+
+    def run_forever(self):
+        """Run until SIGINT/SIGTERM; running jobs are allowed to finish."""
+        def _stop(signum, frame):
+            self.stopping.set()
+        signal.signal(signal.SIGINT, _stop)
+        signal.signal(signal.SIGTERM, _stop)
+        self.start()
+        while not self.stopping.wait(1.0):
+            pass
+        self.stop()
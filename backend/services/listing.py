@@ -0,0 +1,250 @@
+# backend/services/listing.py
+"""
+Keyset-paginated list queries.
+
+A ListSpec whitelists, per model, the fields a client may request, the
+filters it may apply and the sort keys it may page by (each backed by a
+composite index ending in `id`). `paginate()` turns those into a single
+page query selecting just the requested columns as tuples (related
+columns through outer joins, see services/serializers.py) plus one query
+per requested collection field, so a page costs the same few queries at
+any depth. The
+position is carried by an opaque cursor holding the last row's sort key;
+the next page continues with `(key, id) > (last_key, last_id)` instead of
+an OFFSET that has to skip every earlier row.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_, select
+
+from models.models import (
+    db,
+    Appointment,
+    DoctorProfile,
+    DoctorSpecialization,
+    PatientProfile,
+    Specialization,
+    Treatment,
+    User,
+)
+from services.serializers import Field, Schema
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class Filter:
+    """`column == value` (or `op`), or a custom `condition(value)` clause."""
+
+    def __init__(self, column=None, parse=int, op="eq", condition=None):
+        self.column = column
+        self.parse = parse
+        self.op = op
+        self.condition = condition
+
+    def clause(self, raw):
+        try:
+            value = self.parse(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid filter value {raw!r}")
+        if self.condition is not None:
+            return self.condition(value)
+        if self.op == "gte":
+            return self.column >= value
+        if self.op == "lte":
+            return self.column <= value
+        if self.op == "in":
+            return self.column.in_(value)
+        return self.column == value
+
+
+class ListSpec:
+    def __init__(self, model, fields, default_fields, sorts, default_sort, filters):
+        self.model = model
+        self.fields = fields
+        self.schema = Schema(model, fields)
+        self.default_fields = default_fields
+        self.sorts = sorts  # name -> leading key column (None: id only)
+        self.default_sort = default_sort
+        self.filters = filters
+
+
+def _jsonable(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _parse_list(parse):
+    return lambda raw: [parse(v) for v in str(raw).split(",") if v != ""]
+
+
+# --- cursors ----------------------------------------------------------------
+
+
+def _encode_cursor(sort, values):
+    raw = json.dumps([sort, *(_jsonable(v) for v in values)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor, sort, columns):
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if raw[0] != sort or len(raw) != len(columns) + 1:
+            raise ValueError
+        values = []
+        for column, value in zip(columns, raw[1:]):
+            kind = column.type.python_type
+            if kind is datetime:
+                value = datetime.fromisoformat(value)
+            elif kind is date:
+                value = date.fromisoformat(value)
+            else:
+                value = kind(value)
+            values.append(value)
+        return values
+    except (ValueError, TypeError, IndexError, NotImplementedError):
+        raise ValueError("Invalid cursor (it must come from a previous page with the same sort)")
+
+
+def _after(columns, values, descending):
+    # (a, id) > (x, y) written as "a >= x AND (a > x OR id > y)" so the leading
+    # column stays an index range on every backend.
+    if len(columns) == 1:
+        return columns[0] < values[0] if descending else columns[0] > values[0]
+    (lead, tie), (lead_value, tie_value) = columns, values
+    if descending:
+        return and_(lead <= lead_value, or_(lead < lead_value, tie < tie_value))
+    return and_(lead >= lead_value, or_(lead > lead_value, tie > tie_value))
+
+
+# --- paging -----------------------------------------------------------------
+
+
+def paginate(spec, limit=DEFAULT_LIMIT, cursor=None, sort=None, fields=None, filters=None, scope=()):
+    """
+    One page of `spec.model` rows as {"items", "next_cursor", "limit"}.
+
+    `filters` maps whitelisted filter names to raw query values, `scope` is a
+    list of extra where clauses the caller enforces (e.g. "own rows only").
+    Raises ValueError for unknown fields, filters, sorts or a bad cursor.
+    """
+    model = spec.model
+    sort = sort or spec.default_sort
+    descending = sort.startswith("-")
+    if sort.lstrip("-") not in spec.sorts:
+        raise ValueError(f"Unknown sort {sort!r}; allowed: {', '.join(sorted(spec.sorts))}")
+    lead = spec.sorts[sort.lstrip("-")]
+    key = [lead, model.id] if lead is not None else [model.id]
+
+    names = fields or spec.default_fields
+    # sort keys are selected too, they form the next cursor
+    stmt, plan = spec.schema.select(names, extra=key)
+    stmt = stmt.where(*scope)
+    for name, raw in (filters or {}).items():
+        if name not in spec.filters:
+            raise ValueError(f"Unknown filter {name!r}; allowed: {', '.join(sorted(spec.filters))}")
+        stmt = stmt.where(spec.filters[name].clause(raw))
+    if cursor:
+        stmt = stmt.where(_after(key, _decode_cursor(cursor, sort, key), descending))
+    stmt = stmt.order_by(*(c.desc() if descending else c.asc() for c in key)).limit(limit + 1)
+
+    rows = db.session.execute(stmt).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(sort, rows[-1][plan.extra_at:])
+    return {
+        "items": spec.schema.dicts(rows, plan),
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }
+
+
+# --- specs ------------------------------------------------------------------
+
+
+def _own(model, *names):
+    return {name: Field(getattr(model, name)) for name in names}
+
+
+APPOINTMENTS = ListSpec(
+    Appointment,
+    fields={
+        **_own(Appointment, "id", "patient_id", "doctor_id", "availability_id", "date", "time_slot",
+               "status", "reason", "created_at"),
+        "doctor_name": Field(User.full_name, (Appointment.doctor, DoctorProfile.user)),
+        "patient_name": Field(User.full_name, (Appointment.patient, PatientProfile.user)),
+    },
+    default_fields=["id", "patient_id", "doctor_id", "date", "time_slot", "status", "doctor_name", "patient_name"],
+    sorts={"date": Appointment.date, "id": None},
+    default_sort="date",
+    filters={
+        "doctor_id": Filter(Appointment.doctor_id),
+        "patient_id": Filter(Appointment.patient_id),
+        "status": Filter(Appointment.status, parse=_parse_list(str), op="in"),
+        "from": Filter(Appointment.date, parse=date.fromisoformat, op="gte"),
+        "to": Filter(Appointment.date, parse=date.fromisoformat, op="lte"),
+    },
+)
+
+PATIENTS = ListSpec(
+    PatientProfile,
+    fields={
+        **_own(PatientProfile, "id", "user_id", "dob", "gender", "address", "emergency_contact", "created_at"),
+        **{name: Field(getattr(User, name), (PatientProfile.user,))
+           for name in ("username", "email", "full_name", "phone", "is_active")},
+    },
+    default_fields=["id", "user_id", "full_name", "email", "phone", "dob", "gender"],
+    sorts={"id": None},
+    default_sort="id",
+    filters={
+        "user_id": Filter(PatientProfile.user_id),
+        "ids": Filter(PatientProfile.id, parse=_parse_list(int), op="in"),
+    },
+)
+
+DOCTORS = ListSpec(
+    DoctorProfile,
+    fields={
+        **_own(DoctorProfile, "id", "user_id", "bio", "qualification", "consultation_fee", "created_at"),
+        # the directory is open to every signed-in user: no login names or contact details
+        **{name: Field(getattr(User, name), (DoctorProfile.user,)) for name in ("full_name", "is_active")},
+        "specializations": Field(
+            Specialization.name, (DoctorProfile.specializations, DoctorSpecialization.specialization)
+        ),
+    },
+    default_fields=["id", "full_name", "qualification", "consultation_fee", "specializations"],
+    sorts={"id": None},
+    default_sort="id",
+    filters={
+        "user_id": Filter(DoctorProfile.user_id),
+        "specialization_id": Filter(condition=lambda v: DoctorProfile.id.in_(
+            select(DoctorSpecialization.doctor_id).where(DoctorSpecialization.specialization_id == v)
+        )),
+    },
+)
+
+TREATMENTS = ListSpec(
+    Treatment,
+    fields={
+        **_own(Treatment, "id", "appointment_id", "doctor_id", "diagnosis", "prescription", "notes",
+               "followup_date", "created_at"),
+        "appointment_date": Field(Appointment.date, (Treatment.appointment,)),
+        "patient_id": Field(Appointment.patient_id, (Treatment.appointment,)),
+        "doctor_name": Field(User.full_name, (Treatment.doctor, DoctorProfile.user)),
+    },
+    default_fields=["id", "appointment_id", "appointment_date", "doctor_name", "diagnosis", "prescription",
+                    "followup_date"],
+    sorts={"created_at": Treatment.created_at, "id": None},
+    default_sort="-created_at",
+    filters={
+        "doctor_id": Filter(Treatment.doctor_id),
+        "appointment_id": Filter(Treatment.appointment_id),
+        "patient_id": Filter(condition=lambda v: Treatment.appointment_id.in_(
+            select(Appointment.id).where(Appointment.patient_id == v)
+        )),
+    },
+)
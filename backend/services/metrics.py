@@ -0,0 +1,422 @@
+# backend/services/metrics.py
+"""
+Request and SQL metrics for the `main_routes` blueprint.
+
+`instrument(blueprint)` adds before/after request hooks that time every
+request, and SQLAlchemy `before/after_cursor_execute` listeners (on every
+engine) that count the statements each request runs and the time spent in
+them. Per endpoint this records:
+
+* hms_request_duration_seconds: latency histogram (with a request counter by
+  status in hms_requests_total);
+* hms_request_queries / hms_request_query_seconds: statements per request
+  and the time spent executing them;
+* hms_n_plus_one_total: requests that ran the same SQL statement at least
+  METRICS_N_PLUS_ONE times (a lazy-loaded relationship touched in a loop,
+  usually). Each one is also logged with the statement.
+
+Responses carry a `Server-Timing` header (`app` and `db` durations, query
+count) for the browser's network panel. `/metrics` renders everything in
+the Prometheus text format, plus the connection pool counters of
+services/database.py.
+
+Metrics live in the memory of each server process. With several gunicorn
+workers set METRICS_DIR to a directory shared by them: every worker writes
+its totals there (at most every METRICS_FLUSH_SECONDS) and `/metrics`
+returns the sum over all files, so any worker can answer a scrape. A file
+is named after its process's pid and start time, so a new worker reusing a
+pid cannot overwrite it. Files of workers that have exited (gunicorn's
+child_exit hook in server.py, or the next scrape that finds the process
+gone) are folded into metrics-retired.json: their counters stay in the
+totals, their gauges are dropped, and the directory holds one file per live
+worker plus that one.
+
+`/metrics` needs "Authorization: Bearer <METRICS_TOKEN>"; without a
+configured token it is refused.
+
+Slow requests can be profiled with services/profiler.py (PROFILE_SLOW_MS).
+"""
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services import profiler
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+N_PLUS_ONE = 10  # repeats of one statement within a request
+FLUSH_SECONDS = 5.0
+RETIRED = "metrics-retired.json"  # the counters of processes that have exited
+
+HELP = {
+    "hms_requests_total": ("counter", "Requests by endpoint, method and status."),
+    "hms_request_duration_seconds": ("histogram", "Request latency by endpoint."),
+    "hms_request_queries": ("histogram", "SQL statements per request by endpoint."),
+    "hms_request_query_seconds": ("histogram", "Time spent in SQL per request by endpoint."),
+    "hms_n_plus_one_total": ("counter", "Requests that repeated one SQL statement N+1 style."),
+    "hms_db_pool_checkouts_total": ("counter", "Connection checkouts by bind."),
+    "hms_db_pool_waits_total": ("counter", "Checkouts that waited for a free connection."),
+    "hms_db_pool_wait_seconds_total": ("counter", "Time spent waiting for a free connection."),
+    "hms_db_pool_timeouts_total": ("counter", "Checkouts that gave up waiting."),
+    "hms_db_pool_checked_out": ("gauge", "Connections currently in use."),
+}
+
+_current = ContextVar("hms_request_stats", default=None)
+
+
+class Registry:
+    """Thread-safe counters, gauges and histograms keyed by (name, labels)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._values = {}  # (name, labels) -> number, for counters and gauges
+            self._histograms = {}  # (name, labels) -> [buckets, per-bucket counts, sum, count]
+
+    def inc(self, name, labels=(), amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def observe(self, name, value, labels=(), buckets=LATENCY_BUCKETS):
+        key = (name, labels)
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [buckets, [0] * (len(buckets) + 1), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    break
+            else:
+                i = len(buckets)
+            entry[1][i] += 1
+            entry[2] += value
+            entry[3] += 1
+
+    def snapshot(self):
+        """JSON-friendly copy: {"values": [[name, labels, v]], "histograms": [[name, labels, buckets, counts, sum, n]]}."""
+        with self._lock:
+            return {
+                "values": [[name, [list(l) for l in labels], v] for (name, labels), v in self._values.items()],
+                "histograms": [
+                    [name, [list(l) for l in labels], list(buckets), list(counts), total, n]
+                    for (name, labels), (buckets, counts, total, n) in self._histograms.items()
+                ],
+            }
+
+
+registry = Registry()
+
+
+class RequestStats:
+    __slots__ = ("started", "queries", "query_seconds", "statements", "repeated")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.statements = Counter()
+        self.repeated = []
+
+    def record_query(self, statement, seconds, threshold):
+        self.queries += 1
+        self.query_seconds += seconds
+        self.statements[statement] += 1
+        if self.statements[statement] == threshold:
+            self.repeated.append(statement)
+
+
+# --- SQL instrumentation --------------------------------------------------------
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("hms_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("hms_query_start")
+    if stats is None or not started:
+        return
+    threshold = current_app.config.get("METRICS_N_PLUS_ONE", N_PLUS_ONE)
+    stats.record_query(statement, time.perf_counter() - started.pop(), threshold)
+
+
+# --- request hooks -----------------------------------------------------------------
+
+
+def _endpoint():
+    endpoint = request.endpoint or "unmatched"
+    return endpoint.rsplit(".", 1)[-1]
+
+
+def _before_request():
+    _current.set(RequestStats())
+    profiler.start_request()
+
+
+def _after_request(response):
+    stats = _current.get()
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - stats.started
+    endpoint = _endpoint()
+    labels = (("endpoint", endpoint),)
+    registry.inc("hms_requests_total", labels + (("method", request.method), ("status", str(response.status_code))))
+    registry.observe("hms_request_duration_seconds", elapsed, labels)
+    registry.observe("hms_request_queries", stats.queries, labels, QUERY_BUCKETS)
+    registry.observe("hms_request_query_seconds", stats.query_seconds, labels)
+    if stats.repeated:
+        registry.inc("hms_n_plus_one_total", labels)
+        for statement in stats.repeated:
+            log.warning("N+1 query in %s %s: ran %d times: %s", request.method, request.path,
+                        stats.statements[statement], " ".join(statement.split()))
+    response.headers["Server-Timing"] = (
+        f'app;dur={elapsed * 1000.0:.1f}, db;dur={stats.query_seconds * 1000.0:.1f};desc="{stats.queries} queries"'
+    )
+    profiler.finish_request(endpoint, elapsed)
+    _maybe_flush()
+    return response
+
+
+def _teardown_request(exc):
+    _current.set(None)
+    profiler.discard_request()
+
+
+def instrument(blueprint):
+    """Time the requests of `blueprint` and the SQL they run."""
+    blueprint.before_request(_before_request)
+    blueprint.after_request(_after_request)
+    blueprint.teardown_request(_teardown_request)
+
+
+# --- export ------------------------------------------------------------------------
+
+
+def _pool_values():
+    from services import database
+
+    values = []
+    for bind, stats in database.pool_stats().items():
+        labels = [["bind", bind]]
+        if "checkouts" in stats:
+            values += [
+                ["hms_db_pool_checkouts_total", labels, stats["checkouts"]],
+                ["hms_db_pool_waits_total", labels, stats["waits"]],
+                ["hms_db_pool_wait_seconds_total", labels, stats["wait_ms_total"] / 1000.0],
+                ["hms_db_pool_timeouts_total", labels, stats["timeouts"]],
+            ]
+        if "checked_out" in stats:
+            values.append(["hms_db_pool_checked_out", labels, stats["checked_out"]])
+    return values
+
+
+def process_snapshot():
+    """This process's metrics, including its connection pools (needs an app context)."""
+    snapshot = registry.snapshot()
+    snapshot["values"] += _pool_values()
+    return snapshot
+
+
+_last_flush = [0.0]
+_flush_lock = threading.Lock()
+_identity = {}  # pid -> this process's snapshot file name
+
+
+def _start_time(pid):
+    """When `pid` started (clock ticks since boot, from /proc), or None if it is gone or there is no /proc."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def _snapshot_name(pid=None):
+    # pid + start time: a worker that reuses a dead worker's pid gets a file of its own
+    pid = pid or os.getpid()
+    if pid not in _identity:
+        started = _start_time(pid) or f"t{time.time_ns()}"
+        _identity.clear()
+        _identity[pid] = f"metrics-{pid}-{started}.json"
+    return _identity[pid]
+
+
+def _alive(name):
+    """Whether the process that wrote snapshot file `name` is still running."""
+    try:
+        pid, started = name[len("metrics-"):-len(".json")].split("-")
+        pid = int(pid)
+    except ValueError:
+        return False
+    if not started.startswith("t"):
+        return _start_time(pid) == started
+    try:  # no /proc: a reused pid looks alive until its new owner exits
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def flush(directory=None):
+    """Write this process's snapshot into METRICS_DIR (atomically replacing its previous one)."""
+    directory = directory or current_app.config.get("METRICS_DIR")
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _snapshot_name())
+    tmp = f"{path}.tmp"
+    with _flush_lock:
+        with open(tmp, "w") as f:
+            json.dump(process_snapshot(), f)
+        os.replace(tmp, path)
+        _last_flush[0] = time.monotonic()
+    return path
+
+
+def _maybe_flush():
+    if not current_app.config.get("METRICS_DIR"):
+        return
+    if time.monotonic() - _last_flush[0] >= current_app.config.get("METRICS_FLUSH_SECONDS", FLUSH_SECONDS):
+        flush()
+
+
+def merge(snapshots):
+    """Sum snapshots from several processes into one."""
+    values, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, v in snapshot["values"]:
+            key = (name, tuple(tuple(l) for l in labels))
+            values[key] = values.get(key, 0) + v
+        for name, labels, buckets, counts, total, n in snapshot["histograms"]:
+            key = (name, tuple(tuple(l) for l in labels))
+            entry = histograms.get(key)
+            if entry is None or entry[0] != buckets:
+                histograms[key] = [buckets, list(counts), total, n]
+            else:
+                entry[1] = [a + b for a, b in zip(entry[1], counts)]
+                entry[2] += total
+                entry[3] += n
+    return values, histograms
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):  # removed or half-written by hand
+        return None
+
+
+def retire(directory, name):
+    """
+    Fold the snapshot file `name` of an exited process into metrics-retired.json and remove it.
+    Its counters and histograms stay in the totals (so they never go down); its gauges are dropped.
+    """
+    path = os.path.join(directory, name)
+    claimed = f"{path}.{os.getpid()}.retiring"
+    try:
+        os.rename(path, claimed)  # only one process gets to fold a file
+    except OSError:
+        return
+    import fcntl  # Unix only, like gunicorn
+
+    retired = os.path.join(directory, RETIRED)
+    with open(os.path.join(directory, "metrics.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        snapshots = [s for s in (_read(retired), _read(claimed)) if s]
+        values, histograms = merge(snapshots)
+        snapshot = {
+            "values": [[n, [list(l) for l in labels], v] for (n, labels), v in values.items()
+                       if HELP.get(n, ("counter",))[0] != "gauge"],
+            "histograms": [[n, [list(l) for l in labels], *entry] for (n, labels), entry in histograms.items()],
+        }
+        with open(f"{retired}.tmp", "w") as f:
+            json.dump(snapshot, f)
+        os.replace(f"{retired}.tmp", retired)
+        os.remove(claimed)
+
+
+def retire_exited(directory, pid="*"):
+    """retire() the snapshot files (of `pid`, or all) whose process has exited."""
+    for path in glob.glob(os.path.join(directory, f"metrics-{pid}-*.json")):
+        name = os.path.basename(path)
+        if name != RETIRED and not _alive(name):
+            retire(directory, name)
+
+
+def collect():
+    """Snapshots of every process writing to METRICS_DIR (live ones and the retired total), or just this one."""
+    directory = current_app.config.get("METRICS_DIR")
+    if not directory:
+        return [process_snapshot()]
+    flush(directory)
+    retire_exited(directory)
+    snapshots = (_read(path) for path in sorted(glob.glob(os.path.join(directory, "metrics-*.json"))))
+    return [snapshot for snapshot in snapshots if snapshot is not None]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(snapshots):
+    """Prometheus text exposition (format 0.0.4) of the merged snapshots."""
+    values, histograms = merge(snapshots)
+    by_name = {}
+    for (name, labels), v in values.items():
+        by_name.setdefault(name, []).append((labels, v))
+    for (name, labels), entry in histograms.items():
+        by_name.setdefault(name, []).append((labels, entry))
+
+    lines = []
+    for name in sorted(by_name):
+        kind, text = HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, v in sorted(by_name[name], key=lambda item: item[0]):
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_number(v)}")
+                continue
+            buckets, counts, total, n = v
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_number(float(bound))
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(float(total))}")
+            lines.append(f"{name}_count{_format_labels(labels)} {n}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,356 @@
+# backend/services/notifications.py
+"""
+Appointment reminders and notification delivery.
+
+`schedule_reminders(day)` walks the day's booked appointments in id order,
+BATCH_SIZE at a time over the (date, id) index, and writes one `reminder`
+Notification per appointment with a single multi-row INSERT per batch. The
+`dedupe_key` makes rescheduling the same day a no-op for appointments that
+already have their reminder.
+
+`deliver_pending()` sends every undelivered notification through the
+configured transport (NOTIFY_TRANSPORT):
+
+* webhook: POSTs each message as JSON to NOTIFY_WEBHOOK_URL;
+* smtp: mails the user through SMTP_HOST;
+* stub: sends nothing and marks messages delivered (development, tests).
+
+There is no default: with NOTIFY_TRANSPORT unset (or its URL / host
+missing) delivery raises TransportNotConfigured before touching any
+notification, so an unconfigured deployment fails its reminder jobs
+instead of silently marking everything delivered.
+
+Messages are sent from an asyncio loop with at most NOTIFY_CONCURRENCY in
+flight; a failed send is retried with exponential backoff (without holding
+its concurrency slot) and, if it keeps failing, left undelivered with its
+error for the next run until NOTIFY_MAX_ATTEMPTS runs have tried it.
+Deliveries are not claimed, so run one delivery at a time (the
+`notifications.reminders` job or `python app.py send-reminders`).
+"""
+import asyncio
+import json
+import random
+import smtplib
+import threading
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+
+from flask import current_app
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import aliased
+
+from models.models import db, Appointment, DoctorProfile, Notification, PatientProfile, User
+from services import jobs
+from services.db_utils import dialect_insert
+
+BATCH_SIZE = 1000
+CONCURRENCY = 20
+RETRIES = 3  # sends per message within one delivery run
+BACKOFF = 0.5  # seconds, doubled per retry
+MAX_ATTEMPTS = 5  # delivery runs before a message is given up on
+
+
+class DeliveryError(Exception):
+    pass
+
+
+class TransportNotConfigured(Exception):
+    """NOTIFY_TRANSPORT is unset, unknown or missing its settings."""
+
+
+# --- transports ---------------------------------------------------------------
+
+
+class StubTransport:
+    """Keeps the last `keep` sent messages in `sent`; optional latency and failure rate for tests and benchmarks."""
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=None, keep=1000):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent = deque(maxlen=keep)
+        self._rng = random.Random(seed)
+
+    async def send(self, message):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            raise DeliveryError("simulated failure")
+        self.sent.append(message)
+
+
+class _BlockingTransport:
+    """Runs a blocking `_send(message)` on a thread pool sized to the sender's concurrency."""
+
+    def __init__(self, concurrency):
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="notify")
+
+    async def send(self, message):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._send, message)
+
+
+class WebhookTransport(_BlockingTransport):
+    def __init__(self, url, timeout=10.0, concurrency=CONCURRENCY):
+        super().__init__(concurrency)
+        self.url = url
+        self.timeout = timeout
+
+    def _send(self, message):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(message, separators=(",", ":")).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:  # raises on 4xx/5xx
+            response.read()
+
+
+class SmtpTransport(_BlockingTransport):
+    """One SMTP connection per sender thread, reopened after errors."""
+
+    def __init__(self, host, port=587, sender="no-reply@hms.local", username=None, password=None,
+                 starttls=True, timeout=10.0, concurrency=CONCURRENCY):
+        super().__init__(concurrency)
+        self.host, self.port, self.sender = host, port, sender
+        self.username, self.password, self.starttls = username, password, starttls
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                conn.starttls()
+            if self.username:
+                conn.login(self.username, self.password)
+            self._local.conn = conn
+        return conn
+
+    def _send(self, message):
+        if not message.get("email"):
+            raise DeliveryError("user has no email address")
+        mail = EmailMessage()
+        mail["From"] = self.sender
+        mail["To"] = message["email"]
+        mail["Subject"] = message["payload"].get("subject") or message["type"].replace("_", " ").capitalize()
+        mail.set_content(message["payload"].get("message") or json.dumps(message["payload"], indent=2))
+        try:
+            self._connection().send_message(mail)
+        except (smtplib.SMTPException, OSError):
+            self._local.conn = None
+            raise
+
+
+def make_transport(config):
+    kind = config.get("NOTIFY_TRANSPORT")
+    concurrency = config.get("NOTIFY_CONCURRENCY", CONCURRENCY)
+    if not kind:
+        raise TransportNotConfigured("NOTIFY_TRANSPORT is not set (webhook, smtp or, for development, stub)")
+    if kind == "stub":
+        return StubTransport()
+    if kind == "webhook":
+        if not config.get("NOTIFY_WEBHOOK_URL"):
+            raise TransportNotConfigured("NOTIFY_TRANSPORT=webhook needs NOTIFY_WEBHOOK_URL")
+        return WebhookTransport(config["NOTIFY_WEBHOOK_URL"], concurrency=concurrency)
+    if kind == "smtp":
+        if not config.get("SMTP_HOST"):
+            raise TransportNotConfigured("NOTIFY_TRANSPORT=smtp needs SMTP_HOST")
+        return SmtpTransport(
+            config["SMTP_HOST"], int(config.get("SMTP_PORT") or 587),
+            config.get("SMTP_SENDER") or "no-reply@hms.local", config.get("SMTP_USERNAME"),
+            config.get("SMTP_PASSWORD"), concurrency=concurrency,
+        )
+    raise TransportNotConfigured(f"Unknown NOTIFY_TRANSPORT {kind!r}")
+
+
+_transports = {}
+
+
+def transport():
+    kind = current_app.config.get("NOTIFY_TRANSPORT")
+    if kind not in _transports:
+        _transports[kind] = make_transport(current_app.config)
+    return _transports[kind]
+
+
+# --- sending ------------------------------------------------------------------
+
+
+class Sender:
+    """Sends messages concurrently (at most `concurrency` at a time) with retries."""
+
+    def __init__(self, transport, concurrency=CONCURRENCY, retries=RETRIES, backoff=BACKOFF):
+        self.transport = transport
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+
+    async def _send_one(self, slots, message):
+        error = None
+        for attempt in range(1, self.retries + 1):
+            try:
+                async with slots:
+                    await self.transport.send(message)
+                return message["id"], None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"[:1000]
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1) * (0.5 + random.random()))
+        return message["id"], error
+
+    async def send_all(self, messages):
+        """[(notification id, error or None)] for every message."""
+        slots = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self._send_one(slots, m) for m in messages))
+
+
+def _pending(after_id, limit, max_attempts):
+    stmt = (
+        select(Notification.id, Notification.user_id, Notification.type, Notification.payload, User.email,
+               User.full_name)
+        .outerjoin(User, User.id == Notification.user_id)
+        .where(Notification.delivered_at.is_(None), Notification.id > after_id,
+               Notification.delivery_attempts < max_attempts)
+        .order_by(Notification.id)
+        .limit(limit)
+    )
+    return [
+        {"id": r.id, "user_id": r.user_id, "type": r.type, "email": r.email, "name": r.full_name,
+         "payload": json.loads(r.payload) if r.payload else {}}
+        for r in db.session.execute(stmt)
+    ]
+
+
+_record_failure = (
+    update(Notification.__table__)
+    .where(Notification.__table__.c.id == bindparam("notification_id"))
+    .values(delivery_attempts=Notification.__table__.c.delivery_attempts + 1, delivery_error=bindparam("error"))
+)
+
+
+def deliver_pending(sender=None, batch_size=BATCH_SIZE, max_attempts=None):
+    """Send every undelivered notification; returns {"sent", "failed"}."""
+    config = current_app.config
+    sender = sender or Sender(transport(), concurrency=config.get("NOTIFY_CONCURRENCY", CONCURRENCY))
+    max_attempts = max_attempts or config.get("NOTIFY_MAX_ATTEMPTS", MAX_ATTEMPTS)
+    sent = failed = 0
+    after_id = 0
+    while True:
+        messages = _pending(after_id, batch_size, max_attempts)
+        db.session.rollback()  # don't hold a read transaction while sending
+        if not messages:
+            break
+        after_id = messages[-1]["id"]
+        results = asyncio.run(sender.send_all(messages))
+        delivered = [nid for nid, error in results if error is None]
+        failures = [{"notification_id": nid, "error": error} for nid, error in results if error is not None]
+        if delivered:
+            db.session.execute(
+                update(Notification)
+                .where(Notification.id.in_(delivered))
+                .values(delivered_at=datetime.utcnow(), delivery_error=None,
+                        delivery_attempts=Notification.delivery_attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+        if failures:
+            db.session.connection().execute(_record_failure, failures)
+        db.session.commit()
+        sent += len(delivered)
+        failed += len(failures)
+    return {"sent": sent, "failed": failed}
+
+
+# --- reminders ----------------------------------------------------------------
+
+
+def _due_appointments(day, after_id, limit):
+    doctor_user = aliased(User)
+    return db.session.execute(
+        select(Appointment.id, Appointment.date, Appointment.time_slot, PatientProfile.user_id,
+               doctor_user.full_name.label("doctor_name"))
+        .join(PatientProfile, PatientProfile.id == Appointment.patient_id)
+        .join(DoctorProfile, DoctorProfile.id == Appointment.doctor_id)
+        .join(doctor_user, doctor_user.id == DoctorProfile.user_id)
+        .where(Appointment.date == day, Appointment.id > after_id, Appointment.status == "booked")
+        .order_by(Appointment.id)
+        .limit(limit)
+    ).all()
+
+
+def _reminder(row):
+    when = f"{row.date.isoformat()} {row.time_slot}"
+    return {
+        "user_id": row.user_id,
+        "type": "reminder",
+        "dedupe_key": f"reminder:{row.id}:{row.date.isoformat()}",
+        "payload": json.dumps({
+            "appointment_id": row.id, "date": row.date.isoformat(), "time_slot": row.time_slot,
+            "doctor_name": row.doctor_name, "subject": "Appointment reminder",
+            "message": f"Reminder: you have an appointment with {row.doctor_name} on {when}.",
+        }),
+    }
+
+
+def schedule_reminders(day=None, batch_size=BATCH_SIZE):
+    """Create reminders for `day`'s booked appointments (default tomorrow); returns {"appointments", "created"}."""
+    day = day or date.today() + timedelta(days=1)
+    table = Notification.__table__
+    seen = created = 0
+    after_id = 0
+    while True:
+        rows = _due_appointments(day, after_id, batch_size)
+        if not rows:
+            break
+        after_id = rows[-1].id
+        conn = db.session.connection()
+        stmt = dialect_insert(conn, table).on_conflict_do_nothing(index_elements=["dedupe_key"])
+        created += conn.execute(stmt, [_reminder(r) for r in rows]).rowcount
+        db.session.commit()
+        seen += len(rows)
+    return {"appointments": seen, "created": created}
+
+
+@jobs.task("notifications.reminders", max_attempts=3)
+def _reminders_task(payload):
+    day = date.fromisoformat(payload["date"]) if payload.get("date") else None
+    return {**schedule_reminders(day), **deliver_pending()}
+
+
+@jobs.task("notifications.deliver", max_attempts=3)
+def _deliver_task(payload):
+    return deliver_pending()
+
+
+# --- in-app -------------------------------------------------------------------
+
+
+def unread_count(user_id):
+    """Served from the partial (user_id, is_read) index over unread rows."""
+    return db.session.execute(
+        select(func.count()).select_from(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read == False)  # noqa: E712
+    ).scalar()
+
+
+def mark_read(user_id, ids=None):
+    """Mark the user's notifications (all, or `ids`) read; returns how many changed."""
+    stmt = update(Notification).where(Notification.user_id == user_id, Notification.is_read == False)  # noqa: E712
+    if ids is not None:
+        stmt = stmt.where(Notification.id.in_(ids))
+    result = db.session.execute(stmt.values(is_read=True).execution_options(synchronize_session=False))
+    db.session.commit()
+    return result.rowcount
+
+
+def notification_json(n):
+    return {
+        "id": n.id,
+        "type": n.type,
+        "payload": json.loads(n.payload) if n.payload else None,
+        "is_read": n.is_read,
+        "created_at": n.created_at.isoformat() if n.created_at else None,
+    }
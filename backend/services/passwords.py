@@ -0,0 +1,177 @@
+# backend/services/passwords.py
+"""
+Password hashing with configurable parameters and a bounded worker pool.
+
+PASSWORD_HASH_METHOD / PASSWORD_SALT_LENGTH (app config or environment)
+select werkzeug hash parameters, e.g. "scrypt:32768:8:1" or
+"pbkdf2:sha256:600000". Hashes stored with other parameters are reported
+by `needs_rehash()` so LoginAPI can upgrade them on the next successful
+login.
+
+`verify_pooled()` / `hash_pooled()` run the deliberately expensive work on a
+pool of PASSWORD_HASH_WORKERS threads (hashlib releases the GIL while
+hashing), so a login burst uses at most that many cores instead of every
+request thread hashing at once. At most PASSWORD_HASH_QUEUE hashes may wait
+for a worker. A login that finds the queue full waits PASSWORD_HASH_WAIT
+seconds (0.1) for a place, then gets HashingBusy so the caller can shed
+load (LoginAPI answers 503) instead of holding its request thread.
+`hash_many()` obeys the same bound and, on top of it, keeps at most
+PASSWORD_HASH_WORKERS of a batch's hashes queued at a time, so bulk
+onboarding cannot fill the queue ahead of logins. PASSWORD_HASH_POOL=process
+switches to a process pool.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from functools import lru_cache
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = "scrypt"
+DEFAULT_SALT_LENGTH = 16
+WAIT_SECONDS = 0.1  # for a place in a full queue, per login
+BULK_WAIT_SECONDS = 5.0  # per hash of a batch, which waits for its own previous hashes too
+_RESULT_TIMEOUT = 30.0  # seconds a queued hash may take once it holds a slot
+
+
+class HashingBusy(Exception):
+    """Too many password hashes are already queued."""
+
+
+def _setting(name, default):
+    if has_app_context() and name in current_app.config:
+        return current_app.config[name]
+    return os.getenv(name, default)
+
+
+def hash_method():
+    return _setting("PASSWORD_HASH_METHOD", DEFAULT_METHOD)
+
+
+def salt_length():
+    return int(_setting("PASSWORD_SALT_LENGTH", DEFAULT_SALT_LENGTH))
+
+
+def hash_password(password, method=None, salt_len=None):
+    return generate_password_hash(password, method=method or hash_method(), salt_length=salt_len or salt_length())
+
+
+def verify_password(pw_hash, password):
+    return check_password_hash(pw_hash, password)
+
+
+@lru_cache(maxsize=8)
+def _canonical_method(method):
+    # werkzeug fills in default parameters ("scrypt" -> "scrypt:32768:8:1"),
+    # so derive the canonical prefix from a real hash.
+    return generate_password_hash("", method=method, salt_length=1).split("$", 1)[0]
+
+
+def needs_rehash(pw_hash):
+    """True if `pw_hash` was not produced with the configured parameters."""
+    return pw_hash.split("$", 1)[0] != _canonical_method(hash_method())
+
+
+class _Pool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._bulk_slots = None
+        self._pid = None
+        self._workers = None
+
+    def _ensure(self):
+        # Recreate after fork: executors do not survive into a child process.
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    workers = int(_setting("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+                    queue = int(_setting("PASSWORD_HASH_QUEUE", workers * 8))
+                    kind = _setting("PASSWORD_HASH_POOL", "thread")
+                    executor_cls = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+                    self._executor = executor_cls(max_workers=workers)
+                    self._slots = threading.BoundedSemaphore(workers + queue)
+                    self._bulk_slots = threading.BoundedSemaphore(workers)
+                    self._pid = os.getpid()
+                    self._workers = workers
+        return self._executor
+
+    def _submit(self, slots, timeout, fn, *args):
+        # The slot is held until the hash is done, not until the caller stops waiting for it.
+        if not slots.acquire(timeout=timeout):
+            raise HashingBusy("Password hashing queue is full")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def run(self, fn, *args, timeout=None):
+        self._ensure()
+        timeout = timeout if timeout is not None else float(_setting("PASSWORD_HASH_WAIT", WAIT_SECONDS))
+        future = self._submit(self._slots, timeout, fn, *args)
+        try:
+            return future.result(timeout=timeout + _RESULT_TIMEOUT)
+        except FuturesTimeout:
+            raise HashingBusy("Password hashing is taking too long") from None
+
+    def map(self, fn, *iterables, timeout=None):
+        # Each hash takes a queue slot like a login does, and a bulk slot: at most `workers` bulk
+        # hashes are queued at a time, so a login waits behind a few of them, not the whole batch.
+        self._ensure()
+        timeout = timeout if timeout is not None else BULK_WAIT_SECONDS
+        bulk_slots, results, pending = self._bulk_slots, [], []
+        try:
+            for args in zip(*iterables):
+                if not bulk_slots.acquire(timeout=timeout):
+                    raise HashingBusy("Password hashing queue is full")
+                try:
+                    future = self._submit(self._slots, timeout, fn, *args)
+                except BaseException:
+                    bulk_slots.release()
+                    raise
+                future.add_done_callback(lambda _: bulk_slots.release())
+                pending.append(future)
+            for future in pending:
+                results.append(future.result(timeout=timeout + _RESULT_TIMEOUT))
+        except FuturesTimeout:
+            raise HashingBusy("Password hashing is taking too long") from None
+        finally:
+            for future in pending:
+                future.cancel()
+        return results
+
+    def stats(self):
+        return {"workers": self._workers or 0, "pool": type(self._executor).__name__ if self._executor else None}
+
+
+_pool = _Pool()
+
+
+def verify_pooled(pw_hash, password, timeout=None):
+    return _pool.run(check_password_hash, pw_hash, password, timeout=timeout)
+
+
+def hash_pooled(password, timeout=None):
+    # Resolve settings here: pool workers have no app context.
+    return _pool.run(generate_password_hash, password, hash_method(), salt_length(), timeout=timeout)
+
+
+def hash_many(plaintexts, timeout=None):
+    """
+    Hashes of `plaintexts` (in order), computed on the pool in parallel; for bulk account creation.
+    Raises HashingBusy, like hash_pooled(), if the queue stays full.
+    """
+    plaintexts = list(plaintexts)
+    n = len(plaintexts)
+    return _pool.map(generate_password_hash, plaintexts, [hash_method()] * n, [salt_length()] * n,
+                     timeout=timeout)
+
+
+def pool_stats():
+    return _pool.stats()
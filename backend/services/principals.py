@@ -0,0 +1,110 @@
+# backend/services/principals.py
+"""
+Per-process cache of authenticated principals.
+
+`get_principal(user_id)` returns an immutable snapshot of the user's
+identity and status, so authenticated endpoints do not have to load the
+User row on every request. Entries are bounded (LRU) and expire after
+PRINCIPAL_CACHE_TTL seconds.
+
+A change made through the ORM in this process drops the user's entry at
+once (and again when that transaction commits). Other processes (gunicorn
+workers, the job worker) pick it up from `users.updated_at`: at most every
+PRINCIPAL_SYNC_SECONDS (default 1) a process asks for the users updated
+since its last look and drops their entries. So a deactivation or blacklist
+takes effect everywhere within about a second; 0 checks on every lookup.
+Core UPDATEs set `updated_at` too (it is the column's onupdate default),
+unless they pass their own value. Users are deactivated rather than
+deleted; a deleted user stays cached in other processes until the TTL.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import object_session
+
+from models.models import db, User
+from services.cache import TTLCache, invalidate_on_commit
+
+Principal = namedtuple(
+    "Principal", ["id", "username", "email", "role", "full_name", "phone", "is_active", "blacklisted"]
+)
+
+_cache = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60")),
+)
+SYNC_SECONDS = float(os.getenv("PRINCIPAL_SYNC_SECONDS", "1"))
+SYNC_GRACE = timedelta(seconds=5)  # re-read a little history: commits can land out of order
+
+_sync_lock = threading.Lock()
+_sync = {"pid": None, "next": 0.0, "watermark": None, "seen": {}}
+
+
+def _load(user_id):
+    row = db.session.execute(select(*(getattr(User, f) for f in Principal._fields)).where(User.id == user_id)).first()
+    return Principal(*row) if row else None
+
+
+def _maybe_sync():
+    """Drop the entries of users other processes have updated since the last look."""
+    if time.monotonic() < _sync["next"] and _sync["pid"] == os.getpid():
+        return
+    with _sync_lock:
+        if time.monotonic() < _sync["next"] and _sync["pid"] == os.getpid():
+            return
+        now = datetime.utcnow()
+        if _sync["pid"] != os.getpid():
+            # a forked worker must not trust what its parent cached
+            _cache.invalidate()
+            _sync.update(pid=os.getpid(), watermark=now, seen={})
+        else:
+            after = _sync["watermark"] - SYNC_GRACE
+            seen = {}
+            for user_id, updated_at in db.session.execute(
+                select(User.id, User.updated_at).where(User.updated_at > after)
+            ):
+                if _sync["seen"].get(user_id) != updated_at:
+                    _cache.invalidate(user_id)
+                seen[user_id] = updated_at
+                _sync["watermark"] = max(_sync["watermark"], updated_at)
+            _sync["seen"] = seen
+        _sync["next"] = time.monotonic() + SYNC_SECONDS
+
+
+def get_principal(user_id):
+    """Cached Principal for `user_id`, or None if the user does not exist."""
+    _maybe_sync()
+    principal = _cache.get(user_id)
+    if principal is None:
+        principal = _load(user_id)
+        if principal is not None:
+            _cache.set(user_id, principal)
+    return principal
+
+
+def is_allowed(principal):
+    return principal is not None and principal.is_active and not principal.blacklisted
+
+
+def invalidate(user_id=None):
+    if user_id is None:
+        _cache.invalidate()
+    else:
+        _cache.invalidate(user_id)
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    _cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        invalidate_on_commit(session, _cache, target.id)
@@ -0,0 +1,129 @@
+# backend/services/profiler.py
+"""
+Opt-in sampling profiler for slow requests.
+
+With PROFILE_SLOW_MS set, a background thread samples the Python stack of
+every thread that is serving an instrumented request (see
+services/metrics.py) every PROFILE_INTERVAL_MS. When a request finishes
+slower than PROFILE_SLOW_MS its samples are written to PROFILE_DIR as a
+`.folded` file, one `frame;frame;...;leaf count` line per distinct stack,
+which flamegraph.pl, speedscope or inferno render directly:
+
+    flamegraph.pl instance/profiles/*-appointment_list-*.folded > list.svg
+
+PROFILE_SAMPLE_RATE (0-1) limits sampling to a fraction of requests when
+even the sampler's small overhead matters. Fast requests discard their
+samples. Only threads are visible to the sampler, so it sees nothing under
+the gevent server profile.
+"""
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app
+
+log = logging.getLogger(__name__)
+
+INTERVAL_MS = 5.0
+
+
+class Sampler:
+    """Samples the stacks of registered threads until they are unregistered."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}  # thread id -> Counter of folded stacks
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, ident):
+        with self._lock:
+            self._active[ident] = Counter()
+            if self._thread is None or not self._thread.is_alive():
+                # started lazily so every forked server worker gets its own thread
+                self._thread = threading.Thread(target=self._run, name="hms-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, ident):
+        with self._lock:
+            return self._active.pop(ident, None)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for ident, samples in active:
+                frame = frames.get(ident)
+                if frame is not None and ident != own:
+                    samples[fold(frame)] += 1
+
+
+def fold(frame):
+    """`file:function;...` for `frame` and its callers, outermost first."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def _get_sampler(interval):
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None or _sampler.interval != interval:
+            _sampler = Sampler(interval)
+        return _sampler
+
+
+def enabled():
+    return bool(current_app.config.get("PROFILE_SLOW_MS"))
+
+
+def start_request():
+    if not enabled():
+        return
+    rate = current_app.config.get("PROFILE_SAMPLE_RATE", 1.0)
+    if rate < 1.0 and random.random() >= rate:
+        return
+    interval = current_app.config.get("PROFILE_INTERVAL_MS", INTERVAL_MS) / 1000.0
+    _get_sampler(interval).add(threading.get_ident())
+
+
+def discard_request():
+    if _sampler is not None:
+        _sampler.remove(threading.get_ident())
+
+
+def finish_request(endpoint, elapsed):
+    """Stop sampling this thread; dump its stacks if the request was slow. Returns the file path or None."""
+    if _sampler is None:
+        return None
+    samples = _sampler.remove(threading.get_ident())
+    threshold = current_app.config.get("PROFILE_SLOW_MS")
+    if not samples or not threshold or elapsed * 1000.0 < threshold:
+        return None
+    directory = current_app.config.get("PROFILE_DIR") or os.path.join(current_app.instance_path, "profiles")
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = os.path.join(directory, f"{stamp}-{endpoint}-{elapsed * 1000.0:.0f}ms-{os.getpid()}.folded")
+    with open(path, "w") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    log.warning("Slow request %s took %.0f ms; %d samples written to %s",
+                endpoint, elapsed * 1000.0, sum(samples.values()), path)
+    return path
@@ -0,0 +1,136 @@
+# backend/services/replicas.py
+"""
+Read-replica routing for `db.session`.
+
+Replica engines are the SQLALCHEMY_BINDS named `replica_<n>`, built from
+DB_REPLICA_URLS by services/database.py. Code inside `read_only()` (a
+context manager that also works as a decorator) has its reads served by a
+replica:
+
+    @replicas.read_only()
+    def get(self): ...
+
+The session keeps one replica for the rest of its transaction (so a
+request sees one consistent snapshot), picked round-robin or, with
+DB_REPLICA_STRATEGY=least_loaded, as the replica with the fewest checked
+out connections. Everything else still goes to the primary: flushes and
+INSERT/UPDATE/DELETE statements, every query after the session has written
+in the current transaction, and all queries of a user who committed a write
+within the last DB_REPLICA_STICKY_SECONDS, so users read their own writes
+despite replication lag. Stickiness is remembered per server process; give
+it at least the replicas' usual lag.
+"""
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+PREFIX = "replica_"
+STRATEGIES = ("round_robin", "least_loaded")
+STICKY_SECONDS = 5.0
+
+_reading = ContextVar("hms_read_only", default=False)
+_round_robin = itertools.count()
+_sticky = {}  # user id -> monotonic deadline
+_sticky_lock = threading.Lock()
+
+
+@contextmanager
+def read_only():
+    """Serve the reads made inside the block from a replica (when configured)."""
+    token = _reading.set(True)
+    try:
+        yield
+    finally:
+        _reading.reset(token)
+
+
+def _current_user():
+    if not has_request_context():
+        return None
+    try:
+        from flask_jwt_extended import get_jwt_identity
+
+        return get_jwt_identity()
+    except RuntimeError:  # no JWT verified for this request
+        return None
+
+
+def stick(user_id, seconds):
+    now = time.monotonic()
+    with _sticky_lock:
+        _sticky[str(user_id)] = now + seconds
+        if len(_sticky) > 10000:
+            for key in [k for k, deadline in _sticky.items() if deadline <= now]:
+                del _sticky[key]
+
+
+def is_sticky(user_id):
+    if user_id is None:
+        return False
+    deadline = _sticky.get(str(user_id))
+    return deadline is not None and deadline > time.monotonic()
+
+
+def replica_keys(engines):
+    return sorted(key for key in engines if key and key.startswith(PREFIX))
+
+
+def choose(engines, strategy="round_robin"):
+    """Key of the replica to use next, or None when there are no replicas."""
+    keys = replica_keys(engines)
+    if not keys:
+        return None
+    if strategy == "least_loaded":
+        loads = {key: getattr(engines[key].pool, "checkedout", lambda: 0)() for key in keys}
+        lowest = min(loads.values())
+        keys = [key for key in keys if loads[key] == lowest]
+    return keys[next(_round_robin) % len(keys)]
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends `read_only()` reads to a replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or getattr(clause, "is_dml", False):
+                self.info["wrote"] = True
+            elif _reading.get() and not self.info.get("wrote"):
+                engine = self._replica()
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica(self):
+        engines = self._db.engines
+        key = self.info.get("replica")
+        if key is None:
+            if is_sticky(_current_user()):
+                return None
+            key = choose(engines, current_app.config.get("DB_REPLICA_STRATEGY", "round_robin"))
+            if key is None:
+                return None
+            self.info["replica"] = key
+        return engines[key]
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session):
+    session.info.pop("replica", None)
+    if session.info.pop("wrote", False):
+        seconds = current_app.config.get("DB_REPLICA_STICKY_SECONDS", STICKY_SECONDS)
+        user_id = _current_user()
+        if seconds and user_id is not None and replica_keys(session._db.engines):
+            stick(user_id, seconds)
+
+
+@event.listens_for(RoutingSession, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop("replica", None)
+        session.info.pop("wrote", None)
@@ -0,0 +1,275 @@
+# backend/services/reports.py
+"""
+Daily per-doctor rollups and the MonthlyReport built from them.
+
+`doctor_daily_stats` holds one row per doctor and day with the number of
+appointments booked for that day, how many were completed or cancelled, the
+revenue of the completed ones (the doctor's consultation_fee) and the number
+of treatments that scheduled a follow-up. An after_flush hook turns every
+Appointment / Treatment change into deltas on those rows (one upsert per
+flush), so status changes cost a few index lookups instead of a recount.
+Revenue uses the fee at the time of the change; `rebuild_rollups()`
+recomputes everything with current fees and must be run after bulk loads
+that bypass the ORM.
+
+A month's reports then read about 30 rollup rows per doctor. `build_month()`
+splits the doctors into chunks rendered concurrently (each chunk reads its
+rollups, from a read replica if configured, and writes one JSON file per
+doctor under REPORT_DIR) and upserts
+all MonthlyReport rows in a single statement at the end.
+"""
+import calendar
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import case, delete, event, func, select
+
+from models.models import db, Appointment, DoctorDailyStats, DoctorProfile, MonthlyReport, Treatment, User
+from services import jobs, replicas
+from services.db_utils import apply_increments, attr_changed, dialect_insert, previous_value, track_attributes
+
+METRICS = ("bookings", "completions", "cancellations", "revenue", "followups")
+CHUNK_SIZE = 50  # doctors rendered per task
+_BATCH = 5000
+_TABLE = DoctorDailyStats.__table__
+
+track_attributes(Appointment, "status", "date", "doctor_id")
+track_attributes(Treatment, "doctor_id", "followup_date", "created_at")
+
+
+def report_dir():
+    path = current_app.config.get("REPORT_DIR") or os.path.join(current_app.instance_path, "reports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _as_date(value):
+    # func.date() comes back as a string on SQLite
+    if isinstance(value, datetime):
+        return value.date()
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+# --- rollups ----------------------------------------------------------------
+
+
+def _appointment_counts(status, fee):
+    completed = status == "completed"
+    return {
+        "bookings": 1,
+        "completions": int(completed),
+        "cancellations": int(status == "cancelled"),
+        "revenue": (fee or 0) if completed else 0,
+    }
+
+
+def apply_deltas(conn, deltas):
+    """Add a {(doctor_id, date): {metric: delta}} mapping onto the rollup table."""
+    rows = [
+        {"doctor_id": doctor_id, "date": day, **{m: values.get(m, 0) for m in METRICS}}
+        for (doctor_id, day), values in deltas.items()
+        if any(values.values())
+    ]
+    apply_increments(conn, _TABLE, ["doctor_id", "date"], rows)
+
+
+def rebuild_rollups():
+    """Recompute every rollup row from appointments and treatments; returns the row count."""
+    completed = Appointment.status == "completed"
+    appointments = (
+        select(
+            Appointment.doctor_id,
+            Appointment.date,
+            func.count(),
+            func.sum(case((completed, 1), else_=0)),
+            func.sum(case((Appointment.status == "cancelled", 1), else_=0)),
+            func.sum(case((completed, func.coalesce(DoctorProfile.consultation_fee, 0)), else_=0)),
+        )
+        .join(DoctorProfile, DoctorProfile.id == Appointment.doctor_id)
+        .group_by(Appointment.doctor_id, Appointment.date)
+    )
+    treatment_day = func.date(Treatment.created_at)
+    followups = (
+        select(Treatment.doctor_id, treatment_day, func.count())
+        .where(Treatment.followup_date.isnot(None))
+        .group_by(Treatment.doctor_id, treatment_day)
+    )
+
+    totals = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    for doctor_id, day, bookings, completions, cancellations, revenue in db.session.execute(appointments):
+        totals[(doctor_id, _as_date(day))].update(
+            bookings=bookings, completions=completions, cancellations=cancellations, revenue=revenue
+        )
+    for doctor_id, day, count in db.session.execute(followups):
+        totals[(doctor_id, _as_date(day))]["followups"] = count
+
+    rows = [{"doctor_id": doctor_id, "date": day, **values} for (doctor_id, day), values in totals.items()]
+    db.session.execute(delete(_TABLE))
+    for i in range(0, len(rows), _BATCH):
+        db.session.execute(_TABLE.insert(), rows[i:i + _BATCH])
+    db.session.commit()
+    return len(rows)
+
+
+@event.listens_for(db.session, "after_flush")
+def _track_changes(session, flush_context):
+    # (doctor_id, date) -> metric deltas; appointment changes are recorded as
+    # (sign, doctor_id, date, status) until the doctors' fees are known.
+    deltas = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    appointment_changes = []
+    new, dirty = session.new, session.dirty
+
+    for obj in new:
+        if isinstance(obj, Appointment):
+            appointment_changes.append((1, obj.doctor_id, obj.date, obj.status or "booked"))
+        elif isinstance(obj, Treatment) and obj.followup_date is not None:
+            deltas[(obj.doctor_id, _as_date(obj.created_at))]["followups"] += 1
+
+    for obj in dirty:
+        if isinstance(obj, Appointment):
+            if any(attr_changed(obj, a) for a in ("status", "date", "doctor_id")):
+                appointment_changes.append((
+                    -1, previous_value(obj, "doctor_id"), previous_value(obj, "date"),
+                    previous_value(obj, "status", "booked"),
+                ))
+                appointment_changes.append((1, obj.doctor_id, obj.date, obj.status or "booked"))
+        elif isinstance(obj, Treatment):
+            if any(attr_changed(obj, a) for a in ("doctor_id", "followup_date", "created_at")):
+                if previous_value(obj, "followup_date") is not None:
+                    key = (previous_value(obj, "doctor_id"), _as_date(previous_value(obj, "created_at")))
+                    deltas[key]["followups"] -= 1
+                if obj.followup_date is not None:
+                    deltas[(obj.doctor_id, _as_date(obj.created_at))]["followups"] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Appointment):
+            appointment_changes.append((
+                -1, previous_value(obj, "doctor_id"), previous_value(obj, "date"),
+                previous_value(obj, "status", "booked"),
+            ))
+        elif isinstance(obj, Treatment) and previous_value(obj, "followup_date") is not None:
+            key = (previous_value(obj, "doctor_id"), _as_date(previous_value(obj, "created_at")))
+            deltas[key]["followups"] -= 1
+
+    if not (appointment_changes or any(any(v.values()) for v in deltas.values())):
+        return
+
+    conn = session.connection()
+    fees = {}
+    paid = {doctor_id for _, doctor_id, _, status in appointment_changes if status == "completed"}
+    if paid:
+        fees = dict(conn.execute(
+            select(DoctorProfile.id, DoctorProfile.consultation_fee).where(DoctorProfile.id.in_(paid))
+        ).all())
+    for sign, doctor_id, day, status in appointment_changes:
+        row = deltas[(doctor_id, day)]
+        for metric, value in _appointment_counts(status, fees.get(doctor_id)).items():
+            row[metric] += sign * value
+    apply_deltas(conn, deltas)
+
+
+# --- monthly reports ----------------------------------------------------------
+
+
+def month_bounds(year, month):
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _report_path(directory, doctor_id, year, month):
+    return os.path.join(directory, f"doctor-{doctor_id}-{year:04d}-{month:02d}.json")
+
+
+def _render_chunk(engine, directory, year, month, doctor_ids):
+    """Write the report files of `doctor_ids`; returns their MonthlyReport rows and totals."""
+    first, last = month_bounds(year, month)
+    with engine.connect() as conn:
+        names = dict(conn.execute(
+            select(DoctorProfile.id, User.full_name)
+            .join(User, User.id == DoctorProfile.user_id)
+            .where(DoctorProfile.id.in_(doctor_ids))
+        ).all())
+        days = defaultdict(list)
+        for row in conn.execute(
+            select(_TABLE)
+            .where(_TABLE.c.doctor_id.in_(doctor_ids), _TABLE.c.date.between(first, last))
+            .order_by(_TABLE.c.doctor_id, _TABLE.c.date)
+        ):
+            days[row.doctor_id].append(row)
+
+    now = datetime.utcnow()
+    reports, totals = [], dict.fromkeys(METRICS, 0)
+    for doctor_id in doctor_ids:
+        daily = [{"date": r.date.isoformat(), **{m: getattr(r, m) for m in METRICS}} for r in days[doctor_id]]
+        summary = {m: sum(d[m] for d in daily) for m in METRICS}
+        for metric, value in summary.items():
+            totals[metric] += value
+        path = _report_path(directory, doctor_id, year, month)
+        with open(path + ".part", "w", encoding="utf-8") as out:
+            json.dump({
+                "doctor_id": doctor_id, "doctor_name": names.get(doctor_id), "year": year, "month": month,
+                "generated_at": now.isoformat(), "totals": summary, "days": daily,
+            }, out, separators=(",", ":"))
+        os.replace(path + ".part", path)
+        reports.append({"doctor_id": doctor_id, "month": month, "year": year, "report_path": path,
+                        "created_at": now, "updated_at": now})
+    return reports, totals
+
+
+def _save_reports(conn, reports):
+    stmt = dialect_insert(conn, MonthlyReport.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["doctor_id", "month", "year"],
+        set_={"report_path": stmt.excluded.report_path, "updated_at": stmt.excluded.updated_at},
+    )
+    conn.execute(stmt, reports)
+
+
+def build_month(year, month, doctor_ids=None, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    (Re)generate the MonthlyReport of every doctor (or `doctor_ids`) for a month.
+
+    Returns {"doctors", "workers", **totals of every metric}.
+    """
+    if doctor_ids is None:
+        doctor_ids = db.session.execute(select(DoctorProfile.id).order_by(DoctorProfile.id)).scalars().all()
+    doctor_ids = list(doctor_ids)
+    chunks = [doctor_ids[i:i + chunk_size] for i in range(0, len(doctor_ids), chunk_size)]
+    workers = max(1, min(workers or current_app.config.get("REPORT_WORKERS") or 4, len(chunks) or 1))
+    with replicas.read_only():
+        engine = db.session.get_bind()  # a replica when one is configured
+    directory = report_dir()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda ids: _render_chunk(engine, directory, year, month, ids), chunks))
+
+    summary = {"doctors": len(doctor_ids), "workers": workers, **dict.fromkeys(METRICS, 0)}
+    reports = []
+    for chunk_reports, totals in results:
+        reports.extend(chunk_reports)
+        for metric, value in totals.items():
+            summary[metric] += value
+    if reports:
+        _save_reports(db.session.connection(), reports)
+    db.session.commit()
+    return summary
+
+
+def previous_month(today=None):
+    today = today or date.today()
+    return (today.year - 1, 12) if today.month == 1 else (today.year, today.month - 1)
+
+
+@jobs.task("reports.monthly", max_attempts=3)
+def _build_month_task(payload):
+    return build_month(payload["year"], payload["month"])
+
+
+def queue_month(year, month):
+    """Queue the month's report run once (repeat calls return the same Job)."""
+    return jobs.enqueue("reports.monthly", {"year": year, "month": month},
+                        idempotency_key=f"monthly-report:{year:04d}-{month:02d}")
+
@@ -0,0 +1,349 @@
+# backend/services/retention.py
+"""
+Retention policies for tables that only ever grow.
+
+* appointments: completed and cancelled appointments dated before the
+  first day of the month RETENTION_APPOINTMENT_MONTHS months ago are
+  archived, with their treatments and status history, to gzip NDJSON files
+  partitioned by month (ARCHIVE_DIR/appointments/YYYY-MM.ndjson.gz, one
+  appointment per line), then deleted. A later run appends to a partition
+  as another gzip member, which gzip readers concatenate transparently.
+* notifications: read notifications older than
+  RETENTION_READ_NOTIFICATION_DAYS and unread ones older than
+  RETENTION_UNREAD_NOTIFICATION_DAYS are deleted.
+* exports: completed and failed ExportJobs older than RETENTION_EXPORT_DAYS
+  are deleted with their files, as are files in EXPORT_DIR that no export
+  refers to any more (left-over `.part` files included).
+
+A policy whose setting is 0 is skipped. Rows go in chunks of
+RETENTION_CHUNK_SIZE, each archived (files written and closed) and deleted
+in its own short transaction, so no run holds locks for long and an
+interrupted run loses nothing: it re-archives at most the chunk it was
+deleting, so readers of the archive should keep the last line per
+appointment id.
+
+Archived appointments leave the dashboard counters, slot bitmaps and
+agendas (all adjusted per chunk) but stay in the daily rollups behind the
+monthly reports; note that `reports.rebuild_rollups()` recomputes those
+from the live tables only.
+
+`report()` is the dry run: per policy, the rows (and for appointments the
+archive partitions) a run would remove and the bytes it would reclaim,
+counted as the text length of the rows' values plus the size of the files;
+index entries come on top.
+
+    python app.py retention [--dry-run] [--policy appointments|notifications|exports]
+"""
+import gzip
+import os
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import String, and_, cast, delete, extract, func, or_, select
+
+from models.models import db, Appointment, AppointmentStatusHistory, ExportJob, Notification, Treatment
+from services import agenda, dashboard_stats, exports, http_cache, jobs, serializers, slots, timeline
+
+POLICIES = ("appointments", "notifications", "exports")
+APPOINTMENT_MONTHS = 24
+READ_NOTIFICATION_DAYS = 30
+UNREAD_NOTIFICATION_DAYS = 180
+EXPORT_DAYS = 7
+CHUNK_SIZE = 1000
+ARCHIVED_STATUSES = ("completed", "cancelled")
+EXPORT_STATUSES = ("completed", "failed")
+
+
+def _setting(name, default):
+    return current_app.config.get(name, default)
+
+
+def chunk_size():
+    return _setting("RETENTION_CHUNK_SIZE", CHUNK_SIZE)
+
+
+def archive_dir():
+    path = _setting("ARCHIVE_DIR", None) or os.path.join(current_app.instance_path, "archive")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _row_bytes(model, *where):
+    """Approximate bytes of the rows of `model` matching `where`: the text length of all their values."""
+    size = sum(func.coalesce(func.length(cast(column, String)), 0) for column in model.__table__.columns)
+    return db.session.scalar(select(func.coalesce(func.sum(size), 0)).where(*where)) or 0
+
+
+def _count(model, *where):
+    return db.session.scalar(select(func.count()).select_from(model).where(*where))
+
+
+# --- appointments -------------------------------------------------------------------------
+
+
+def appointment_cutoff(today=None):
+    """First day of the month RETENTION_APPOINTMENT_MONTHS months before `today`'s month, or None."""
+    months = _setting("RETENTION_APPOINTMENT_MONTHS", APPOINTMENT_MONTHS)
+    if not months:
+        return None
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _archivable(cutoff):
+    return (Appointment.date < cutoff, Appointment.status.in_(ARCHIVED_STATUSES))
+
+
+def _appointments_report(today):
+    cutoff = appointment_cutoff(today)
+    if cutoff is None:
+        return {"enabled": False}
+    ids = select(Appointment.id).where(*_archivable(cutoff))
+    children = ((Treatment, Treatment.appointment_id.in_(ids)),
+                (AppointmentStatusHistory, AppointmentStatusHistory.appointment_id.in_(ids)))
+    year, month = extract("year", Appointment.date), extract("month", Appointment.date)
+    partitions = db.session.execute(
+        select(year, month, func.count()).where(*_archivable(cutoff)).group_by(year, month).order_by(year, month)
+    ).all()
+    return {
+        "enabled": True,
+        "cutoff": cutoff,
+        "rows": {
+            "appointments": _count(Appointment, *_archivable(cutoff)),
+            **{model.__tablename__: _count(model, where) for model, where in children},
+        },
+        "bytes": _row_bytes(Appointment, *_archivable(cutoff)) + sum(_row_bytes(m, w) for m, w in children),
+        "partitions": {f"{int(y):04d}-{int(m):02d}": n for y, m, n in partitions},
+    }
+
+
+def _records(ids):
+    """Archive records (appointment columns plus treatments and status history) for `ids`."""
+    appointments = db.session.execute(select(Appointment.__table__).where(Appointment.id.in_(ids))).all()
+    children = defaultdict(lambda: {"treatments": [], "status_history": []})
+    for key, model in (("treatments", Treatment), ("status_history", AppointmentStatusHistory)):
+        rows = db.session.execute(
+            select(model.__table__).where(model.appointment_id.in_(ids)).order_by(model.id)
+        )
+        for row in rows:
+            children[row.appointment_id][key].append(row._asdict())
+    return [{**row._asdict(), **children[row.id]} for row in appointments]
+
+
+def _append_partitions(records):
+    """Append `records` to their month's archive file; returns {partition: records written}."""
+    directory = os.path.join(archive_dir(), "appointments")
+    os.makedirs(directory, exist_ok=True)
+    by_month = defaultdict(list)
+    for record in records:
+        by_month[record["date"].strftime("%Y-%m")].append(record)
+    for month, items in sorted(by_month.items()):
+        with open(os.path.join(directory, f"{month}.ndjson.gz"), "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="ab", compresslevel=exports.COMPRESS_LEVEL) as f:
+                for item in items:
+                    f.write(serializers.dumps(item) + b"\n")
+            # on disk before the rows are deleted
+            raw.flush()
+            os.fsync(raw.fileno())
+    return {month: len(items) for month, items in by_month.items()}
+
+
+def _archive_appointments(today):
+    cutoff = appointment_cutoff(today)
+    if cutoff is None:
+        return {"enabled": False}
+    result = {"enabled": True, "cutoff": cutoff, "rows": Counter(), "partitions": Counter(), "chunks": 0}
+    # oldest first over ix_appointment_date_id; deleted rows drop out of the next scan
+    stmt = select(Appointment.id).where(*_archivable(cutoff)).order_by(Appointment.date, Appointment.id)
+    while True:
+        ids = list(db.session.scalars(stmt.limit(chunk_size())))
+        if not ids:
+            break
+        records = _records(ids)
+        result["partitions"].update(_append_partitions(records))
+        conn = db.session.connection()
+        result["rows"]["treatments"] += conn.execute(delete(Treatment).where(Treatment.appointment_id.in_(ids))).rowcount
+        result["rows"]["appointment_status_history"] += conn.execute(
+            delete(AppointmentStatusHistory).where(AppointmentStatusHistory.appointment_id.in_(ids))
+        ).rowcount
+        result["rows"]["appointments"] += conn.execute(delete(Appointment).where(Appointment.id.in_(ids))).rowcount
+        _forget(conn, records)
+        db.session.commit()
+        result["chunks"] += 1
+    dashboard_stats.invalidate()
+    http_cache.invalidate("dashboard")
+    return {**result, "rows": dict(result["rows"]), "partitions": dict(sorted(result["partitions"].items()))}
+
+
+def _forget(conn, records):
+    """Take deleted appointments out of the structures the flush hooks maintain (they miss Core deletes)."""
+    deltas = Counter()
+    for record in records:
+        deltas[("appointments", record["status"])] -= 1
+        dashboard_stats.add_day_delta(deltas, record["date"], record["status"], -1)
+    dashboard_stats.apply_deltas(conn, deltas)
+    days = {(record["doctor_id"], record["date"]) for record in records}
+    slots.refresh_days(conn, days)
+    agenda.forget_days(conn, days)
+    for patient_id in {record["patient_id"] for record in records}:
+        timeline.invalidate(patient_id)
+
+
+# --- notifications ----------------------------------------------------------------------------
+
+
+def _notification_filter(now):
+    read_days = _setting("RETENTION_READ_NOTIFICATION_DAYS", READ_NOTIFICATION_DAYS)
+    unread_days = _setting("RETENTION_UNREAD_NOTIFICATION_DAYS", UNREAD_NOTIFICATION_DAYS)
+    clauses = []
+    if read_days:
+        clauses.append(and_(Notification.is_read.is_(True), Notification.created_at < now - timedelta(days=read_days)))
+    if unread_days:
+        clauses.append(and_(Notification.is_read.is_(False), Notification.created_at < now - timedelta(days=unread_days)))
+    return or_(*clauses) if clauses else None
+
+
+def _notifications_report(now):
+    where = _notification_filter(now)
+    if where is None:
+        return {"enabled": False}
+    read = _count(Notification, where, Notification.is_read.is_(True))
+    return {
+        "enabled": True,
+        "rows": {"notifications": _count(Notification, where)},
+        "read": read,
+        "bytes": _row_bytes(Notification, where),
+    }
+
+
+def _purge_notifications(now):
+    where = _notification_filter(now)
+    if where is None:
+        return {"enabled": False}
+    deleted, chunks, last_id = 0, 0, 0
+    while True:
+        # keyset over the primary key so every chunk scans on from where the last one stopped
+        ids = list(db.session.scalars(
+            select(Notification.id).where(where, Notification.id > last_id).order_by(Notification.id).limit(chunk_size())
+        ))
+        if not ids:
+            break
+        deleted += db.session.execute(delete(Notification).where(Notification.id.in_(ids))).rowcount
+        db.session.commit()
+        chunks += 1
+        last_id = ids[-1]
+    return {"enabled": True, "rows": {"notifications": deleted}, "chunks": chunks}
+
+
+# --- exports ---------------------------------------------------------------------------------
+
+
+def _expired_exports(now):
+    days = _setting("RETENTION_EXPORT_DAYS", EXPORT_DAYS)
+    if not days:
+        return None
+    return and_(
+        ExportJob.status.in_(EXPORT_STATUSES),
+        func.coalesce(ExportJob.completed_at, ExportJob.created_at) < now - timedelta(days=days),
+    )
+
+
+def _export_files(now, where):
+    """Files to remove: those of expired exports plus unreferenced files in EXPORT_DIR, with their sizes."""
+    directory = os.path.realpath(exports.export_dir())
+    def paths(*criteria):
+        stmt = select(ExportJob.file_path).where(*criteria, ExportJob.file_path.isnot(None))
+        return {os.path.realpath(path) for path in db.session.scalars(stmt)}
+
+    expired, kept = paths(where), paths(~where)
+    cutoff = (now - timedelta(days=_setting("RETENTION_EXPORT_DAYS", EXPORT_DAYS))).timestamp()
+    files = {}
+    for entry in os.scandir(directory):
+        if not entry.is_file() or entry.path in kept:  # scandir joins onto the real directory path
+            continue
+        stat = entry.stat()
+        # unreferenced files may belong to an export still being written, so they also have to be old
+        if entry.path in expired or stat.st_mtime < cutoff:
+            files[entry.path] = stat.st_size
+    return files
+
+
+def _exports_report(now):
+    where = _expired_exports(now)
+    if where is None:
+        return {"enabled": False}
+    files = _export_files(now, where)
+    return {
+        "enabled": True,
+        "rows": {"export_jobs": _count(ExportJob, where)},
+        "files": len(files),
+        "bytes": _row_bytes(ExportJob, where) + sum(files.values()),
+    }
+
+
+def _purge_exports(now):
+    where = _expired_exports(now)
+    if where is None:
+        return {"enabled": False}
+    files = _export_files(now, where)
+    removed = reclaimed = 0
+    for path, size in files.items():
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        removed += 1
+        reclaimed += size
+    deleted = 0
+    while True:
+        ids = list(db.session.scalars(select(ExportJob.id).where(where).order_by(ExportJob.id).limit(chunk_size())))
+        if not ids:
+            break
+        deleted += db.session.execute(delete(ExportJob).where(ExportJob.id.in_(ids))).rowcount
+        db.session.commit()
+    return {"enabled": True, "rows": {"export_jobs": deleted}, "files": removed, "file_bytes": reclaimed}
+
+
+# --- entry points -------------------------------------------------------------------------------
+
+
+def _check(policies):
+    if policies is not None and not isinstance(policies, (list, tuple)):
+        raise ValueError("policies must be a list")
+    policies = tuple(policies or POLICIES)
+    unknown = [p for p in policies if p not in POLICIES]
+    if unknown:
+        raise ValueError(f"Unknown retention policies {', '.join(unknown)}; known: {', '.join(POLICIES)}")
+    return policies
+
+
+def report(policies=None, now=None):
+    """Dry run: what `run()` would remove and reclaim per policy, without changing anything."""
+    now = now or datetime.utcnow()
+    builders = {"appointments": lambda: _appointments_report(now.date()),
+                "notifications": lambda: _notifications_report(now),
+                "exports": lambda: _exports_report(now)}
+    return {policy: builders[policy]() for policy in _check(policies)}
+
+
+def run(policies=None, now=None):
+    """Apply the retention policies; returns what each one archived and deleted."""
+    now = now or datetime.utcnow()
+    runners = {"appointments": lambda: _archive_appointments(now.date()),
+               "notifications": lambda: _purge_notifications(now),
+               "exports": lambda: _purge_exports(now)}
+    return {policy: runners[policy]() for policy in _check(policies)}
+
+
+@jobs.task("retention.run", max_attempts=3)
+def _run_task(payload):
+    return run(payload.get("policies"))
+
+
+def queue_run(policies=None):
+    """Queue a retention run for a worker, at most once per day and set of policies."""
+    policies = sorted(_check(policies))
+    return jobs.enqueue("retention.run", {"policies": policies},
+                        idempotency_key=f"retention:{date.today().isoformat()}:{','.join(policies)}")
@@ -0,0 +1,334 @@
+# backend/services/revocation.py
+"""
+JWT revocation (logout) store, checked by JWTManager's blocklist loader.
+
+Revoked JTIs live in a shared backend (the `revoked_tokens` table by
+default, Redis when REVOCATION_BACKEND=redis, or a process-local dict that
+stands in for Redis in single-process setups). Each process keeps:
+
+* a bloom filter of every live revoked JTI, so a token that was never
+  revoked - nearly every request - is answered without touching storage;
+* a bounded TTL set of JTIs known to be revoked, each entry living until
+  the token itself would have expired, which absorbs bloom hits for
+  revoked tokens that keep being replayed.
+
+Only bloom positives that miss the local set go to the backend. Revocations
+from other processes are pulled in every REVOCATION_SYNC_SECONDS (one
+indexed range query on `revoked_at`), which bounds how long a logged-out
+token can still be used against another worker. The filter is rebuilt from
+the backend, dropping expired entries, once it holds more than its sizing
+capacity.
+
+The blocklist loader also rejects tokens of deactivated, blacklisted or
+deleted users (principals.is_allowed), using the cached principal rather
+than a User query, so every JWT-protected route refuses them at once.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, select
+
+from models.models import db, RevokedToken
+from services import principals
+from services.cache import TTLCache
+from services.db_utils import dialect_insert
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+SYNC_GRACE = timedelta(seconds=5)  # re-read a little history: commits can land out of order
+DEFAULT_CAPACITY = 100_000
+DEFAULT_ERROR_RATE = 0.001
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (double hashing of one blake2b digest)."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+# --- Backends --------------------------------------------------------------
+# add(jti, user_id, revoked_at, expires_at) / lookup(jti, now) -> expires_at or None
+# since(after, now) -> [(jti, revoked_at, expires_at)] / purge(now)
+
+
+class MemoryBackend:
+    """Process-local stand-in for Redis (development, tests, single worker)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+
+    def add(self, jti, user_id, revoked_at, expires_at):
+        with self._lock:
+            self._rows.setdefault(jti, (revoked_at, expires_at))
+
+    def lookup(self, jti, now):
+        row = self._rows.get(jti)
+        return row[1] if row is not None and row[1] > now else None
+
+    def since(self, after, now):
+        with self._lock:
+            return [
+                (jti, revoked_at, expires_at)
+                for jti, (revoked_at, expires_at) in self._rows.items()
+                if expires_at > now and (after is None or revoked_at >= after)
+            ]
+
+    def purge(self, now):
+        with self._lock:
+            for jti in [j for j, (_, expires_at) in self._rows.items() if expires_at <= now]:
+                del self._rows[jti]
+
+
+class DatabaseBackend:
+    """`revoked_tokens` table; uses its own connections, never the request session."""
+
+    table = RevokedToken.__table__
+
+    def add(self, jti, user_id, revoked_at, expires_at):
+        with db.engine.begin() as conn:
+            conn.execute(
+                dialect_insert(conn, self.table).on_conflict_do_nothing(index_elements=["jti"]),
+                {"jti": jti, "user_id": user_id, "revoked_at": revoked_at, "expires_at": expires_at},
+            )
+
+    def lookup(self, jti, now):
+        c = self.table.c
+        with db.engine.connect() as conn:
+            return conn.execute(select(c.expires_at).where(c.jti == jti, c.expires_at > now)).scalar()
+
+    def since(self, after, now):
+        c = self.table.c
+        stmt = select(c.jti, c.revoked_at, c.expires_at).where(c.expires_at > now)
+        if after is not None:
+            stmt = stmt.where(c.revoked_at >= after)
+        with db.engine.connect() as conn:
+            return conn.execute(stmt).all()
+
+    def purge(self, now):
+        with db.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.expires_at <= now))
+
+
+def _epoch(dt):
+    return dt.replace(tzinfo=timezone.utc).timestamp()  # naive datetimes here are UTC
+
+
+def _from_epoch(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+class RedisBackend:
+    """One expiring key per JTI plus a sorted set (score = revoked_at) for syncing."""
+
+    def __init__(self, url, prefix="hms:revoked", max_token_age=86400):
+        if redis is None:
+            raise RuntimeError("REVOCATION_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.log_key = f"{prefix}:log"
+        self.max_token_age = max_token_age
+
+    def add(self, jti, user_id, revoked_at, expires_at):
+        ttl = max(1, int((expires_at - revoked_at).total_seconds()))
+        pipe = self.client.pipeline()
+        pipe.set(f"{self.prefix}:{jti}", int(_epoch(expires_at)), ex=ttl)
+        pipe.zadd(self.log_key, {f"{jti}|{int(_epoch(expires_at))}": _epoch(revoked_at)})
+        pipe.execute()
+
+    def lookup(self, jti, now):
+        exp = self.client.get(f"{self.prefix}:{jti}")
+        return _from_epoch(int(exp)) if exp is not None else None
+
+    def since(self, after, now):
+        low = _epoch(after) if after is not None else "-inf"
+        rows = []
+        for member, score in self.client.zrangebyscore(self.log_key, low, "+inf", withscores=True):
+            jti, _, exp = member.decode().rpartition("|")
+            expires_at = _from_epoch(int(exp))
+            if expires_at > now:
+                rows.append((jti, _from_epoch(score), expires_at))
+        return rows
+
+    def purge(self, now):
+        # Log entries older than the longest token lifetime can no longer be live.
+        horizon = now - timedelta(seconds=self.max_token_age)
+        self.client.zremrangebyscore(self.log_key, "-inf", _epoch(horizon))
+
+
+# --- Store -----------------------------------------------------------------
+
+
+class RevocationStore:
+    def __init__(self, backend, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE,
+                 sync_interval=1.0, cache_size=100_000):
+        self.backend = backend
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self._known = TTLCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._watermark = None  # newest revoked_at seen in the backend
+        self._next_sync = 0.0
+        # Hot-path counters are updated without the lock; treat them as approximate.
+        self._stats = {"checks": 0, "bloom_negatives": 0, "known_hits": 0, "backend_lookups": 0,
+                       "false_positives": 0, "revoked": 0, "syncs": 0, "rebuilds": 0}
+
+    def _remember(self, jti, revoked_at, expires_at, now):
+        self._known.set(jti, True, ttl=max(0.0, (expires_at - now).total_seconds()))
+        self._bloom.add(jti)
+        if self._watermark is None or revoked_at > self._watermark:
+            self._watermark = revoked_at
+
+    def _rebuild(self, now):
+        self.backend.purge(now)
+        rows = self.backend.since(None, now)
+        self._bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+        self._known.invalidate()
+        self._watermark = None
+        for jti, revoked_at, expires_at in rows:
+            self._remember(jti, revoked_at, expires_at, now)
+        self._stats["rebuilds"] += 1
+
+    def _maybe_sync(self):
+        if time.monotonic() < self._next_sync and self._bloom is not None:
+            return
+        with self._lock:
+            if time.monotonic() < self._next_sync and self._bloom is not None:
+                return
+            now = datetime.utcnow()
+            if self._bloom is None or self._bloom.count > self._bloom.capacity:
+                self._rebuild(now)
+            else:
+                after = self._watermark - SYNC_GRACE if self._watermark is not None else None
+                for jti, revoked_at, expires_at in self.backend.since(after, now):
+                    if jti not in self._bloom:
+                        self._remember(jti, revoked_at, expires_at, now)
+                self._stats["syncs"] += 1
+            self._next_sync = time.monotonic() + self.sync_interval
+
+    def revoke(self, jti, expires_at, user_id=None):
+        self._maybe_sync()
+        now = datetime.utcnow()
+        self.backend.add(jti, user_id, now, expires_at)
+        with self._lock:
+            self._remember(jti, now, expires_at, now)
+        self._stats["revoked"] += 1
+
+    def is_revoked(self, jti):
+        self._maybe_sync()
+        stats = self._stats
+        stats["checks"] += 1
+        if jti not in self._bloom:
+            stats["bloom_negatives"] += 1
+            return False
+        if self._known.get(jti):
+            stats["known_hits"] += 1
+            return True
+        stats["backend_lookups"] += 1
+        now = datetime.utcnow()
+        expires_at = self.backend.lookup(jti, now)
+        if expires_at is not None:
+            self._known.set(jti, True, ttl=(expires_at - now).total_seconds())
+            return True
+        stats["false_positives"] += 1
+        return False
+
+    def stats(self):
+        return {**self._stats, "bloom_entries": self._bloom.count if self._bloom else 0,
+                "known": len(self._known)}
+
+
+def _setting(name, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return os.getenv(name, default)
+
+
+def make_backend(kind):
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "redis":
+        return RedisBackend(_setting("REVOCATION_REDIS_URL", "redis://localhost:6379/0"))
+    if kind == "database":
+        return DatabaseBackend()
+    raise ValueError(f"Unknown revocation backend {kind!r}")
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide store, created on first use (and again after a fork)."""
+    global _store, _store_pid
+    if _store is None or _store_pid != os.getpid():
+        with _store_lock:
+            if _store is None or _store_pid != os.getpid():
+                _store = RevocationStore(
+                    make_backend(_setting("REVOCATION_BACKEND", "database")),
+                    capacity=int(_setting("REVOCATION_BLOOM_CAPACITY", DEFAULT_CAPACITY)),
+                    sync_interval=float(_setting("REVOCATION_SYNC_SECONDS", 1.0)),
+                )
+                _store_pid = os.getpid()
+    return _store
+
+
+def reset_store(store=None):
+    """Replace the process-wide store (benchmarks, backend switches)."""
+    global _store, _store_pid
+    with _store_lock:
+        _store, _store_pid = store, os.getpid() if store is not None else None
+
+
+def revoke_token(jwt_payload):
+    """Revoke a decoded token until it would have expired anyway."""
+    expires_at = _from_epoch(jwt_payload["exp"])
+    sub = jwt_payload.get("sub")
+    get_store().revoke(jwt_payload["jti"], expires_at, int(sub) if sub and sub.isdigit() else None)
+
+
+def token_in_blocklist(jwt_header, jwt_payload):
+    sub = jwt_payload.get("sub")
+    if sub and sub.isdigit():
+        if not principals.is_allowed(principals.get_principal(int(sub))):
+            return True
+    return get_store().is_revoked(jwt_payload["jti"])
+
+
+def init_app(app, jwt):
+    app.config.setdefault("REVOCATION_BACKEND", os.getenv("REVOCATION_BACKEND", "database"))
+    app.config.setdefault("REVOCATION_SYNC_SECONDS", float(os.getenv("REVOCATION_SYNC_SECONDS", "1")))
+    if os.getenv("REVOCATION_REDIS_URL"):
+        app.config.setdefault("REVOCATION_REDIS_URL", os.getenv("REVOCATION_REDIS_URL"))
+    jwt.token_in_blocklist_loader(token_in_blocklist)
@@ -0,0 +1,148 @@
+# backend/services/schedules.py
+"""
+Weekly schedule templates and bulk availability generation.
+
+A doctor's DoctorScheduleTemplate rows (weekday + working hours + slot
+length) are expanded into DoctorAvailability rows for a date window. Rows
+are written with one INSERT ... ON CONFLICT DO NOTHING executemany per batch,
+so re-running the generator for an overlapping window is idempotent, and the
+slot bitmaps and agendas of the touched doctor-days are refreshed in the
+same transaction.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import delete, select
+
+from models.models import db, DoctorAvailability, DoctorScheduleTemplate, parse_time_slot
+from services import agenda, slots
+from services.db_utils import dialect_insert
+
+DEFAULT_DAYS = 7
+BATCH_SIZE = 5000
+
+
+def format_slot(start_minute, end_minute):
+    return f"{start_minute // 60:02d}:{start_minute % 60:02d}-{end_minute // 60:02d}:{end_minute % 60:02d}"
+
+
+def set_weekly_template(doctor_id, entries):
+    """
+    Replace a doctor's weekly template.
+
+    `entries` is a list of {"weekday": 0-6, "time_range": "09:00-13:00",
+    "slot_minutes": 30}; raises ValueError on invalid input. Slots have to
+    fit the half-hour grid of the slot bitmaps (services/slots.py): the range
+    starts on a half hour and slot_minutes is a multiple of 30. Ranges of one
+    weekday must not overlap, or their slots would collide.
+    """
+    templates = []
+    ranges = {}  # weekday -> [(start, end, time_range)]
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError("Each template must be an object")
+        weekday = entry.get("weekday")
+        slot_minutes = entry.get("slot_minutes", 30)
+        if not isinstance(weekday, int) or not 0 <= weekday <= 6:
+            raise ValueError("weekday must be an integer 0 (Monday) .. 6 (Sunday)")
+        if not isinstance(slot_minutes, int) or not 0 < slot_minutes <= 240 or slot_minutes % slots.SLOT_MINUTES:
+            raise ValueError(f"slot_minutes must be a multiple of {slots.SLOT_MINUTES} up to 240")
+        start, end = parse_time_slot(entry.get("time_range"))
+        if start % slots.SLOT_MINUTES:
+            raise ValueError(f"time_range {entry.get('time_range')!r} must start on the hour or half hour")
+        if end - start < slot_minutes:
+            raise ValueError(f"time_range {entry.get('time_range')!r} is shorter than one slot")
+        for other_start, other_end, other in ranges.setdefault(weekday, []):
+            if start < other_end and other_start < end:
+                raise ValueError(f"time_range {entry['time_range']!r} overlaps {other!r} on weekday {weekday}")
+        ranges[weekday].append((start, end, entry["time_range"]))
+        templates.append(DoctorScheduleTemplate(
+            doctor_id=doctor_id, weekday=weekday, time_range=entry["time_range"], slot_minutes=slot_minutes
+        ))
+
+    db.session.execute(delete(DoctorScheduleTemplate).where(DoctorScheduleTemplate.doctor_id == doctor_id))
+    db.session.add_all(templates)
+    db.session.commit()
+    return templates
+
+
+def template_json(template):
+    return {
+        "id": template.id,
+        "weekday": template.weekday,
+        "time_range": template.time_range,
+        "slot_minutes": template.slot_minutes,
+        "is_active": template.is_active,
+    }
+
+
+def expand(templates, start, days):
+    """
+    Yield DoctorAvailability row dicts for `templates` over [start, start + days),
+    doctor by doctor so each batch covers few doctors (cheap bitmap refresh).
+    """
+    by_doctor = {}
+    for t in templates:
+        by_doctor.setdefault(t.doctor_id, {}).setdefault(t.weekday, []).append(t)
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+    for doctor_id, by_weekday in by_doctor.items():
+        for day in dates:
+            for t in by_weekday.get(day.weekday(), ()):
+                minute, step = t.start_minute, t.slot_minutes
+                while minute + step <= t.end_minute:
+                    yield {
+                        "doctor_id": doctor_id,
+                        "date": day,
+                        "time_slot": format_slot(minute, minute + step),
+                        "start_minute": minute,
+                        "end_minute": minute + step,
+                    }
+                    minute += step
+
+
+def _insert_batch(rows):
+    conn = db.session.connection()
+    stmt = dialect_insert(conn, DoctorAvailability.__table__).on_conflict_do_nothing(
+        index_elements=["doctor_id", "date", "time_slot"]
+    )
+    # executemany of one cached statement; compiling a literal multi-row VALUES
+    # clause per batch costs more than the insert itself.
+    inserted = conn.execute(stmt, rows).rowcount
+    if inserted != 0:  # -1 when the driver cannot tell
+        days = {(r["doctor_id"], r["date"]) for r in rows}
+        slots.refresh_days(conn, days)
+        agenda.refresh_days(conn, days)
+    db.session.commit()
+    return max(inserted, 0)
+
+
+def generate_availability(start=None, days=DEFAULT_DAYS, doctor_ids=None, batch_size=BATCH_SIZE):
+    """
+    Expand active templates into availability for [start, start + days).
+
+    Returns {"generated": rows considered, "inserted": rows actually new}.
+    """
+    start = start or date.today()
+    # Plain rows rather than entities: the per-batch commits would expire them.
+    stmt = select(
+        DoctorScheduleTemplate.doctor_id,
+        DoctorScheduleTemplate.weekday,
+        DoctorScheduleTemplate.start_minute,
+        DoctorScheduleTemplate.end_minute,
+        DoctorScheduleTemplate.slot_minutes,
+    ).where(DoctorScheduleTemplate.is_active.is_(True))
+    if doctor_ids is not None:
+        stmt = stmt.where(DoctorScheduleTemplate.doctor_id.in_(doctor_ids))
+    templates = db.session.execute(stmt.order_by(DoctorScheduleTemplate.doctor_id)).all()
+
+    generated = inserted = 0
+    batch = []
+    for row in expand(templates, start, days):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            inserted += _insert_batch(batch)
+            generated += len(batch)
+            batch = []
+    if batch:
+        inserted += _insert_batch(batch)
+        generated += len(batch)
+    return {"generated": generated, "inserted": inserted}
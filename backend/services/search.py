@@ -0,0 +1,285 @@
+# backend/services/search.py
+"""
+Full-text search over doctors and patients.
+
+One document per doctor/patient user holds their name, username, the
+doctor's specializations and bio. On SQLite it lives in the FTS5 table
+`search_index` (rowid = user id, prefix indexes for 2 and 3 characters); on
+PostgreSQL in `search_documents` with a weighted `tsvector` and a GIN index.
+Both are created alongside the regular tables by `db.create_all()`.
+
+Documents are refreshed by an after_flush hook whenever a user's name or
+role, a doctor's bio, their specializations or a specialization name
+changes. Bulk loaders that bypass the ORM must call `rebuild_index()`
+(`python app.py rebuild-search-index`).
+
+`search()` matches every query word as a prefix (typeahead) and ranks by
+bm25 / ts_rank with the name weighted highest. Queries whose words are all
+shorter than MIN_RANKED_PREFIX characters match too much to rank cheaply;
+they return the first matches in id order instead.
+"""
+import re
+
+from sqlalchemy import bindparam, event, select, text
+
+from models.models import (
+    db,
+    DoctorProfile,
+    DoctorSpecialization,
+    PatientProfile,
+    Specialization,
+    User,
+)
+from services.db_utils import attr_changed, previous_value, track_attributes
+
+ROLES = ("doctor", "patient")
+MIN_RANKED_PREFIX = 3
+MAX_TERMS = 8
+_BATCH = 5000
+
+track_attributes(User, "full_name", "username", "role")
+track_attributes(DoctorProfile, "user_id", "bio")
+track_attributes(DoctorSpecialization, "doctor_id")
+track_attributes(Specialization, "name")
+
+
+def _terms(query):
+    return re.findall(r"\w+", (query or "").lower())[:MAX_TERMS]
+
+
+class _SqliteIndex:
+    create = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "role, name, username, specializations, bio, profile_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    ]
+    drop = ["DROP TABLE IF EXISTS search_index"]
+    _delete = text("DELETE FROM search_index WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True))
+    _insert = text(
+        "INSERT INTO search_index (rowid, role, name, username, specializations, bio, profile_id) "
+        "VALUES (:user_id, :role, :name, :username, :specializations, :bio, :profile_id)"
+    )
+
+    def clear(self, conn):
+        conn.execute(text("DELETE FROM search_index"))
+
+    def delete(self, conn, user_ids):
+        conn.execute(self._delete, {"ids": list(user_ids)})
+
+    def insert(self, conn, docs):
+        conn.execute(self._insert, docs)
+
+    def optimize(self, conn):
+        conn.execute(text("INSERT INTO search_index (search_index) VALUES ('optimize')"))
+
+    def query(self, conn, terms, role, limit, ranked):
+        # quoted terms cannot inject FTS5 syntax; {...}: keeps the role column out of the match
+        match = "{name username specializations bio} : (" + " AND ".join(f'"{t}"*' for t in terms) + ")"
+        if role:
+            match = f'role : "{role}" AND {match}'
+        order = "bm25(search_index, 0.0, 10.0, 4.0, 6.0, 1.0)" if ranked else "rowid"
+        return conn.execute(
+            text(
+                "SELECT rowid AS user_id, role, profile_id, name, specializations FROM search_index "
+                f"WHERE search_index MATCH :match ORDER BY {order} LIMIT :limit"
+            ),
+            {"match": match, "limit": limit},
+        ).all()
+
+
+class _PostgresIndex:
+    create = [
+        "CREATE TABLE IF NOT EXISTS search_documents ("
+        "user_id integer PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE, "
+        "role varchar(20) NOT NULL, profile_id integer, name text, specializations text, "
+        "document tsvector NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_search_documents_document ON search_documents USING GIN (document)",
+    ]
+    drop = ["DROP TABLE IF EXISTS search_documents"]
+    _delete = text("DELETE FROM search_documents WHERE user_id IN :ids").bindparams(
+        bindparam("ids", expanding=True)
+    )
+    _insert = text(
+        "INSERT INTO search_documents (user_id, role, profile_id, name, specializations, document) "
+        "VALUES (:user_id, :role, :profile_id, :name, :specializations, "
+        "setweight(to_tsvector('simple', coalesce(:name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(:specializations, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(:username, '')), 'C') || "
+        "setweight(to_tsvector('simple', coalesce(:bio, '')), 'D'))"
+    )
+
+    def clear(self, conn):
+        conn.execute(text("TRUNCATE search_documents"))
+
+    def delete(self, conn, user_ids):
+        conn.execute(self._delete, {"ids": list(user_ids)})
+
+    def insert(self, conn, docs):
+        conn.execute(self._insert, docs)
+
+    def optimize(self, conn):
+        pass  # autovacuum maintains the GIN index
+
+    def query(self, conn, terms, role, limit, ranked):
+        order = "ts_rank(document, q) DESC" if ranked else "user_id"
+        return conn.execute(
+            text(
+                "SELECT user_id, role, profile_id, name, specializations "
+                "FROM search_documents, to_tsquery('simple', :q) q "
+                f"WHERE document @@ q AND (:role IS NULL OR role = :role) ORDER BY {order} LIMIT :limit"
+            ),
+            {"q": " & ".join(f"{t}:*" for t in terms), "role": role, "limit": limit},
+        ).all()
+
+
+def _index(bind):
+    return _PostgresIndex() if bind.dialect.name == "postgresql" else _SqliteIndex()
+
+
+@event.listens_for(db.metadata, "after_create")
+def _create_index(target, connection, **kw):
+    for ddl in _index(connection).create:
+        connection.exec_driver_sql(ddl)
+
+
+@event.listens_for(db.metadata, "before_drop")
+def _drop_index(target, connection, **kw):
+    for ddl in _index(connection).drop:
+        connection.exec_driver_sql(ddl)
+
+
+def _document_query():
+    return (
+        select(
+            User.id, User.role, User.full_name, User.username,
+            DoctorProfile.id.label("doctor_id"), DoctorProfile.bio, PatientProfile.id.label("patient_id"),
+        )
+        .outerjoin(DoctorProfile, DoctorProfile.user_id == User.id)
+        .outerjoin(PatientProfile, PatientProfile.user_id == User.id)
+        .where(User.role.in_(ROLES))
+    )
+
+
+def _specializations(conn, doctor_user_ids=None):
+    stmt = (
+        select(DoctorProfile.user_id, Specialization.name)
+        .join(DoctorSpecialization, DoctorSpecialization.doctor_id == DoctorProfile.id)
+        .join(Specialization, Specialization.id == DoctorSpecialization.specialization_id)
+        .order_by(DoctorProfile.user_id, Specialization.name)
+    )
+    if doctor_user_ids is not None:
+        stmt = stmt.where(DoctorProfile.user_id.in_(doctor_user_ids))
+    names = {}
+    for user_id, name in conn.execute(stmt):
+        names.setdefault(user_id, []).append(name)
+    return names
+
+
+def _doc(row, specs):
+    is_doctor = row.role == "doctor"
+    return {
+        "user_id": row.id,
+        "role": row.role,
+        "name": row.full_name or "",
+        "username": row.username,
+        "specializations": ", ".join(specs.get(row.id, ())) if is_doctor else "",
+        "bio": (row.bio or "") if is_doctor else "",
+        "profile_id": row.doctor_id if is_doctor else row.patient_id,
+    }
+
+
+def refresh_users(conn, user_ids):
+    """Re-index the given users (users that no longer exist are dropped)."""
+    index = _index(conn)
+    user_ids = sorted(u for u in user_ids if u is not None)
+    for i in range(0, len(user_ids), _BATCH):
+        chunk = user_ids[i:i + _BATCH]
+        rows = conn.execute(_document_query().where(User.id.in_(chunk))).all()
+        specs = _specializations(conn, [r.id for r in rows if r.role == "doctor"])
+        index.delete(conn, chunk)
+        if rows:
+            index.insert(conn, [_doc(r, specs) for r in rows])
+
+
+def rebuild_index():
+    """Re-index every doctor and patient from scratch; returns the document count."""
+    conn = db.session.connection()
+    index = _index(conn)
+    index.clear(conn)
+    specs = _specializations(conn)
+    count = 0
+    batch = []
+    for row in conn.execution_options(yield_per=_BATCH).execute(_document_query().order_by(User.id)):
+        batch.append(_doc(row, specs))
+        if len(batch) >= _BATCH:
+            index.insert(conn, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        index.insert(conn, batch)
+        count += len(batch)
+    index.optimize(conn)
+    db.session.commit()
+    return count
+
+
+def search(query, role=None, limit=10):
+    """
+    Doctors/patients whose documents contain every word of `query` as a prefix,
+    best match first.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    ranked = any(len(t) >= MIN_RANKED_PREFIX for t in terms)
+    rows = _index(db.session.get_bind()).query(db.session.connection(), terms, role, limit, ranked)
+    return [
+        {
+            "user_id": row.user_id,
+            "role": row.role,
+            f"{row.role}_id": row.profile_id,
+            "name": row.name,
+            "specializations": row.specializations.split(", ") if row.specializations else [],
+        }
+        for row in rows
+    ]
+
+
+@event.listens_for(db.session, "after_flush")
+def _sync_index(session, flush_context):
+    user_ids, doctor_ids, specialization_ids = set(), set(), set()
+    # session.new / .dirty build a fresh IdentitySet on every access
+    new, dirty = session.new, session.dirty
+    for obj in list(new) + list(dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            if obj in dirty and not any(attr_changed(obj, a) for a in ("full_name", "username", "role")):
+                continue
+            user_ids.add(obj.id)
+        elif isinstance(obj, DoctorProfile):
+            if obj in dirty and not any(attr_changed(obj, a) for a in ("user_id", "bio")):
+                continue
+            user_ids.update((obj.user_id, previous_value(obj, "user_id")))
+        elif isinstance(obj, PatientProfile):
+            if obj not in dirty:
+                user_ids.add(obj.user_id)
+        elif isinstance(obj, DoctorSpecialization):
+            doctor_ids.update((obj.doctor_id, previous_value(obj, "doctor_id")))
+        elif isinstance(obj, Specialization):
+            if obj in dirty and attr_changed(obj, "name"):
+                specialization_ids.add(obj.id)
+    if not (user_ids or doctor_ids or specialization_ids):
+        return
+
+    conn = session.connection()
+    doctor_ids.discard(None)
+    if doctor_ids:
+        user_ids.update(conn.execute(
+            select(DoctorProfile.user_id).where(DoctorProfile.id.in_(doctor_ids))
+        ).scalars())
+    if specialization_ids:
+        user_ids.update(conn.execute(
+            select(DoctorProfile.user_id)
+            .join(DoctorSpecialization, DoctorSpecialization.doctor_id == DoctorProfile.id)
+            .where(DoctorSpecialization.specialization_id.in_(specialization_ids))
+        ).scalars())
+    refresh_users(conn, user_ids)
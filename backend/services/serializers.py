@@ -0,0 +1,206 @@
+# backend/services/serializers.py
+"""
+Column-tuple queries and fast JSON encoding.
+
+A Schema names the fields of a model a response may contain: the model's
+own columns, or columns reached through relationships (`Field(User.full_name,
+(Appointment.doctor, DoctorProfile.user))`). `Schema.select(names)` builds
+one SELECT of exactly those columns, with an outer join per to-one
+relationship path, so rows come back as plain tuples without building ORM
+instances or loading columns nobody returns; `Schema.dicts(rows, plan)`
+zips them into response dicts. Fields behind a collection
+(`DoctorProfile.specializations`) become lists, filled by one extra query
+per collection for the whole page.
+
+`dumps()` encodes with orjson when it is installed and with the standard
+library otherwise; both write `date`/`datetime` as ISO 8601, Decimal as a
+string and compact separators. `JSONProvider` puts the same encoder behind
+`jsonify()` and `request.get_json()`. `stream_array()` encodes large
+arrays incrementally, one chunk of items at a time, so a caller can write
+them out without holding the whole document in memory (the "json" export
+format in services/exports.py).
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import aliased
+
+from models.models import db
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder gives the same output, slower
+    orjson = None
+
+CHUNK_SIZE = 500
+
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, (Row, tuple, set, frozenset)):
+        return list(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj):
+        """`obj` as compact JSON bytes."""
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    loads = orjson.loads
+else:
+    _encode = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False).encode
+
+    def dumps(obj):
+        """`obj` as compact JSON bytes."""
+        return _encode(obj).encode("utf-8")
+
+    loads = json.loads
+
+
+def stream_array(items, prefix=b"", suffix=b"", chunk_size=CHUNK_SIZE):
+    """Yield `prefix`, the JSON array of `items` in chunks of `chunk_size` items, then `suffix`."""
+    yield prefix + b"["
+    chunk, first = [], True
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            body = dumps(chunk)[1:-1]
+            yield body if first else b"," + body
+            chunk, first = [], False
+    if chunk:
+        body = dumps(chunk)[1:-1]
+        yield body if first else b"," + body
+    yield b"]" + suffix
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider using `dumps()`; keys keep their insertion order."""
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+# --- schemas ------------------------------------------------------------------
+
+
+class Field:
+    """A column of the model, or an attribute reached through relationships."""
+
+    def __init__(self, attr, path=()):
+        self.attr = attr  # InstrumentedAttribute holding the value
+        self.path = tuple(path)  # relationship attributes leading to it
+
+    @property
+    def many(self):
+        return any(rel.property.uselist for rel in self.path)
+
+
+class Plan:
+    """What `Schema.select()` selected: output names, tuple positions and collection fields."""
+
+    def __init__(self, names, positions, collections, extra_at):
+        self.names = names
+        self.positions = positions  # name -> index into the row tuple (to-one fields)
+        self.collections = collections  # name -> Field (filled by extra queries)
+        self.extra_at = extra_at  # index of the first `extra` column
+
+
+class Schema:
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields  # name -> Field
+
+    def check(self, names):
+        unknown = [n for n in names if n not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown fields {', '.join(unknown)}; allowed: {', '.join(self.fields)}")
+
+    def _joined(self, stmt, path, joins, outer=True):
+        """`stmt` joined along `path` (reusing joins already made); returns (stmt, entity at the end)."""
+        parent = self.model
+        for i, rel in enumerate(path):
+            key = path[: i + 1]
+            if key not in joins:
+                target = aliased(rel.property.mapper.class_)
+                onclause = getattr(parent, rel.key).of_type(target)
+                stmt = stmt.outerjoin(target, onclause) if outer else stmt.join(target, onclause)
+                joins[key] = target
+            parent = joins[key]
+        return stmt, parent
+
+    def select(self, names, extra=()):
+        """
+        SELECT of the to-one fields in `names` plus the `extra` columns of the
+        model (e.g. sort keys), FROM the model; add WHERE / ORDER BY / LIMIT
+        to it. The model's primary key is always selected (collections need it).
+        """
+        self.check(names)
+        pk = self.model.__mapper__.primary_key[0]
+        columns, positions, collections, joins = [pk], {}, {}, {}
+        stmt = select(pk).select_from(self.model)
+        for name in names:
+            field = self.fields[name]
+            if field.many:
+                collections[name] = field
+                continue
+            stmt, entity = self._joined(stmt, field.path, joins)
+            positions[name] = len(columns)
+            columns.append(getattr(entity, field.attr.key))
+        extra_at = len(columns)
+        columns.extend(extra)
+        return stmt.with_only_columns(*columns), Plan(list(names), positions, collections, extra_at)
+
+    def _collect(self, field, ids):
+        """{owner id: [values]} of a collection field, members in primary key order."""
+        pk = self.model.__mapper__.primary_key[0]
+        joins = {}
+        stmt, entity = self._joined(select(pk).select_from(self.model), field.path, joins, outer=False)
+        hop = next(i for i, rel in enumerate(field.path) if rel.property.uselist)
+        member = joins[field.path[: hop + 1]]
+        member_pk = getattr(member, field.path[hop].property.mapper.primary_key[0].key)
+        stmt = stmt.with_only_columns(pk, getattr(entity, field.attr.key)).where(pk.in_(ids))
+        values = {}
+        for owner_id, value in db.session.execute(stmt.order_by(pk, member_pk)):
+            values.setdefault(owner_id, []).append(value)
+        return values
+
+    def dicts(self, rows, plan):
+        """Response dicts for `rows` selected with `plan` (runs one query per collection field)."""
+        positions = list(plan.positions.items())
+        items = [{name: row[i] for name, i in positions} for row in rows]
+        for name, field in plan.collections.items():
+            values = self._collect(field, [row[0] for row in rows]) if rows else {}
+            for item, row in zip(items, rows):
+                item[name] = values.get(row[0], [])
+        if plan.collections:  # restore the requested field order
+            items = [{name: item[name] for name in plan.names} for item in items]
+        return items
+
+    def rows(self, names, *where):
+        """All rows matching `where` as response dicts (for small, unpaginated lists)."""
+        stmt, plan = self.select(names)
+        return self.dicts(db.session.execute(stmt.where(*where)).all(), plan)
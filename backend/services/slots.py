@@ -0,0 +1,259 @@
+# backend/services/slots.py
+"""
+Free-slot search backed by per doctor/day bitmaps.
+
+`doctor_day_slots` keeps two 48-bit masks per doctor and day: the slots the
+doctor offers (active DoctorAvailability rows) and the slots taken by
+non-cancelled appointments. Bit n covers minutes [n*30, n*30+30), so slots
+must start and end on a half-hour boundary (SLOT_MINUTES, models/models.py):
+the DoctorAvailability validator rejects other slots and
+schedules.set_weekly_template() other templates. Whenever a flush touches
+availability or appointments, the affected doctor-days are recomputed from
+the composite (doctor_id, date, ...) indexes, so a search only has to scan
+day rows with a non-zero free mask instead of joining availability to
+appointments.
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import and_, bindparam, event, or_, select
+
+from models.models import (
+    db,
+    parse_time_slot,
+    SLOT_MINUTES,
+    Appointment,
+    DoctorAvailability,
+    DoctorDaySlots,
+    DoctorProfile,
+    DoctorSpecialization,
+    Specialization,
+    User,
+)
+from services.db_utils import attr_changed, dialect_insert, previous_value, track_attributes
+
+INACTIVE_STATUSES = ("cancelled",)
+_CHUNK = 500
+
+track_attributes(DoctorAvailability, "doctor_id", "date", "is_active")
+track_attributes(Appointment, "doctor_id", "date", "time_slot", "status")
+
+
+def slot_bit(start_minute):
+    return 1 << (start_minute // SLOT_MINUTES)
+
+
+def iter_bits(mask):
+    """Yield the start minute of every set bit, earliest first."""
+    while mask:
+        low = mask & -mask
+        yield (low.bit_length() - 1) * SLOT_MINUTES
+        mask ^= low
+
+
+def _compute_masks(conn, days):
+    # Separate IN lists (not a row-value IN) so SQLite stays on the composite
+    # indexes; combinations outside `days` are skipped.
+    masks = {day: [0, 0] for day in days}
+    keys = sorted(days)
+    for i in range(0, len(keys), _CHUNK):
+        chunk = keys[i:i + _CHUNK]
+        offered = conn.execute(
+            select(DoctorAvailability.doctor_id, DoctorAvailability.date, DoctorAvailability.start_minute).where(
+                DoctorAvailability.doctor_id.in_({d for d, _ in chunk}),
+                DoctorAvailability.date.in_({day for _, day in chunk}),
+                DoctorAvailability.is_active.is_(True),
+            )
+        )
+        for doctor_id, day, start_minute in offered:
+            if (doctor_id, day) in masks:
+                masks[(doctor_id, day)][0] |= slot_bit(start_minute)
+        booked = conn.execute(
+            select(Appointment.doctor_id, Appointment.date, Appointment.time_slot).where(
+                Appointment.doctor_id.in_({d for d, _ in chunk}),
+                Appointment.date.in_({day for _, day in chunk}),
+                Appointment.status.notin_(INACTIVE_STATUSES),
+            )
+        )
+        for doctor_id, day, time_slot in booked:
+            if (doctor_id, day) in masks:
+                masks[(doctor_id, day)][1] |= slot_bit(parse_time_slot(time_slot)[0])
+    return masks
+
+
+def _write_masks(conn, masks):
+    table = DoctorDaySlots.__table__
+    rows = [
+        {"doctor_id": doctor_id, "date": day, "available_mask": available, "booked_mask": booked}
+        for (doctor_id, day), (available, booked) in masks.items()
+    ]
+    for i in range(0, len(rows), _CHUNK):
+        stmt = dialect_insert(conn, table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["doctor_id", "date"],
+            set_={"available_mask": stmt.excluded.available_mask, "booked_mask": stmt.excluded.booked_mask},
+        )
+        conn.execute(stmt, rows[i:i + _CHUNK])
+
+
+def refresh_days(conn, days):
+    """Recompute the bitmaps of the given (doctor_id, date) pairs."""
+    days = {d for d in days if d[0] is not None and d[1] is not None}
+    if days:
+        _write_masks(conn, _compute_masks(conn, days))
+
+
+def rebuild_all():
+    """Recompute every bitmap from scratch (init-db, bulk loaders)."""
+    conn = db.session.connection()
+    masks = {}
+    offered = conn.execution_options(yield_per=10_000).execute(
+        select(DoctorAvailability.doctor_id, DoctorAvailability.date, DoctorAvailability.start_minute).where(
+            DoctorAvailability.is_active.is_(True)
+        )
+    )
+    for doctor_id, day, start_minute in offered:
+        masks.setdefault((doctor_id, day), [0, 0])[0] |= slot_bit(start_minute)
+    booked = conn.execution_options(yield_per=10_000).execute(
+        select(Appointment.doctor_id, Appointment.date, Appointment.time_slot).where(
+            Appointment.status.notin_(INACTIVE_STATUSES)
+        )
+    )
+    for doctor_id, day, time_slot in booked:
+        masks.setdefault((doctor_id, day), [0, 0])[1] |= slot_bit(parse_time_slot(time_slot)[0])
+    conn.execute(DoctorDaySlots.__table__.delete())
+    _write_masks(conn, masks)
+    db.session.commit()
+    return len(masks)
+
+
+def search_free_slots(specialization=None, specialization_id=None, doctor_id=None,
+                      date_from=None, date_to=None, limit=10, now=None):
+    """
+    Return the next `limit` free slots, earliest first, for doctors matching
+    the filters within [date_from, date_to].
+    """
+    now = now or datetime.now()
+    date_from = max(date_from or now.date(), now.date())
+    date_to = date_to or date_from + timedelta(days=7)
+    free_mask = DoctorDaySlots.available_mask.bitwise_and(DoctorDaySlots.booked_mask.bitwise_not())
+
+    stmt = select(DoctorDaySlots.doctor_id, DoctorDaySlots.date, free_mask).where(
+        DoctorDaySlots.date >= date_from,
+        DoctorDaySlots.date <= date_to,
+        free_mask != 0,
+    )
+    if doctor_id is not None:
+        stmt = stmt.where(DoctorDaySlots.doctor_id == doctor_id)
+    if specialization_id is not None or specialization:
+        stmt = stmt.join(DoctorSpecialization, DoctorSpecialization.doctor_id == DoctorDaySlots.doctor_id)
+        if specialization_id is not None:
+            stmt = stmt.where(DoctorSpecialization.specialization_id == specialization_id)
+        else:
+            stmt = stmt.join(Specialization, Specialization.id == DoctorSpecialization.specialization_id).where(
+                Specialization.name == specialization
+            )
+    stmt = stmt.order_by(DoctorDaySlots.date, DoctorDaySlots.doctor_id)
+
+    picked = []
+    current_day, candidates = None, []
+    now_minute = now.hour * 60 + now.minute
+
+    def take_day():
+        candidates.sort()
+        picked.extend(candidates[: limit - len(picked)])
+        candidates.clear()
+
+    for doc_id, day, mask in db.session.execute(stmt.execution_options(yield_per=200)):
+        if day != current_day:
+            take_day()
+            if len(picked) >= limit:
+                break
+            current_day = day
+        for start_minute in iter_bits(mask):
+            if day == now.date() and start_minute < now_minute:
+                continue
+            candidates.append((start_minute, doc_id, day))
+    else:
+        take_day()
+
+    return _resolve(picked)
+
+
+@lru_cache(maxsize=128)
+def _resolve_stmt(n):
+    """
+    Availability lookup for `n` picks: one (doctor_id, date, start_minute) index
+    probe per pick. Built once per pick count with named binds, since statement
+    construction otherwise costs far more than the query itself (and SQLite
+    does not use the index for a row-value IN).
+    """
+    av = DoctorAvailability.__table__.c
+    probes = [
+        and_(
+            av.doctor_id == bindparam(f"doctor_{i}"),
+            av.date == bindparam(f"date_{i}"),
+            av.start_minute >= bindparam(f"start_{i}"),
+            av.start_minute < bindparam(f"end_{i}"),
+        )
+        for i in range(n)
+    ]
+    return (
+        select(av.id, av.doctor_id, av.date, av.time_slot, av.start_minute, av.end_minute, User.full_name)
+        .join(DoctorProfile, DoctorProfile.id == av.doctor_id)
+        .join(User, User.id == DoctorProfile.user_id)
+        .where(or_(*probes), av.is_active.is_(True), av.is_booked.is_(False))
+    )
+
+
+def _resolve(picked):
+    """Turn (start_minute, doctor_id, date) picks into bookable availability rows."""
+    if not picked:
+        return []
+    params = {}
+    for i, (start, doctor_id, day) in enumerate(picked):
+        params.update({f"doctor_{i}": doctor_id, f"date_{i}": day, f"start_{i}": start, f"end_{i}": start + SLOT_MINUTES})
+    rows = db.session.execute(_resolve_stmt(len(picked)), params).all()
+    wanted = {(d, day, start): order for order, (start, d, day) in enumerate(picked)}
+    results = []
+    for row in rows:
+        bucket = row.start_minute - row.start_minute % SLOT_MINUTES
+        order = wanted.get((row.doctor_id, row.date, bucket))
+        if order is not None:
+            results.append((order, row.start_minute, {
+                "availability_id": row.id,
+                "doctor_id": row.doctor_id,
+                "doctor_name": row.full_name,
+                "date": row.date.isoformat(),
+                "time_slot": row.time_slot,
+                "start_minute": row.start_minute,
+                "end_minute": row.end_minute,
+            }))
+    results.sort(key=lambda r: (r[0], r[1]))
+    return [r[2] for r in results]
+
+
+def _touched_days(session):
+    days = set()
+    # session.new / .dirty build a fresh IdentitySet on every access
+    new, dirty = session.new, session.dirty
+    for obj in list(new) + list(dirty) + list(session.deleted):
+        if isinstance(obj, DoctorAvailability):
+            watched = ("doctor_id", "date", "time_slot", "is_active")
+        elif isinstance(obj, Appointment):
+            watched = ("doctor_id", "date", "time_slot", "status")
+        else:
+            continue
+        if obj in dirty and not any(attr_changed(obj, a) for a in watched):
+            continue
+        days.add((obj.doctor_id, obj.date))
+        if obj not in new:
+            days.add((previous_value(obj, "doctor_id"), previous_value(obj, "date")))
+    return days
+
+
+@event.listens_for(db.session, "after_flush")
+def _refresh_touched_days(session, flush_context):
+    days = _touched_days(session)
+    if days:
+        refresh_days(session.connection(), days)
@@ -0,0 +1,257 @@
+# backend/services/synthetic.py
+"""
+Deterministic synthetic dataset for load testing (`python app.py init-db --synthetic N`).
+
+Generates N patients, N/100 doctors, specializations, 30-minute availability
+around today, appointments (past ones mostly completed, future ones booked),
+status history and treatments. Rows are produced by a seeded RNG and
+written in batched transactions through the raw DBAPI executemany, with
+ids assigned up front so no row has to be read back. Password hashes are
+computed once per distinct password with the configured hasher. Derived tables (dashboard counters,
+slot bitmaps, search index, daily rollups) are rebuilt once at the end.
+"""
+import math
+import random
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+
+from models.models import (
+    db,
+    Appointment,
+    AppointmentStatusHistory,
+    DoctorAvailability,
+    DoctorProfile,
+    DoctorSpecialization,
+    PatientProfile,
+    Specialization,
+    Treatment,
+    User,
+)
+from services import agenda, dashboard_stats, passwords, reports, search, slots
+from services.db_utils import bulk_insert_raw, sync_sequences
+from services.schedules import format_slot
+
+SPECIALIZATIONS = [
+    ("Cardiology", "Heart specialist"),
+    ("Neurology", "Brain & nerves"),
+    ("Orthopedics", "Bones & joints"),
+    ("Pediatrics", "Child healthcare"),
+    ("Dermatology", "Skin specialist"),
+    ("Oncology", "Cancer care"),
+    ("Gastroenterology", "Digestive system"),
+    ("Pulmonology", "Lungs & breathing"),
+    ("Endocrinology", "Hormones & metabolism"),
+    ("Nephrology", "Kidney care"),
+    ("Ophthalmology", "Eye care"),
+    ("ENT", "Ear, nose & throat"),
+    ("Psychiatry", "Mental health"),
+    ("Urology", "Urinary tract"),
+    ("General Medicine", "Primary care"),
+]
+FIRST_NAMES = ["Aarav", "Maya", "Liam", "Priya", "Noah", "Ananya", "Omar", "Sofia", "Ravi", "Emma",
+               "Kenji", "Zara", "Lucas", "Isha", "Mateo", "Chloe", "Arjun", "Nora", "Yusuf", "Leah"]
+LAST_NAMES = ["Sharma", "Smith", "Khan", "Garcia", "Patel", "Nguyen", "Brown", "Iyer", "Silva", "Müller",
+              "Tanaka", "Okafor", "Rossi", "Das", "Cohen", "Haddad", "Reddy", "Jones", "Kim", "Fischer"]
+DIAGNOSES = ["Hypertension", "Migraine", "Type 2 diabetes", "Seasonal allergy", "Lower back pain",
+             "Asthma", "Gastritis", "Eczema", "Anxiety", "Viral fever", "Sprained ankle", "Sinusitis"]
+PRESCRIPTIONS = ["Paracetamol 500mg", "Ibuprofen 400mg", "Amlodipine 5mg", "Metformin 500mg",
+                 "Cetirizine 10mg", "Salbutamol inhaler", "Omeprazole 20mg", "Physiotherapy x6"]
+
+SLOTS_PER_DAY = 16  # 09:00-17:00
+FIRST_SLOT_MINUTE = 9 * 60
+SLOT_LENGTH = 30
+FUTURE_DAYS = 7
+BATCH_SIZE = 20_000
+PATIENT_PASSWORD = "patient123"
+DOCTOR_PASSWORD = "doctor123"
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+class _Writer:
+    """Buffers rows per table and writes them in batched transactions."""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, model, row):
+        buf = self.buffers.setdefault(model.__table__, [])
+        buf.append(row)
+        if len(buf) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        conn = db.session.connection()
+        # Parents before children so PostgreSQL foreign keys are satisfied.
+        for table in db.metadata.sorted_tables:
+            rows = self.buffers.pop(table, None)
+            if rows:
+                bulk_insert_raw(conn, table, rows)
+                self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+        db.session.commit()
+
+
+def generate_synthetic(patients, seed=42, appointments=None, batch_size=BATCH_SIZE, log=print):
+    """
+    Add a synthetic hospital of `patients` patients (and ~4 appointments per
+    patient unless `appointments` is given) to the current database.
+    """
+    rng = random.Random(seed)
+    doctors = max(3, patients // 100)
+    appointments = appointments if appointments is not None else patients * 4
+    days = max(FUTURE_DAYS + 30, math.ceil(appointments / (doctors * SLOTS_PER_DAY * 0.85)))
+    book_probability = min(1.0, appointments / (doctors * SLOTS_PER_DAY * days))
+    today = date.today()
+    first_day = today - timedelta(days=days - FUTURE_DAYS)
+    now = datetime.utcnow().isoformat(sep=" ")
+
+    hashes = {
+        PATIENT_PASSWORD: passwords.hash_password(PATIENT_PASSWORD),
+        DOCTOR_PASSWORD: passwords.hash_password(DOCTOR_PASSWORD),
+    }
+    writer = _Writer(batch_size)
+
+    # --- Specializations (reuse existing names) ---
+    existing = dict(db.session.execute(select(Specialization.name, Specialization.id)).all())
+    next_spec = _next_id(Specialization)
+    spec_ids = []
+    for name, desc in SPECIALIZATIONS:
+        if name not in existing:
+            existing[name] = next_spec
+            writer.add(Specialization, {"id": next_spec, "name": name, "description": desc,
+                                        "created_at": now, "updated_at": now})
+            next_spec += 1
+        spec_ids.append(existing[name])
+
+    user_id = _next_id(User)
+    doctor_id = _next_id(DoctorProfile)
+    patient_id = _next_id(PatientProfile)
+    doc_spec_id = _next_id(DoctorSpecialization)
+
+    def user_row(uid, role, password):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        return {
+            "id": uid, "username": f"{role}{uid}", "email": f"{role}{uid}@synthetic.example",
+            "password_hash": hashes[password], "role": role,
+            "full_name": f"Dr. {name}" if role == "doctor" else name,
+            "phone": f"9{rng.randrange(10**9):09d}", "is_active": rng.random() > 0.02,
+            "blacklisted": False, "created_at": now, "updated_at": now,
+        }
+
+    # --- Doctors ---
+    doctor_ids = []
+    for _ in range(doctors):
+        writer.add(User, user_row(user_id, "doctor", DOCTOR_PASSWORD))
+        specs = rng.sample(spec_ids, 2 if rng.random() < 0.3 else 1)
+        writer.add(DoctorProfile, {
+            "id": doctor_id, "user_id": user_id,
+            "bio": f"{SPECIALIZATIONS[spec_ids.index(specs[0])][0]} consultant with "
+                   f"{rng.randint(2, 30)} years of experience.",
+            "qualification": "MBBS, MD", "consultation_fee": rng.choice([300, 500, 800, 1200]),
+            "created_at": now, "updated_at": now,
+        })
+        for spec in specs:
+            writer.add(DoctorSpecialization, {"id": doc_spec_id, "doctor_id": doctor_id, "specialization_id": spec})
+            doc_spec_id += 1
+        doctor_ids.append(doctor_id)
+        user_id += 1
+        doctor_id += 1
+
+    # --- Patients ---
+    first_patient = patient_id
+    for _ in range(patients):
+        writer.add(User, user_row(user_id, "patient", PATIENT_PASSWORD))
+        writer.add(PatientProfile, {
+            "id": patient_id, "user_id": user_id,
+            "dob": (date(1940, 1, 1) + timedelta(days=rng.randrange(80 * 365))).isoformat(),
+            "gender": rng.choice(["Male", "Female", "Other"]),
+            "address": f"{rng.randint(1, 999)} Synthetic St", "emergency_contact": None,
+            "created_at": now, "updated_at": now,
+        })
+        user_id += 1
+        patient_id += 1
+    last_patient = patient_id - 1
+    writer.flush()
+    log(f"  {doctors} doctors, {patients} patients")
+
+    # --- Availability, appointments, history, treatments ---
+    availability_id = _next_id(DoctorAvailability)
+    appointment_id = _next_id(Appointment)
+    history_id = _next_id(AppointmentStatusHistory)
+    treatment_id = _next_id(Treatment)
+    for doc in doctor_ids:
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            day_iso = day.isoformat()
+            past = day < today
+            for n in range(SLOTS_PER_DAY):
+                start = FIRST_SLOT_MINUTE + n * SLOT_LENGTH
+                time_slot = format_slot(start, start + SLOT_LENGTH)
+                booked = rng.random() < book_probability
+                status = None
+                if booked:
+                    roll = rng.random()
+                    if past:
+                        status = "completed" if roll < 0.85 else "cancelled" if roll < 0.95 else "booked"
+                    else:
+                        status = "cancelled" if roll < 0.08 else "booked"
+                writer.add(DoctorAvailability, {
+                    "id": availability_id, "doctor_id": doc, "date": day_iso, "time_slot": time_slot,
+                    "start_minute": start, "end_minute": start + SLOT_LENGTH, "is_active": True,
+                    "is_booked": status in ("booked", "completed"), "version": 1 if booked else 0,
+                    "created_at": now, "updated_at": now,
+                })
+                if booked:
+                    booked_at = (datetime.combine(day, datetime.min.time())
+                                 - timedelta(days=rng.randint(1, 20))).isoformat(sep=" ")
+                    writer.add(Appointment, {
+                        "id": appointment_id, "patient_id": rng.randint(first_patient, last_patient),
+                        "doctor_id": doc, "availability_id": availability_id, "date": day_iso,
+                        "time_slot": time_slot, "status": status, "reason": None,
+                        "created_at": booked_at, "updated_at": booked_at,
+                    })
+                    writer.add(AppointmentStatusHistory, {
+                        "id": history_id, "appointment_id": appointment_id, "old_status": None,
+                        "new_status": "booked", "changed_by_user_id": None, "note": None,
+                        "changed_at": booked_at,
+                    })
+                    history_id += 1
+                    if status != "booked":
+                        writer.add(AppointmentStatusHistory, {
+                            "id": history_id, "appointment_id": appointment_id, "old_status": "booked",
+                            "new_status": status, "changed_by_user_id": None, "note": None,
+                            "changed_at": f"{day_iso} 17:30:00",
+                        })
+                        history_id += 1
+                    if status == "completed":
+                        writer.add(Treatment, {
+                            "id": treatment_id, "appointment_id": appointment_id, "doctor_id": doc,
+                            "diagnosis": rng.choice(DIAGNOSES), "prescription": rng.choice(PRESCRIPTIONS),
+                            "notes": None,
+                            "followup_date": (day + timedelta(days=14)).isoformat() if rng.random() < 0.25 else None,
+                            "created_at": f"{day_iso} 17:30:00", "updated_at": f"{day_iso} 17:30:00",
+                        })
+                        treatment_id += 1
+                    appointment_id += 1
+                availability_id += 1
+    writer.flush()
+    sync_sequences(db.session.connection(), [t for t in db.metadata.sorted_tables if t.name in writer.counts])
+    db.session.commit()
+    log(f"  {writer.counts.get('appointments', 0)} appointments over {days} days")
+
+    rebuild_derived()
+    return writer.counts
+
+
+def rebuild_derived():
+    """Recompute tables maintained by flush hooks, which bulk inserts bypass."""
+    dashboard_stats.rebuild_counters()
+    slots.rebuild_all()
+    agenda.rebuild_all()
+    search.rebuild_index()
+    reports.rebuild_rollups()
@@ -0,0 +1,169 @@
+# backend/services/timeline.py
+"""
+Patient treatment-history timeline.
+
+`load_timeline(patient_id)` assembles every appointment of a patient
+(newest first) with its treating doctor's name, its treatments (and their
+doctors' names) and its status changes in five queries, instead of the
+several lazy loads per visit the relationships would otherwise cost
+(selectinload batches 500 appointments per IN list, so a patient with
+more visits adds one query per batch to steps 3-5):
+
+1. the patient and their user row;
+2. the appointments over ix_appointment_patient_date_id, with the doctor
+   and the doctor's user joined in;
+3. the treatments of all those appointments (selectinload);
+4. the treating doctors not already loaded, if any (selectinload);
+5. the status history of all those appointments (selectinload).
+
+`get_timeline(patient_id)` returns the encoded JSON from a per-process LRU
+cache (TIMELINE_CACHE_SIZE entries, TIMELINE_CACHE_TTL seconds). Writes
+through the ORM to an Appointment, Treatment or AppointmentStatusHistory
+drop the affected patients' entries immediately and again on commit; Core
+statements and other server processes are only caught by the TTL.
+"""
+import os
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from models.models import (
+    db,
+    Appointment,
+    AppointmentStatusHistory,
+    DoctorProfile,
+    PatientProfile,
+    Treatment,
+    User,
+)
+from services import serializers
+from services.cache import TTLCache, invalidate_on_commit
+from services.db_utils import attr_changed, previous_value, track_attributes
+
+_cache = TTLCache(
+    maxsize=int(os.getenv("TIMELINE_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("TIMELINE_CACHE_TTL", "30")),
+)
+
+track_attributes(Appointment, "patient_id")
+track_attributes(Treatment, "appointment_id")
+track_attributes(AppointmentStatusHistory, "appointment_id")
+
+
+def _doctor_name():
+    return joinedload(DoctorProfile.user).options(load_only(User.full_name))
+
+
+def _visit(appt):
+    return {
+        "appointment_id": appt.id,
+        "date": appt.date,
+        "time_slot": appt.time_slot,
+        "status": appt.status,
+        "reason": appt.reason,
+        "doctor_id": appt.doctor_id,
+        "doctor_name": appt.doctor.user.full_name if appt.doctor else None,
+        "treatments": [
+            {
+                "id": t.id,
+                "doctor_id": t.doctor_id,
+                "doctor_name": t.doctor.user.full_name if t.doctor else None,
+                "diagnosis": t.diagnosis,
+                "prescription": t.prescription,
+                "notes": t.notes,
+                "followup_date": t.followup_date,
+                "created_at": t.created_at,
+            }
+            for t in sorted(appt.treatments, key=lambda t: (t.created_at, t.id))
+        ],
+        "status_history": [
+            {
+                "old_status": h.old_status,
+                "new_status": h.new_status,
+                "changed_by_user_id": h.changed_by_user_id,
+                "note": h.note,
+                "changed_at": h.changed_at,
+            }
+            for h in sorted(appt.status_history, key=lambda h: (h.changed_at, h.id))
+        ],
+    }
+
+
+def load_timeline(patient_id):
+    """The timeline dict of `patient_id`, or None if there is no such patient."""
+    patient = db.session.execute(
+        select(PatientProfile.id, PatientProfile.dob, PatientProfile.gender, User.full_name)
+        .join(User, PatientProfile.user_id == User.id)
+        .where(PatientProfile.id == patient_id)
+    ).first()
+    if patient is None:
+        return None
+    appointments = db.session.scalars(
+        select(Appointment)
+        .where(Appointment.patient_id == patient_id)
+        .order_by(Appointment.date.desc(), Appointment.id.desc())
+        .options(
+            joinedload(Appointment.doctor).options(load_only(DoctorProfile.id), _doctor_name()),
+            selectinload(Appointment.treatments).options(
+                selectinload(Treatment.doctor).options(load_only(DoctorProfile.id), _doctor_name())
+            ),
+            selectinload(Appointment.status_history),
+        )
+    ).all()
+    visits = [_visit(appt) for appt in appointments]
+    return {
+        "patient": {"id": patient.id, "full_name": patient.full_name, "dob": patient.dob, "gender": patient.gender},
+        "visit_count": len(visits),
+        "visits": visits,
+    }
+
+
+def get_timeline(patient_id):
+    """Encoded timeline JSON (bytes) for `patient_id`, cached; None if there is no such patient."""
+    body = _cache.get(patient_id)
+    if body is None:
+        timeline = load_timeline(patient_id)
+        if timeline is None:
+            return None
+        body = serializers.dumps(timeline)  # cached whole, so there is nothing to stream
+        _cache.set(patient_id, body)
+    return body
+
+
+def invalidate(patient_id=None):
+    if patient_id is None:
+        _cache.invalidate()
+    else:
+        _cache.invalidate(patient_id)
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def _appointment_ids(obj):
+    ids = {obj.appointment_id}
+    if attr_changed(obj, "appointment_id"):
+        ids.add(previous_value(obj, "appointment_id"))
+    return ids
+
+
+@event.listens_for(db.session, "after_flush")
+def _track_changes(session, flush_context):
+    patients, appointment_ids = set(), set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Appointment):
+            patients.add(obj.patient_id)
+            if attr_changed(obj, "patient_id"):
+                patients.add(previous_value(obj, "patient_id"))
+        elif isinstance(obj, (Treatment, AppointmentStatusHistory)):
+            appointment_ids |= _appointment_ids(obj)
+    appointment_ids.discard(None)
+    if appointment_ids:
+        patients.update(session.connection().execute(
+            select(Appointment.patient_id).where(Appointment.id.in_(appointment_ids))
+        ).scalars())
+    patients.discard(None)
+    for patient_id in patients:
+        _cache.invalidate(patient_id)
+        invalidate_on_commit(session, _cache, patient_id)
@@ -0,0 +1,87 @@
+# backend/tests/conftest.py
+"""
+Shared fixtures. Run from backend/: python -m pytest
+
+Every test gets a fresh SQLite database and scratch directories under
+pytest's tmp_path; caches and other per-process state are reset around it,
+since the next test's database reuses the same ids.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import cache, principals, replicas  # noqa: E402
+
+OUTPUT_DIRS = ("EXPORT_DIR", "REPORT_DIR", "PROFILE_DIR", "ARCHIVE_DIR")
+
+
+@pytest.fixture(autouse=True)
+def _fresh_process_state():
+    def reset():
+        cache.invalidate_all()
+        replicas._sticky.clear()
+        principals._sync.update(pid=None, next=0.0)
+
+    reset()
+    yield
+    reset()
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """create_app() against tmp_path, with environment overrides: make_app(DB_REPLICA_URLS=...)."""
+    from app import create_app
+
+    apps = []
+
+    def make(**env):
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+        monkeypatch.setenv("JWT_SECRET_KEY", "test-secret-key-long-enough-for-hs256")
+        monkeypatch.setenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")  # fast; the method is not under test
+        for name in OUTPUT_DIRS:
+            monkeypatch.setenv(name, str(tmp_path / name.lower()))
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        app = create_app()
+        app.config["TESTING"] = True
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            from models.models import db
+
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    """The app on a database seeded by seed_database() (admin, drsmith, johndoe)."""
+    from app import seed_database
+
+    app = make_app()
+    seed_database(app)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """login(username, password) -> Authorization headers."""
+
+    def login(username, password):
+        response = client.post("/api/auth/login", json={"username": username, "password": password})
+        assert response.status_code == 200, response.json
+        return {"Authorization": f"Bearer {response.json['access_token']}"}
+
+    return login
@@ -0,0 +1,65 @@
+# backend/tests/test_booking.py
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from models.models import db, DoctorAvailability, PatientProfile
+from services import booking
+
+
+def free_slot_id():
+    return db.session.scalar(select(DoctorAvailability.id).where(DoctorAvailability.is_booked.is_(False)).limit(1))
+
+
+def failing(exc):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise exc
+
+    return fn, calls
+
+
+def test_unknown_patient_is_a_404_and_claims_nothing(app, client, login):
+    with app.app_context():
+        slot_id = free_slot_id()
+    response = client.post("/api/appointments", json={"availability_id": slot_id, "patient_id": 999999},
+                           headers=login("admin", "admin123"))
+    assert response.status_code == 404
+    assert response.json["error"] == "Patient not found"
+    with app.app_context():
+        assert db.session.get(DoctorAvailability, slot_id).is_booked is False
+
+
+def test_second_booking_of_a_slot_is_a_conflict(app):
+    with app.app_context():
+        patient_id = db.session.scalar(select(PatientProfile.id))
+        slot_id = free_slot_id()
+        booking.book_slot(patient_id, slot_id)
+        with pytest.raises(booking.SlotUnavailable):
+            booking.book_slot(patient_id, slot_id)
+
+
+@pytest.mark.parametrize("exc", [
+    IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed: appointments.doctor_id")),
+    OperationalError("UPDATE", {}, Exception("database is locked")),
+    booking._LostRace(),
+])
+def test_transient_failures_are_retried(app, monkeypatch, exc):
+    monkeypatch.setattr(booking, "BACKOFF_BASE", 0)
+    fn, calls = failing(exc)
+    with app.app_context(), pytest.raises(booking.BookingContention):
+        booking._with_retries(fn, 3)
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("exc", [
+    IntegrityError("INSERT", {}, Exception("FOREIGN KEY constraint failed")),
+    OperationalError("SELECT", {}, Exception("no such table: appointments")),
+])
+def test_other_database_errors_are_not_retried(app, exc):
+    fn, calls = failing(exc)
+    with app.app_context(), pytest.raises(type(exc)):
+        booking._with_retries(fn, 3)
+    assert len(calls) == 1
@@ -0,0 +1,77 @@
+# backend/tests/test_dashboard.py
+from datetime import date, timedelta
+
+from sqlalchemy import delete, func, select, update
+
+from models.models import db, Appointment, DashboardCounter, DoctorProfile, PatientProfile
+from services import dashboard_stats
+
+META = (DashboardCounter.scope == "meta") & (DashboardCounter.key == "initialized")
+
+
+def todays():
+    dashboard_stats.invalidate()
+    return dashboard_stats.get_stats()["todays_appointments"]
+
+
+def book(day, time_slot):
+    appointment = Appointment(
+        patient_id=db.session.scalar(select(PatientProfile.id)),
+        doctor_id=db.session.scalar(select(DoctorProfile.id)),
+        date=day, time_slot=time_slot,
+    )
+    db.session.add(appointment)
+    db.session.commit()
+    return appointment
+
+
+def test_todays_appointments_leave_out_cancelled_ones(app):
+    today = date.today()
+    with app.app_context():
+        first, second = book(today, "09:00-09:30"), book(today, "09:30-10:00")
+        assert todays() == 2
+
+        first.status = "cancelled"
+        db.session.commit()
+        assert todays() == 1
+
+        first.status = "booked"  # rebooked
+        second.status = "cancelled"
+        second.date = today + timedelta(days=1)
+        db.session.commit()
+        assert todays() == 1
+
+        db.session.delete(first)
+        db.session.commit()
+        assert todays() == 0
+
+        book(today, "10:00-10:30")
+        counted = dashboard_stats.get_stats()
+        dashboard_stats.rebuild_counters()
+        rebuilt = dashboard_stats.get_stats()
+        assert rebuilt["todays_appointments"] == counted["todays_appointments"] == 1
+        assert rebuilt["total_appointments"] == counted["total_appointments"] == 2
+
+
+def test_reads_never_rebuild(app):
+    with app.app_context():
+        db.session.execute(delete(DashboardCounter))
+        db.session.commit()
+        dashboard_stats.invalidate()
+        assert dashboard_stats.get_stats()["total_users"] == 0
+        assert db.session.scalar(select(func.count()).select_from(DashboardCounter)) == 0
+
+
+def test_startup_rebuilds_missing_or_outdated_counters(app):
+    with app.app_context():
+        assert dashboard_stats.ensure_counters() is False
+
+        db.session.execute(update(DashboardCounter).where(META).values(value=1))
+        db.session.commit()
+        assert dashboard_stats.ensure_counters() is True
+
+        db.session.execute(delete(DashboardCounter))
+        db.session.commit()
+        assert dashboard_stats.ensure_counters() is True
+        dashboard_stats.invalidate()
+        assert dashboard_stats.get_stats()["total_users"] == 3
@@ -0,0 +1,46 @@
+# backend/tests/test_http_cache.py
+import sqlite3
+import time
+
+import pytest
+
+from services import http_cache
+
+
+@pytest.fixture
+def fresh_backends(monkeypatch):
+    monkeypatch.setattr(http_cache, "_backends", {})
+
+
+def test_memory_entries_expire_quickly_by_default(app, fresh_backends):
+    with app.app_context():
+        assert http_cache.backend().entries.ttl == http_cache.MEMORY_TTL
+
+
+def test_dashboard_revalidation_sees_writes_of_other_processes(app, client, login, fresh_backends):
+    headers = login("admin", "admin123")
+    first = client.get("/api/admin/dashboard", headers=headers)
+    assert first.status_code == 200 and first.last_modified is not None
+
+    # another worker changes the counters; this one still has its old namespace stamp
+    path = app.config["SQLALCHEMY_DATABASE_URI"].removeprefix("sqlite:///")
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("UPDATE dashboard_counters SET value = ? WHERE scope = 'meta' AND key = 'changed_at'",
+                     (int((time.time() + 5) * 1000),))
+        conn.commit()
+    finally:
+        conn.close()
+    http_cache._backends["memory"].entries.invalidate()  # as if the request reached a worker without the entry
+
+    revalidated = client.get("/api/admin/dashboard",
+                             headers={**headers, "If-Modified-Since": first.headers["Last-Modified"]})
+    assert revalidated.status_code == 200 and revalidated.last_modified > first.last_modified
+
+
+def test_dashboard_is_not_modified_while_nothing_changes(app, client, login, fresh_backends):
+    headers = login("admin", "admin123")
+    first = client.get("/api/admin/dashboard", headers=headers)
+    http_cache._backends["memory"].entries.invalidate()
+    again = client.get("/api/admin/dashboard", headers={**headers, "If-Modified-Since": first.headers["Last-Modified"]})
+    assert again.status_code == 304
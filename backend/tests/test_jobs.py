@@ -0,0 +1,23 @@
+# backend/tests/test_jobs.py
+from datetime import datetime, timedelta
+
+from models.models import db, Job
+from services import jobs
+
+
+def test_stale_jobs_are_requeued_until_their_attempts_run_out(app):
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    with app.app_context():
+        retry = Job(name="exports.run", status="running", attempts=1, max_attempts=3, locked_by="w", locked_at=long_ago)
+        give_up = Job(name="exports.run", status="running", attempts=3, max_attempts=3, locked_by="w", locked_at=long_ago)
+        fresh = Job(name="exports.run", status="running", attempts=3, max_attempts=3, locked_by="w",
+                    locked_at=datetime.utcnow())
+        db.session.add_all([retry, give_up, fresh])
+        db.session.commit()
+
+        assert jobs.requeue_stale(lease=60) == 2
+        db.session.expire_all()
+        assert (retry.status, retry.locked_by) == ("queued", None)
+        assert give_up.status == "failed" and give_up.finished_at is not None
+        assert give_up.last_error == "lease expired"
+        assert fresh.status == "running"
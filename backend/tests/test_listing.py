@@ -0,0 +1,15 @@
+# backend/tests/test_listing.py
+import pytest
+
+
+def test_doctor_directory_lists_public_fields(client, login):
+    response = client.get("/api/doctors?fields=id,full_name,specializations", headers=login("johndoe", "patient123"))
+    assert response.status_code == 200
+    [doctor] = response.json["items"]
+    assert doctor["full_name"] and set(doctor) == {"id", "full_name", "specializations"}
+
+
+@pytest.mark.parametrize("field", ["email", "phone", "username"])
+def test_doctor_directory_hides_contact_details(client, login, field):
+    response = client.get(f"/api/doctors?fields=id,{field}", headers=login("johndoe", "patient123"))
+    assert response.status_code == 400 and field in response.json["error"]
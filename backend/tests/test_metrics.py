@@ -0,0 +1,71 @@
+# backend/tests/test_metrics.py
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services import metrics
+
+TOKEN = "scrape-me"
+
+
+@pytest.fixture
+def metrics_app(make_app, tmp_path):
+    from app import seed_database
+
+    app = make_app(METRICS_TOKEN=TOKEN, METRICS_DIR=tmp_path / "metrics")
+    seed_database(app)
+    return app
+
+
+def scrape(client, token=TOKEN):
+    return client.get("/metrics", headers={"Authorization": f"Bearer {token}"} if token else {})
+
+
+def exited_process_snapshot(directory, requests):
+    """Write a snapshot the way another worker would have, then let that worker exit."""
+    snapshot = {
+        "values": [["hms_requests_total", [["endpoint", "gone"]], requests],
+                   ["hms_db_pool_checked_out", [["bind", "primary"]], 3]],
+        "histograms": [],
+    }
+    code = ("import json, os, sys; from services import metrics; "
+            "path = os.path.join(sys.argv[1], metrics._snapshot_name()); "
+            "open(path, 'w').write(sys.argv[2]); print(os.path.basename(path))")
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    done = subprocess.run([sys.executable, "-c", code, str(directory), json.dumps(snapshot)],
+                          cwd=backend, capture_output=True, text=True, check=True)
+    return done.stdout.strip()
+
+
+def test_metrics_need_the_token(make_app):
+    client = make_app().test_client()
+    assert scrape(client, token=None).status_code == 403
+
+
+def test_metrics_refuse_a_wrong_token(metrics_app):
+    client = metrics_app.test_client()
+    assert scrape(client, token=None).status_code == 401
+    assert scrape(client, token="guess").status_code == 401
+    assert scrape(client).status_code == 200
+
+
+def test_exited_workers_are_folded_into_the_retired_totals(metrics_app, tmp_path):
+    directory = tmp_path / "metrics"
+    directory.mkdir()
+    exited_process_snapshot(directory, 5)
+    exited_process_snapshot(directory, 5)
+    body = scrape(metrics_app.test_client()).get_data(as_text=True)
+
+    assert 'hms_requests_total{endpoint="gone"} 10' in body  # counters survive their process
+    assert 'hms_db_pool_checked_out{bind="primary"} 3' not in body  # gauges do not
+    assert set(os.listdir(directory)) == {metrics.RETIRED, metrics._snapshot_name(), "metrics.lock"}
+
+
+def test_snapshot_files_are_per_process_start(metrics_app):
+    pid, started = metrics._snapshot_name()[len("metrics-"):-len(".json")].split("-")
+    assert int(pid) == os.getpid() and started == metrics._start_time(os.getpid())
+    assert metrics._alive(metrics._snapshot_name())
+    assert not metrics._alive(f"metrics-{os.getpid()}-1.json")  # same pid, earlier process
@@ -0,0 +1,55 @@
+# backend/tests/test_notifications.py
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+from models.models import db, Notification, User
+from services import notifications
+
+
+@pytest.fixture(autouse=True)
+def _no_cached_transports(monkeypatch):
+    monkeypatch.setattr(notifications, "_transports", {})
+
+
+def add_notification():
+    user_id = db.session.scalar(select(User.id).where(User.username == "johndoe"))
+    db.session.add(Notification(user_id=user_id, type="reminder", payload=json.dumps({"message": "hi"})))
+    db.session.commit()
+
+
+def undelivered():
+    return db.session.scalars(select(Notification).where(Notification.delivered_at.is_(None))).all()
+
+
+@pytest.mark.parametrize("settings", [
+    {},
+    {"NOTIFY_TRANSPORT": "pigeon"},
+    {"NOTIFY_TRANSPORT": "webhook"},
+    {"NOTIFY_TRANSPORT": "smtp"},
+])
+def test_delivery_without_a_transport_fails_and_leaves_notifications_alone(app, settings):
+    app.config.update({"NOTIFY_TRANSPORT": None, **settings})
+    with app.app_context():
+        add_notification()
+        with pytest.raises(notifications.TransportNotConfigured):
+            notifications.deliver_pending()
+        [pending] = undelivered()
+        assert pending.delivery_attempts == 0
+
+
+def test_the_stub_is_opt_in(app):
+    app.config["NOTIFY_TRANSPORT"] = "stub"
+    with app.app_context():
+        add_notification()
+        assert notifications.deliver_pending() == {"sent": 1, "failed": 0}
+        assert undelivered() == []
+
+
+def test_the_stub_keeps_only_recent_messages():
+    stub = notifications.StubTransport(keep=2)
+    for n in range(5):
+        asyncio.run(stub.send({"id": n}))
+    assert [m["id"] for m in stub.sent] == [3, 4]
@@ -0,0 +1,12 @@
+# backend/tests/test_params.py
+import pytest
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/admin/availability/generate", {"start": 20300101}),
+    ("/api/admin/availability/generate", {"start": ["2030-01-01"]}),
+    ("/api/admin/appointments/status", {"status": "cancelled", "doctor_id": 1, "date": 20300101}),
+])
+def test_dates_of_the_wrong_json_type_are_a_bad_request(client, login, path, body):
+    response = client.post(path, json=body, headers=login("admin", "admin123"))
+    assert response.status_code == 400 and "Invalid date" in response.json["error"]
@@ -0,0 +1,66 @@
+# backend/tests/test_passwords.py
+import threading
+import time
+
+import pytest
+
+from services import passwords
+
+
+def slow(value):
+    time.sleep(0.05)
+    return value
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv("PASSWORD_HASH_WORKERS", "1")
+    monkeypatch.setenv("PASSWORD_HASH_QUEUE", "2")
+    pool = passwords._Pool()
+    yield pool
+    pool._executor.shutdown(wait=True)
+
+
+def test_a_login_waits_behind_a_few_bulk_hashes_not_the_batch(pool):
+    batch = threading.Thread(target=pool.map, args=(slow, range(40)))
+    batch.start()
+    time.sleep(0.1)
+    started = time.monotonic()
+    assert pool.run(slow, "login", timeout=1.0) == "login"
+    waited = time.monotonic() - started
+    batch_running = batch.is_alive()
+    batch.join()
+    assert batch_running and waited < 0.5
+
+
+def test_bulk_hashes_respect_the_queue_bound(pool):
+    pool._ensure()
+    for _ in range(3):  # workers + queue slots, all taken by logins
+        pool._slots.acquire()
+    with pytest.raises(passwords.HashingBusy):
+        pool.map(slow, range(5), timeout=0.1)
+    for _ in range(3):
+        pool._slots.release()
+    assert pool.map(slow, range(5)) == list(range(5))
+
+
+def test_bulk_onboarding_is_shed_when_hashing_is_busy(client, login, monkeypatch):
+    def busy(plaintexts, timeout=None):
+        raise passwords.HashingBusy("Password hashing queue is full")
+
+    monkeypatch.setattr(passwords, "hash_many", busy)
+    doctor = {"username": "drnew", "email": "drnew@example.com", "password": "doctor123"}
+    response = client.post("/api/admin/doctors/bulk", json={"doctors": [doctor]}, headers=login("admin", "admin123"))
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+
+
+def test_a_login_is_refused_quickly_when_the_queue_is_full(pool):
+    pool._ensure()
+    for _ in range(3):
+        pool._slots.acquire()
+    started = time.monotonic()
+    with pytest.raises(passwords.HashingBusy):
+        pool.run(slow, "login")
+    assert time.monotonic() - started < 0.5
+    for _ in range(3):
+        pool._slots.release()
@@ -0,0 +1,75 @@
+# backend/tests/test_principals.py
+import sqlite3
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from models.models import db, User
+from services import principals
+
+
+@pytest.fixture
+def sync_every_lookup(monkeypatch):
+    monkeypatch.setattr(principals, "SYNC_SECONDS", 0.0)
+
+
+def update_from_another_process(app, username, **values):
+    """Write like another server process would: behind this process's back, stamping updated_at."""
+    path = app.config["SQLALCHEMY_DATABASE_URI"].removeprefix("sqlite:///")
+    values["updated_at"] = datetime.utcnow().isoformat(sep=" ")
+    conn = sqlite3.connect(path)
+    try:
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        conn.execute(f"UPDATE users SET {assignments} WHERE username = ?", (*values.values(), username))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_orm_updates_invalidate_at_once(app):
+    with app.app_context():
+        user = db.session.scalar(select(User).where(User.username == "johndoe"))
+        assert principals.is_allowed(principals.get_principal(user.id))
+        user.blacklisted = True
+        db.session.commit()
+        assert not principals.is_allowed(principals.get_principal(user.id))
+
+
+def test_changes_from_other_processes_are_picked_up(app, sync_every_lookup):
+    with app.app_context():
+        user_id = db.session.scalar(select(User.id).where(User.username == "johndoe"))
+        assert principals.get_principal(user_id).is_active
+        db.session.commit()
+
+        update_from_another_process(app, "johndoe", is_active=0)
+        assert principals.get_principal(user_id).is_active is False
+
+
+def test_other_processes_are_seen_within_the_sync_interval(app, monkeypatch):
+    monkeypatch.setattr(principals, "SYNC_SECONDS", 3600.0)
+    with app.app_context():
+        user_id = db.session.scalar(select(User.id).where(User.username == "johndoe"))
+        principals.get_principal(user_id)
+        update_from_another_process(app, "johndoe", blacklisted=1)
+        assert principals.get_principal(user_id).blacklisted is False  # not due yet
+
+        principals._sync["next"] = 0.0
+        assert principals.get_principal(user_id).blacklisted is True
+
+
+@pytest.mark.parametrize("change", [{"blacklisted": 1}, {"is_active": 0}])
+@pytest.mark.parametrize("path", ["/api/notifications/unread-count", "/api/appointments"])
+def test_disabled_elsewhere_is_refused_by_the_api(app, client, login, sync_every_lookup, change, path):
+    headers = login("johndoe", "patient123")
+    assert client.get(path, headers=headers).status_code == 200
+    update_from_another_process(app, "johndoe", **change)
+    assert client.get(path, headers=headers).status_code == 401
+
+
+def test_cached_profile_is_not_served_to_a_deactivated_user(app, client, login, sync_every_lookup):
+    headers = login("johndoe", "patient123")
+    assert client.get("/api/auth/profile", headers=headers).status_code == 200
+    update_from_another_process(app, "johndoe", is_active=0)
+    response = client.get("/api/auth/profile", headers=headers)
+    assert response.status_code == 401 and "username" not in response.json
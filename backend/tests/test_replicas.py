@@ -0,0 +1,118 @@
+# backend/tests/test_replicas.py
+"""Read-replica routing against two SQLite stand-ins: snapshots of the primary that never catch up."""
+import sqlite3
+from collections import Counter
+from datetime import date
+
+import pytest
+from sqlalchemy import event, func, select
+
+from models.models import db, DoctorAvailability, Specialization
+from services import replicas
+
+
+def snapshot(source, target):
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+@pytest.fixture
+def replica_app(make_app, tmp_path):
+    from app import seed_database
+
+    seed_app = make_app()
+    seed_database(seed_app)
+    with seed_app.app_context():
+        db.session.execute(db.text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        for engine in db.engines.values():
+            engine.dispose()
+    copies = [tmp_path / f"replica{n}.db" for n in range(2)]
+    for path in copies:
+        snapshot(tmp_path / "test.db", path)
+    return make_app(DB_REPLICA_URLS=",".join(f"sqlite:///{path}" for path in copies))
+
+
+@pytest.fixture
+def statements(replica_app):
+    """Counter of statements run per engine ("primary", "replica_0", ...)."""
+    counts = Counter()
+    listeners = []
+    with replica_app.app_context():
+        for key, engine in db.engines.items():
+            def count(*args, name=key or "primary"):
+                counts[name] += 1
+            event.listen(engine, "before_cursor_execute", count)
+            listeners.append((engine, count))
+    yield counts
+    for engine, count in listeners:
+        event.remove(engine, "before_cursor_execute", count)
+
+
+def count_specializations():
+    return db.session.scalar(select(func.count()).select_from(Specialization))
+
+
+def test_reads_outside_read_only_use_the_primary(replica_app, statements):
+    with replica_app.app_context():
+        count_specializations()
+    assert set(statements) == {"primary"}
+
+
+def test_reads_inside_read_only_use_a_replica(replica_app, statements):
+    with replica_app.app_context():
+        with replicas.read_only():
+            count_specializations()
+            count_specializations()
+    assert statements["primary"] == 0
+    # one replica for the whole transaction
+    assert len(statements) == 1 and next(iter(statements)).startswith(replicas.PREFIX)
+
+
+def test_transactions_are_spread_over_the_replicas(replica_app, statements):
+    with replica_app.app_context():
+        for _ in range(4):
+            with replicas.read_only():
+                count_specializations()
+            db.session.commit()
+    assert statements == {"replica_0": 2, "replica_1": 2}
+
+
+def test_writes_and_reads_after_a_write_use_the_primary(replica_app, statements):
+    with replica_app.app_context():
+        with replicas.read_only():
+            before = count_specializations()
+            db.session.add(Specialization(name="Oncology", description="Cancer care"))
+            db.session.flush()
+            statements.clear()
+            assert count_specializations() == before + 1
+            assert set(statements) == {"primary"}
+            db.session.commit()
+
+        # a new transaction without a user to pin reads from a replica again, which lags behind
+        with replicas.read_only():
+            assert count_specializations() == before
+        db.session.rollback()
+        assert count_specializations() == before + 1
+
+
+@pytest.mark.parametrize("sticky_seconds, visible", [(5.0, True), (0.0, False)])
+def test_users_read_their_own_writes_while_sticky(replica_app, sticky_seconds, visible):
+    replica_app.config["DB_REPLICA_STICKY_SECONDS"] = sticky_seconds
+    client = replica_app.test_client()
+    token = client.post("/api/auth/login", json={"username": "johndoe", "password": "patient123"}).json
+    headers = {"Authorization": f"Bearer {token['access_token']}"}
+    with replica_app.app_context():
+        slot_id = db.session.scalar(
+            select(DoctorAvailability.id)
+            .where(DoctorAvailability.is_booked.is_(False), DoctorAvailability.date > date.today())
+            .limit(1)
+        )
+
+    booked = client.post("/api/appointments", json={"availability_id": slot_id}, headers=headers)
+    assert booked.status_code == 201, booked.json
+    listed = client.get("/api/appointments?sort=-date&limit=100", headers=headers).json["items"]
+    assert any(item["id"] == booked.json["id"] for item in listed) is visible
@@ -0,0 +1,64 @@
+# backend/tests/test_schedules.py
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from models.models import db, DoctorProfile
+from services import schedules
+
+
+@pytest.mark.parametrize("entry, message", [
+    ({"weekday": 0, "time_range": "09:00-12:00", "slot_minutes": 15}, "multiple of 30"),
+    ({"weekday": 0, "time_range": "09:00-12:00", "slot_minutes": 45}, "multiple of 30"),
+    ({"weekday": 0, "time_range": "09:00-12:00", "slot_minutes": 270}, "multiple of 30"),
+    ({"weekday": 0, "time_range": "09:15-12:00", "slot_minutes": 30}, "hour or half hour"),
+    ({"weekday": 7, "time_range": "09:00-12:00", "slot_minutes": 30}, "weekday"),
+    ({"weekday": 0, "time_range": "09:00-09:30", "slot_minutes": 60}, "shorter than one slot"),
+])
+def test_templates_off_the_slot_grid_are_rejected(app, entry, message):
+    with app.app_context():
+        doctor_id = db.session.scalar(select(DoctorProfile.id))
+        with pytest.raises(ValueError, match=message):
+            schedules.set_weekly_template(doctor_id, [entry])
+
+
+def test_hour_long_slots_expand_on_the_grid(app):
+    with app.app_context():
+        doctor_id = db.session.scalar(select(DoctorProfile.id))
+        templates = schedules.set_weekly_template(
+            doctor_id, [{"weekday": 0, "time_range": "13:30-16:00", "slot_minutes": 60}]
+        )
+        rows = list(schedules.expand(templates, date(2030, 1, 7), 1))  # a Monday
+        assert [r["time_slot"] for r in rows] == ["13:30-14:30", "14:30-15:30"]
+
+
+def test_schedule_api_reports_invalid_templates(client, login):
+    headers = login("drsmith", "doctor123")
+    response = client.put("/api/doctor/schedule", headers=headers,
+                          json={"templates": [{"weekday": 1, "time_range": "09:00-12:00", "slot_minutes": 20}]})
+    assert response.status_code == 400
+    assert "multiple of 30" in response.json["error"]
+
+
+MORNING = {"weekday": 1, "time_range": "09:00-12:00"}
+
+
+@pytest.mark.parametrize("templates, message", [
+    ([MORNING, MORNING], "overlaps"),
+    ([MORNING, {"weekday": 1, "time_range": "10:00-11:00"}], "overlaps"),
+    ([MORNING, {"weekday": 1, "time_range": "11:30-13:00"}], "overlaps"),
+    (["x"], "must be an object"),
+])
+def test_schedule_api_rejects_malformed_templates_before_writing(client, login, templates, message):
+    headers = login("drsmith", "doctor123")
+    before = client.get("/api/doctor/schedule", headers=headers).json
+    response = client.put("/api/doctor/schedule", headers=headers, json={"templates": templates})
+    assert response.status_code == 400 and message in response.json["error"]
+    assert client.get("/api/doctor/schedule", headers=headers).json == before
+
+
+def test_adjacent_ranges_and_other_weekdays_may_share_hours(client, login):
+    templates = [MORNING, {"weekday": 1, "time_range": "12:00-14:00"}, {"weekday": 2, "time_range": "09:00-12:00"}]
+    response = client.put("/api/doctor/schedule", headers=login("drsmith", "doctor123"), json={"templates": templates})
+    assert response.status_code == 200 and len(response.json["templates"]) == 3
@@ -0,0 +1,25 @@
+# backend/tests/test_serializers.py
+import gzip
+import json
+from datetime import date
+
+from services import exports, serializers
+
+
+def test_stream_array_yields_chunks_of_one_array():
+    items = [{"id": n, "day": date(2030, 1, 1)} for n in range(1201)]
+    chunks = list(serializers.stream_array(items, chunk_size=500))
+    assert len(chunks) == 5  # "[", three chunks of items, "]"
+    assert json.loads(b"".join(chunks)) == [{"id": n, "day": "2030-01-01"} for n in range(1201)]
+
+
+def test_stream_array_of_nothing():
+    assert b"".join(serializers.stream_array([], prefix=b'{"a":', suffix=b"}")) == b'{"a":[]}'
+
+
+def test_json_export_is_written_as_one_array(tmp_path):
+    path = tmp_path / "export.json.gz"
+    rows = ((n, date(2030, 1, 1)) for n in range(1234))
+    assert exports.write_rows(path, "json", ["id", "date"], rows) == 1234
+    with gzip.open(path, "rt") as f:
+        assert json.load(f) == [{"id": n, "date": "2030-01-01"} for n in range(1234)]
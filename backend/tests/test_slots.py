@@ -0,0 +1,63 @@
+# backend/tests/test_slots.py
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from models.models import db, DoctorAvailability, DoctorProfile, PatientProfile
+from services import booking, slots
+
+
+def next_weekday(weekday):
+    day = date.today() + timedelta(days=1)
+    while day.weekday() != weekday:
+        day += timedelta(days=1)
+    return day
+
+
+def free_slots(doctor_id, day):
+    found = slots.search_free_slots(doctor_id=doctor_id, date_from=day, date_to=day, limit=100,
+                                    now=datetime.combine(day, datetime.min.time()))
+    return [s["time_slot"] for s in found]
+
+
+def test_booking_hides_only_the_booked_slot(app):
+    day = next_weekday(0)  # drsmith works Mon-Sat 09:00-12:00 in 30 minute slots
+    with app.app_context():
+        doctor_id = db.session.scalar(select(DoctorProfile.id))
+        patient_id = db.session.scalar(select(PatientProfile.id))
+        before = free_slots(doctor_id, day)
+        assert before[:2] == ["09:00-09:30", "09:30-10:00"] and len(before) == 6
+
+        slot_id = db.session.scalar(select(DoctorAvailability.id).where(
+            DoctorAvailability.doctor_id == doctor_id, DoctorAvailability.date == day,
+            DoctorAvailability.time_slot == "09:00-09:30",
+        ))
+        booking.book_slot(patient_id, slot_id)
+        assert free_slots(doctor_id, day) == before[1:]
+
+
+def test_search_skips_rows_already_claimed(app):
+    day = next_weekday(6)  # a Sunday: nothing generated
+    with app.app_context():
+        doctor_id = db.session.scalar(select(DoctorProfile.id))
+        db.session.add_all([
+            DoctorAvailability(doctor_id=doctor_id, date=day, time_slot="10:00-10:30", is_booked=True),
+            DoctorAvailability(doctor_id=doctor_id, date=day, time_slot="10:30-11:00"),
+        ])
+        db.session.commit()
+        # the bitmap only knows about appointments; the claimed row must still not be offered
+        assert free_slots(doctor_id, day) == ["10:30-11:00"]
+
+
+@pytest.mark.parametrize("time_slot", ["09:15-09:45", "09:00-09:45", "09:10-10:00"])
+def test_slots_off_the_half_hour_grid_are_rejected(app, time_slot):
+    with app.app_context():
+        doctor_id = db.session.scalar(select(DoctorProfile.id))
+        with pytest.raises(ValueError, match="hour or half hour"):
+            DoctorAvailability(doctor_id=doctor_id, date=next_weekday(6), time_slot=time_slot)
+
+
+def test_hour_long_slots_are_on_the_grid(app):
+    slot = DoctorAvailability(time_slot="09:30-10:30")
+    assert (slot.start_minute, slot.end_minute) == (570, 630)